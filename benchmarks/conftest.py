@@ -0,0 +1,79 @@
+"""
+Peak allocations of the microbenchmarks compared with the baseline of --benchmark-compare,
+pytest-benchmark itself compares only the timings.
+"""
+import glob
+import json
+import os
+import platform
+
+
+# peak of allocated memory by benchmark, as recorded in its extra info
+ALLOCATIONS = {}
+
+# relative growth of peak allocation reported as regression
+ALLOCATION_TOLERANCE = 0.1
+
+
+def _machine_id():
+    """
+    Directory of the machine in benchmark storage, as named by pytest-benchmark
+
+    :rtype: str
+    """
+    return '-'.join([platform.system(), platform.python_implementation(),
+                     '.'.join(platform.python_version_tuple()[:2]), platform.architecture()[0]])
+
+
+def _baseline_path(config):
+    """
+    Saved run the benchmarks are compared with
+
+    :rtype: Optional[str]
+
+    :return: path to JSON of the run or None if not compared or nothing is saved
+    """
+    compare = config.getoption('benchmark_compare', None)
+    storage = config.getoption('benchmark_storage', None)
+    if not compare or not storage:
+        return None
+    if storage.startswith('file://'):
+        storage = storage[len('file://'):]
+    elif '://' in storage:
+        return None
+    paths = sorted(glob.glob(os.path.join(storage, _machine_id(), '*.json')))
+    if compare is not True:
+        paths = [path for path in paths if os.path.basename(path).startswith(compare)]
+    return paths[-1] if paths else None
+
+
+def pytest_runtest_teardown(item):
+    """
+    Remember peak allocation recorded by the finished benchmark
+    """
+    benchmark = getattr(item, 'funcargs', {}).get('benchmark')
+    peak = getattr(benchmark, 'extra_info', {}).get('peak_alloc_bytes')
+    if peak is not None:
+        ALLOCATIONS[item.nodeid] = peak
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """
+    Report benchmarks whose peak allocation grew against the compared baseline
+    """
+    path = _baseline_path(config)
+    if path is None or not ALLOCATIONS:
+        return
+    with open(path) as f:
+        baseline = {bench['fullname']: bench.get('extra_info', {}) for bench in json.load(f)['benchmarks']}
+
+    terminalreporter.section(f'peak allocations compared with {os.path.basename(path)}')
+    regressions = 0
+    for fullname, peak in sorted(ALLOCATIONS.items()):
+        before = baseline.get(fullname, {}).get('peak_alloc_bytes')
+        if before is None or peak <= before * (1 + ALLOCATION_TOLERANCE):
+            continue
+        regressions += 1
+        terminalreporter.write_line(f'{fullname}: {before} -> {peak} bytes (+{(peak - before) / max(before, 1):.0%})')
+    terminalreporter.write_line(f'{regressions} of {len(ALLOCATIONS)} benchmarks allocate more than '
+                                f'{ALLOCATION_TOLERANCE:.0%} over the baseline')
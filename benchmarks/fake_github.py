@@ -0,0 +1,200 @@
+import aiohttp.web
+import asyncio
+import collections
+import random
+
+
+DIRS = ['docs', 'src/filabel', 'src/filabel/templates', 'tests', 'static/css', 'scripts']
+EXTENSIONS = ['py', 'md', 'html', 'css', 'cfg', 'txt']
+
+
+class FakeGitHub:
+    """
+    Fake of GitHub REST endpoints used by Filabel, serving generated repos with pull requests.
+
+    Every request is counted by its endpoint. Latency is added to every response and
+    a fraction of responses can be replaced by injected errors.
+    """
+    def __init__(self, repos=1, prs=100, files=10, max_per_page=100, latency=0.0, error_rate=0.0,
+                 error_status=500, seed=0):
+        """
+        Initilizer for FakeGitHub class.
+
+        :param int repos: number of repos of owner "bench" named "repo0", "repo1", ...
+
+        :param int prs: number of open PRs of every repo
+
+        :param int files: number of changed files of every PR
+
+        :param int max_per_page: max page size, per_page parameter above is lowered
+
+        :param float latency: seconds every response is delayed
+
+        :param float error_rate: fraction of requests answered with error
+
+        :param int error_status: status of injected errors, 403/429 come with Retry-After
+
+        :param int seed: seed of generated filenames and injected errors
+        """
+        self.repos = [f'repo{num}' for num in range(repos)]
+        self.prs = prs
+        self.files = files
+        self.max_per_page = max_per_page
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.seed = seed
+        self.random = random.Random(seed)
+
+        self.requests = collections.Counter()
+        self.errors = 0
+        self.labels = {}
+
+    @property
+    def reposlugs(self):
+        """
+        Reposlugs of the served repos
+
+        :rtype: list[str]
+        """
+        return [f'bench/{repo}' for repo in self.repos]
+
+    def filenames(self, repo, number):
+        """
+        Generated filenames of PR, always the same for the same PR
+
+        :rtype: list[str]
+        """
+        rnd = random.Random(f'{self.seed}/{repo}/{number}')
+        return [
+            f'{rnd.choice(DIRS)}/file{num}.{rnd.choice(EXTENSIONS)}'
+            for num in range(self.files)
+        ]
+
+    def _page(self, request, items):
+        """
+        Response with one page of items, Link header as GitHub sends it
+        """
+        per_page = min(int(request.query.get('per_page', 30)), self.max_per_page)
+        page = int(request.query.get('page', 1))
+        last = max(1, -(-len(items) // per_page))
+
+        links = []
+        if page < last:
+            links.append(f'<{request.url.update_query(page=page + 1)}>; rel="next"')
+            links.append(f'<{request.url.update_query(page=last)}>; rel="last"')
+        headers = {'Link': ', '.join(links)} if links else {}
+
+        return aiohttp.web.json_response(items[(page - 1) * per_page:page * per_page], headers=headers)
+
+    def _labels(self, repo, number):
+        return [{'name': name} for name in sorted(self.labels.get((repo, number), ()))]
+
+    async def user(self, request):
+        return aiohttp.web.json_response({'login': 'bench', 'html_url': 'https://github.com/bench'})
+
+    async def pulls(self, request):
+        repo = request.match_info['repo']
+        if repo not in self.repos:
+            raise aiohttp.web.HTTPNotFound()
+        prs = [{
+            'number': number,
+            'html_url': f'https://github.com/bench/{repo}/pull/{number}',
+            'head': {'sha': f'{number:040x}'},
+            'labels': self._labels(repo, number),
+        } for number in range(1, self.prs + 1)]
+        return self._page(request, prs)
+
+    async def pr_files(self, request):
+        repo = request.match_info['repo']
+        number = int(request.match_info['number'])
+        return self._page(request, [{'filename': f} for f in self.filenames(repo, number)])
+
+    async def reset_labels(self, request):
+        repo = request.match_info['repo']
+        number = int(request.match_info['number'])
+        self.labels[(repo, number)] = set((await request.json())['labels'])
+        return aiohttp.web.json_response({'labels': self._labels(repo, number)})
+
+    async def add_labels(self, request):
+        repo = request.match_info['repo']
+        number = int(request.match_info['number'])
+        self.labels.setdefault((repo, number), set()).update((await request.json())['labels'])
+        return aiohttp.web.json_response(self._labels(repo, number))
+
+    async def remove_label(self, request):
+        repo = request.match_info['repo']
+        number = int(request.match_info['number'])
+        self.labels.get((repo, number), set()).discard(request.match_info['name'])
+        return aiohttp.web.json_response(self._labels(repo, number))
+
+    async def stats(self, request):
+        """
+        Counted requests by endpoint
+        """
+        return aiohttp.web.json_response({'requests': dict(self.requests), 'errors': self.errors})
+
+    async def reset(self, request):
+        """
+        Forget counted requests and written labels
+        """
+        self.requests.clear()
+        self.errors = 0
+        self.labels.clear()
+        self.random = random.Random(self.seed)
+        return aiohttp.web.json_response({})
+
+    @aiohttp.web.middleware
+    async def middleware(self, request, handler):
+        """
+        Count the request, delay the response and inject errors
+        """
+        if request.path.startswith('/_'):
+            return await handler(request)
+
+        resource = request.match_info.route.resource
+        self.requests[f'{request.method} {resource.canonical if resource else request.path}'] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.errors += 1
+            headers = {'Retry-After': '0'} if self.error_status in (403, 429) else {}
+            return aiohttp.web.json_response({'message': 'Injected error'}, status=self.error_status,
+                                             headers=headers)
+        return await handler(request)
+
+    def app(self):
+        """
+        aiohttp application of the fake
+
+        :rtype: aiohttp.web.Application
+        """
+        app = aiohttp.web.Application(middlewares=[self.middleware])
+        app.router.add_get('/user', self.user)
+        app.router.add_get('/repos/{owner}/{repo}/pulls', self.pulls)
+        app.router.add_get('/repos/{owner}/{repo}/pulls/{number}/files', self.pr_files)
+        app.router.add_patch('/repos/{owner}/{repo}/issues/{number}', self.reset_labels)
+        app.router.add_post('/repos/{owner}/{repo}/issues/{number}/labels', self.add_labels)
+        app.router.add_delete('/repos/{owner}/{repo}/issues/{number}/labels/{name}', self.remove_label)
+        app.router.add_get('/_stats', self.stats)
+        app.router.add_post('/_reset', self.reset)
+        return app
+
+
+def serve(fake, ready):
+    """
+    Serve the fake on localhost until the process is terminated, to be run in separate process
+
+    :param FakeGitHub fake: fake to be served
+
+    :param multiprocessing.Queue ready: the base url is put there once the server listens
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    runner = aiohttp.web.AppRunner(fake.app())
+    loop.run_until_complete(runner.setup())
+    site = aiohttp.web.TCPSite(runner, '127.0.0.1', 0)
+    loop.run_until_complete(site.start())
+    port = site._server.sockets[0].getsockname()[1]
+    ready.put(f'http://127.0.0.1:{port}')
+    loop.run_forever()
@@ -0,0 +1,136 @@
+"""
+End-to-end benchmark of Filabel against local fake of GitHub REST API.
+
+Every mode runs in a fresh process, so its peak memory is not affected by the other ones::
+
+    $ python -m benchmarks.run --repos 4 --prs 200 --files 50 --latency 0.05
+"""
+import click
+import json
+import multiprocessing
+import resource
+import time
+import urllib.request
+
+from benchmarks.fake_github import FakeGitHub, serve
+from filabel.logic import Filabel
+
+
+LABELS = {
+    'docs': ['docs/*', '*.md'],
+    'frontend': ['*/templates/*', 'static/*'],
+    'tests': ['tests/*'],
+    'python': ['*.py'],
+    'config': ['*.cfg', '*.txt'],
+}
+
+MODES = {
+    'sync': {},
+    'async': {'async_run': True},
+}
+
+
+def run_mode(mode, api_url, reposlugs, labels, per_page, results):
+    """
+    Label the repos in one mode, to be run in separate process
+
+    :param str mode: name of the mode from MODES
+
+    :param str api_url: url of the fake GitHub API
+
+    :param list[str] reposlugs: repos to be labeled
+
+    :param dict[str, list[str]] labels: Configuration of labels with globs
+
+    :param int per_page: page size of paginated requests
+
+    :param multiprocessing.Queue results: wall time, PR counts and peak memory are put there
+    """
+    filabel = Filabel('<TOKEN>', labels, per_page=per_page, api_url=api_url, **MODES[mode])
+
+    started = time.perf_counter()
+    try:
+        reports = filabel.run_repos(reposlugs)
+    finally:
+        filabel.close()
+    wall = time.perf_counter() - started
+
+    prs = [changes for report in reports for changes in report.prs.values()]
+    results.put({
+        'wall': wall,
+        'repos_failed': sum(not report.ok for report in reports),
+        'prs': len(prs),
+        'prs_failed': sum(changes is None for changes in prs),
+        # kilobytes on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    })
+
+
+def fake_request(api_url, path, method='GET'):
+    """
+    Request control endpoint of the fake
+    """
+    request = urllib.request.Request(api_url + path, method=method, data=b'' if method == 'POST' else None)
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)
+
+
+@click.command()
+@click.option('--repos', type=click.IntRange(1), default=2, show_default=True, help='Number of repos.')
+@click.option('--prs', type=click.IntRange(0), default=100, show_default=True, help='Open PRs of every repo.')
+@click.option('--files', type=click.IntRange(0), default=20, show_default=True, help='Changed files of every PR.')
+@click.option('--per-page', type=click.IntRange(1, 100), default=100, show_default=True, help='Requested page size.')
+@click.option('--max-per-page', type=click.IntRange(1), default=100, show_default=True, help='Max page size served.')
+@click.option('--latency', type=float, default=0.0, show_default=True, help='Seconds every response is delayed.')
+@click.option('--error-rate', type=float, default=0.0, show_default=True, help='Fraction of requests failing.')
+@click.option('--error-status', type=int, default=500, show_default=True, help='Status of injected errors.')
+@click.option('--mode', 'modes', type=click.Choice(sorted(MODES)), multiple=True, help='Modes to run, all by default.')
+@click.option('--repeat', type=click.IntRange(1), default=1, show_default=True, help='Runs of every mode.')
+@click.option('--json', 'as_json', is_flag=True, help='Print results as JSON.')
+def main(repos, prs, files, per_page, max_per_page, latency, error_rate, error_status, modes, repeat, as_json):
+    """
+    Benchmark Filabel.run_repos in every mode against local fake GitHub
+    """
+    ctx = multiprocessing.get_context('spawn')
+    fake = FakeGitHub(repos, prs, files, max_per_page, latency, error_rate, error_status)
+
+    ready = ctx.Queue()
+    server = ctx.Process(target=serve, args=(fake, ready), daemon=True)
+    server.start()
+    api_url = ready.get(timeout=30)
+
+    rows = []
+    try:
+        for mode in modes or sorted(MODES):
+            for _ in range(repeat):
+                fake_request(api_url, '/_reset', 'POST')
+
+                results = ctx.Queue()
+                process = ctx.Process(target=run_mode,
+                                      args=(mode, api_url, fake.reposlugs, LABELS, per_page, results))
+                process.start()
+                row = results.get()
+                process.join()
+
+                stats = fake_request(api_url, '/_stats')
+                row.update(mode=mode, requests=sum(stats['requests'].values()), errors=stats['errors'],
+                           endpoints=stats['requests'])
+                rows.append(row)
+    finally:
+        server.terminate()
+
+    if as_json:
+        click.echo(json.dumps(rows, indent=2))
+        return
+
+    click.echo(f'{repos} repos x {prs} PRs x {files} files, per_page={per_page}, latency={latency}s, '
+               f'error_rate={error_rate}')
+    click.echo(f'{"mode":<8}{"wall [s]":>10}{"requests":>10}{"errors":>8}{"PRs":>8}{"failed":>8}'
+               f'{"peak RSS [MB]":>15}')
+    for row in rows:
+        click.echo(f'{row["mode"]:<8}{row["wall"]:>10.3f}{row["requests"]:>10}{row["errors"]:>8}'
+                   f'{row["prs"]:>8}{row["prs_failed"]:>8}{row["peak_rss_mb"]:>15.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+Microbenchmarks of label matching and label-set computation, run once per PR.
+
+Compare a run with the baseline stored in benchmarks/baselines::
+
+    $ python -m pytest benchmarks --benchmark-storage=benchmarks/baselines --benchmark-compare
+
+Peak of memory allocated by single call is stored in extra info of every benchmark
+and compared with the baseline too (see conftest.py).
+"""
+import configparser
+import fnmatch
+import functools
+import pytest
+import random
+import tracemalloc
+
+from filabel.logic import Filabel
+from filabel.matcher import LabelMatcher
+from filabel.utils import parse_labels
+
+pytest.importorskip('pytest_benchmark')
+
+
+DIRS = ['docs', 'src/filabel', 'src/filabel/templates', 'tests/test_cli', 'static/css', 'scripts', 'examples']
+EXTENSIONS = ['py', 'md', 'rst', 'html', 'css', 'cfg', 'txt', 'json']
+
+SHAPES = ['literal', 'prefix', 'suffix', 'general', 'mixed']
+
+
+def make_filenames(count, seed=0):
+    """
+    Generated filenames of PR
+
+    :rtype: list[str]
+    """
+    rnd = random.Random(seed)
+    return [f'{rnd.choice(DIRS)}/module{rnd.randrange(count)}/file{num}.{rnd.choice(EXTENSIONS)}'
+            for num in range(count)]
+
+
+def make_pattern(shape, num, rnd):
+    """
+    Glob of given shape, most of them matching only few of the generated filenames
+    """
+    if shape == 'mixed':
+        shape = rnd.choice(SHAPES[:-1])
+    if shape == 'literal':
+        return f'{rnd.choice(DIRS)}/module{num}/file{num}.{rnd.choice(EXTENSIONS)}'
+    if shape == 'prefix':
+        return f'{rnd.choice(DIRS)}/module{num}/*'
+    if shape == 'suffix':
+        return f'*/file{num}.{rnd.choice(EXTENSIONS)}'
+    return f'*/module{num}/*[0-9].{rnd.choice(EXTENSIONS)}'
+
+
+def make_labels(count, shape, patterns=3, seed=0):
+    """
+    Generated configuration of labels with globs of given shape
+
+    :rtype: dict[str, list[str]]
+    """
+    rnd = random.Random(seed)
+    return {
+        f'label{num}': [make_pattern(shape, num * patterns + pat, rnd) for pat in range(patterns)]
+        for num in range(count)
+    }
+
+
+def fnmatch_labels(labels, filenames):
+    """
+    Labels of filenames matched by fnmatch, one pattern after another
+
+    :rtype: set[str]
+    """
+    return {
+        label for label, patterns in labels.items()
+        if any(fnmatch.fnmatch(filename, pattern) for filename in filenames for pattern in patterns)
+    }
+
+
+def record_allocations(benchmark, func, *args):
+    """
+    Store peak of memory allocated by single call of func to the benchmark extra info
+    """
+    tracemalloc.start()
+    try:
+        func(*args)
+        benchmark.extra_info['peak_alloc_bytes'] = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize('shape', SHAPES)
+@pytest.mark.parametrize('files', [100, 1000, 10000])
+@pytest.mark.parametrize('labels', [10, 100, 500])
+def test_matching_labels(benchmark, labels, files, shape):
+    """
+    Labels of PR with filenames not seen before, no filename is cached
+    """
+    filabel = Filabel('<TOKEN>', make_labels(labels, shape), cache_size=0)
+    filenames = make_filenames(files)
+
+    record_allocations(benchmark, filabel.plan_labels, filenames, ())
+    benchmark.pedantic(filabel.plan_labels, (filenames, ()), rounds=max(3, 3000 // files))
+
+
+@pytest.mark.parametrize('shape', SHAPES)
+@pytest.mark.parametrize('files', [100, 1000])
+@pytest.mark.parametrize('labels', [10, 500])
+def test_matching_labels_cached(benchmark, labels, files, shape):
+    """
+    Labels of PR with filenames already in the filename cache, as with PRs of the same repo
+    """
+    filabel = Filabel('<TOKEN>', make_labels(labels, shape))
+    filenames = make_filenames(files)
+    filabel.plan_labels(filenames, ())
+
+    record_allocations(benchmark, filabel.plan_labels, filenames, ())
+    benchmark(filabel.plan_labels, filenames, ())
+
+
+@pytest.mark.parametrize('delete_old', [True, False], ids=['delete', 'keep'])
+@pytest.mark.parametrize('labels', [10, 500])
+def test_plan_labels(benchmark, labels, delete_old):
+    """
+    Labels of PR with many existing labels and cached filenames, mostly the label-set computation
+    """
+    filabel = Filabel('<TOKEN>', make_labels(labels, 'mixed'), delete_old=delete_old)
+    filenames = make_filenames(100)
+    rnd = random.Random(0)
+    existing = set(rnd.sample(sorted(filabel.defined_labels), labels // 2)) | {'bug', 'enhancement'}
+    filabel.plan_labels(filenames, existing)
+
+    record_allocations(benchmark, filabel.plan_labels, filenames, existing)
+    benchmark(filabel.plan_labels, filenames, existing)
+
+
+@pytest.mark.parametrize('labels', [10, 500])
+def test_parse_labels(benchmark, labels):
+    cfg = configparser.ConfigParser()
+    cfg.read_dict({'labels': {
+        label: '\n' + '\n'.join(patterns)
+        for label, patterns in make_labels(labels, 'mixed').items()
+    }})
+
+    record_allocations(benchmark, parse_labels, cfg)
+    benchmark(parse_labels, cfg)
+
+
+@pytest.mark.parametrize('labels', [10, 500])
+def test_label_matcher(benchmark, labels):
+    config = make_labels(labels, 'mixed')
+
+    record_allocations(benchmark, LabelMatcher, config)
+    benchmark(LabelMatcher, config)
+
+
+@pytest.mark.parametrize('implementation', ['matcher', 'fnmatch'])
+@pytest.mark.parametrize('labels,files', [(100, 200), (500, 100)])
+def test_general_globs(benchmark, labels, files, implementation):
+    """
+    Globs matched by regular expressions only, compared with fnmatch in the same group
+    """
+    benchmark.group = f'general-globs-{labels}x{files}'
+    config = make_labels(labels, 'general')
+    filenames = make_filenames(files)
+
+    if implementation == 'matcher':
+        matcher = LabelMatcher(config)
+        func = matcher.match
+    else:
+        func = functools.partial(fnmatch_labels, config)
+
+    assert func(filenames) == fnmatch_labels(config, filenames)
+    benchmark.pedantic(func, (filenames,), rounds=3)
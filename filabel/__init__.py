@@ -1,5 +1,39 @@
+import importlib
+import sys
+
 from filabel.cli import cli
-from filabel.web import create_app
-from filabel.logic import GitHub, Filabel
+
+# the API classes are imported when they are used, so the CLI starts fast
+_LAZY = {
+    'GitHub': 'filabel.logic',
+    'Filabel': 'filabel.logic',
+}
 
 __all__ = ['cli', 'create_app', 'GitHub', 'Filabel']
+
+
+def create_app(*args, **kwargs):
+    """
+    Prepare Filabel Flask application listening to GitHub webhooks, see filabel.web.create_app.
+    Flask is imported by the first call, not by importing filabel.
+    """
+    from filabel.web import create_app
+    return create_app(*args, **kwargs)
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(_LAZY[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+
+if sys.version_info < (3, 7):
+    # module __getattr__ is supported since Python 3.7 (PEP 562),
+    # filabel.logic imports neither aiohttp nor asyncio on import
+    from filabel.logic import GitHub, Filabel
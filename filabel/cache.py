@@ -0,0 +1,142 @@
+import collections
+import json
+import threading
+from urllib import parse
+
+from filabel.utils import connect_sqlite
+
+
+CachedResponse = collections.namedtuple('CachedResponse', ['etag', 'last_modified', 'link', 'body'])
+
+
+class ResponseCache:
+    """
+    Persistent cache of GitHub GET responses stored in SQLite file.
+
+    Responses are remembered with their ``ETag``/``Last-Modified`` validators, so the next request
+    for the same url and parameters can be made conditional. GitHub answers unchanged resources
+    with ``304 Not Modified``, which does not count against the rate limit, and the body is
+    served from the cache.
+    """
+    def __init__(self, path):
+        """
+        Initilizer for ResponseCache class.
+
+        :param str path: path to SQLite database file, created if missing
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = connect_sqlite(path)
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, link TEXT, body TEXT)'
+            )
+
+    @staticmethod
+    def key(url, params=None):
+        """
+        Cache key of request
+
+        :param str url: get url
+
+        :param Optinal[dict[str, str] params: request parameters
+
+        :rtype: str
+
+        :return: url with sorted parameters
+        """
+        if not params:
+            return url
+        return url + '#' + parse.urlencode(sorted(params.items()))
+
+    def get(self, url, params=None):
+        """
+        Get cached response of request
+
+        :param str url: get url
+
+        :param Optinal[dict[str, str] params: request parameters
+
+        :rtype: Optional[CachedResponse]
+
+        :return: cached response or None if the request was not cached
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT etag, last_modified, link, body FROM responses WHERE key = ?',
+                (self.key(url, params),)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, link, body = row
+        return CachedResponse(etag, last_modified, link, json.loads(body))
+
+    def store(self, url, params, headers, body):
+        """
+        Cache response of request if it can be validated later
+
+        :param str url: get url
+
+        :param Optinal[dict[str, str] params: request parameters
+
+        :param headers: response headers
+
+        :param body: response json
+        """
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if etag is None and last_modified is None:
+            return
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)',
+                (self.key(url, params), etag, last_modified, headers.get('Link'), json.dumps(body))
+            )
+
+    def conditional_headers(self, cached):
+        """
+        Request headers validating cached response
+
+        :param Optional[CachedResponse] cached: cached response
+
+        :rtype: Optional[dict[str, str]]
+
+        :return: If-None-Match/If-Modified-Since headers or None if nothing is cached
+        """
+        if cached is None:
+            return None
+        headers = {}
+        if cached.etag is not None:
+            headers['If-None-Match'] = cached.etag
+        if cached.last_modified is not None:
+            headers['If-Modified-Since'] = cached.last_modified
+        return headers
+
+    def record(self, cached, status):
+        """
+        Count hit or miss of conditional request
+
+        :param Optional[CachedResponse] cached: cached response the request was made with
+
+        :param int status: response status code
+
+        :rtype: bool
+
+        :return: True if the cached response should be used
+        """
+        hit = cached is not None and status == 304
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return hit
+
+    def close(self):
+        """
+        Close the database connection
+        """
+        self._connection.close()
@@ -1,7 +1,11 @@
 import configparser
 import click
+import json
+import sys
 
-from filabel.logic import Filabel, Change
+from filabel.logic import Change, DiscoveryError, ListingFailed, PRResult, RepoResult
+from filabel.shard import create_filabel, iter_sharded_reports
+from filabel.tracing import JsonTracer
 from filabel.utils import parse_labels
 
 
@@ -24,56 +28,192 @@ def stylize_label_change(change_type, label):
     return f'= {label}'
 
 
-def print_report_async(report):
+def print_repo_result(result):
     """
-    Print Filabel report to command line in async mode
+    Print result of listing PRs of repo to command line
 
-    :param report: Report to be printed
+    :param RepoResult result: result to be printed
     """
     click.secho(f'REPO', nl=False, bold=True)
-    click.secho(f' {report.repo} - ', nl=False)
-    if report.ok:
+    click.secho(f' {result.repo} - ', nl=False)
+    if result.ok:
         click.secho('OK', fg='green', bold=True)
-        for pr_link, result in report.prs.items():
-            click.secho(f'PR', nl=False, bold=True)
-            click.secho(f' {pr_link} - ', nl=False)
-            if result is None:
-                click.secho('FAIL', fg='red', bold=True)
-            else:
-                click.secho('OK', fg='green', bold=True)
-                for label, t in result:
-                    click.echo(f'  {stylize_label_change(t, label)}')
     else:
         click.secho('FAIL', fg='red', bold=True)
 
+
+def print_pr_result(result, indent=''):
+    """
+    Print result of single PR to command line
+
+    :param PRResult result: result to be printed
+
+    :param str indent: indentation of the PR lines
+    """
+    click.secho(f'{indent}PR', nl=False, bold=True)
+    click.secho(f' {result.url} - ', nl=False)
+    if result.changes is None:
+        click.secho('FAIL', fg='red', bold=True)
+    else:
+        click.secho('OK', fg='green', bold=True)
+        for label, t in result.changes:
+            click.echo(f'{indent}  {stylize_label_change(t, label)}')
+
+
+def print_listing_failed(result, indent=''):
+    """
+    Print failed listing of later page of PRs of repo to command line
+
+    :param ListingFailed result: result to be printed
+
+    :param str indent: indentation of the PR lines
+    """
+    click.secho(f'{indent}PR', nl=False, bold=True)
+    click.secho(' remaining PRs not listed - ', nl=False)
+    click.secho('FAIL', fg='red', bold=True)
+
+
+def print_result(result, indent='  '):
+    """
+    Print streamed result of repo or PR to command line
+
+    :param Union[RepoResult, PRResult, ListingFailed] result: result to be printed
+
+    :param str indent: indentation of the PR lines
+    """
+    if isinstance(result, RepoResult):
+        print_repo_result(result)
+    elif isinstance(result, ListingFailed):
+        print_listing_failed(result, indent)
+    else:
+        print_pr_result(result, indent)
+
+
+class JsonLinesWriter:
+    """
+    Writer of results as JSON Lines, one compact record per PR.
+
+    Records are buffered and written in chunks, only the buffer is kept in memory.
+    """
+    def __init__(self, stream=None, buffer_size=65536):
+        """
+        Initilizer for JsonLinesWriter class.
+
+        :param stream: text stream the records are written to, stdout if None
+
+        :param int buffer_size: number of characters written at once
+        """
+        self.stream = stream or sys.stdout
+        self.buffer_size = buffer_size
+        self._buffer = []
+        self._size = 0
+
+    @staticmethod
+    def record(result):
+        """
+        Record of streamed result, results of repos are recorded only if the repo failed,
+        failed listing of later page is recorded as failed repo after its PRs
+
+        :param Union[RepoResult, PRResult, ListingFailed] result: result to be recorded
+
+        :rtype: Optional[dict]
+        """
+        if isinstance(result, RepoResult):
+            return None if result.ok else {'repo': result.repo, 'pr': None, 'status': 'fail'}
+        if isinstance(result, ListingFailed):
+            return {'repo': result.repo, 'pr': None, 'status': 'fail'}
+
+        changes = result.changes or []
+        return {
+            'repo': result.repo,
+            'pr': result.url,
+            'status': 'fail' if result.changes is None else 'ok',
+            'added': [label for label, t in changes if t == Change.ADD],
+            'kept': [label for label, t in changes if t == Change.NONE],
+            'deleted': [label for label, t in changes if t == Change.DELETE],
+            'elapsed': None if result.elapsed is None else round(result.elapsed, 3),
+        }
+
+    def write(self, result):
+        """
+        Write record of streamed result
+
+        :param Union[RepoResult, PRResult, ListingFailed] result: result to be written
+        """
+        record = self.record(result)
+        if record is None:
+            return
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        self._buffer.append(line)
+        self._size += len(line)
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the buffered records to the stream
+        """
+        self.stream.write(''.join(self._buffer))
+        self.stream.flush()
+        self._buffer = []
+        self._size = 0
+
+
+def _print_report(report, indent):
+    """
+    Print Filabel report to command line with given indentation of PRs
+
+    :param report: Report to be printed
+
+    :param str indent: indentation of the PR lines
+    """
+    for result in report.results():
+        print_result(result, indent)
+
+
+def print_report_async(report):
+    """
+    Print Filabel report to command line in async mode
+
+    :param report: Report to be printed
+    """
+    _print_report(report, '')
+
+
 def print_report(report):
     """
     Print Filabel report to command line
 
     :param report: Report to be printed
     """
-    click.secho(f'REPO', nl=False, bold=True)
-    click.secho(f' {report.repo} - ', nl=False)
-    if report.ok:
-        click.secho('OK', fg='green', bold=True)
-        for pr_link, result in report.prs.items():
-            click.secho(f'  PR', nl=False, bold=True)
-            click.secho(f' {pr_link} - ', nl=False)
-            if result is None:
-                click.secho('FAIL', fg='red', bold=True)
-            else:
-                click.secho('OK', fg='green', bold=True)
-                for label, t in result:
-                    click.echo(f'    {stylize_label_change(t, label)}')
-    else:
-        click.secho('FAIL', fg='red', bold=True)
+    _print_report(report, '  ')
+
+
+def print_summary(fl, stats=False):
+    """
+    Print rate limits, skipped PRs and optionally metrics of finished run to stderr
+
+    :param Filabel fl: Filabel of the run, requests of worker processes merged to it
+
+    :param bool stats: if metrics of GitHub requests should be printed
+    """
+    click.secho(f'RATE LIMIT {fl.github.ratelimit.summary()}', err=True)
+    if fl.state_store is not None:
+        click.secho(f'SKIPPED {fl.state_store.skipped} unchanged PRs', err=True)
+    if stats:
+        click.echo(fl.github.metrics.render(), err=True, nl=False)
 
 
 def get_token(config_auth):
     """
-    Extract token from auth config and do the checks
+    Extract tokens from auth config and do the checks,
+    multiple tokens are separated by whitespace or newlines
 
     :param config_auth: ConfigParser with loaded configuration of auth
+
+    :rtype: list[str]
+
+    :return: GitHub tokens
     """
     if config_auth is None:
         click.secho('Auth configuration not supplied!', err=True)
@@ -81,7 +221,10 @@ def get_token(config_auth):
     try:
         cfg_auth = configparser.ConfigParser()
         cfg_auth.read_file(config_auth)
-        return cfg_auth.get('github', 'token')
+        tokens = cfg_auth.get('github', 'token').split()
+        if not tokens:
+            raise ValueError('No token')
+        return tokens
     except Exception:
         click.secho('Auth configuration not usable!', err=True)
         exit(1)
@@ -112,8 +255,27 @@ def get_labels(config_labels):
 @click.option('-a', '--config-auth', type=click.File('r'), help='File with authorization configuration.')
 @click.option('-l', '--config-labels', type=click.File('r'), help='File with labels configuration.')
 @click.option('-x', '--async', 'async_run',is_flag=True, help='Using asyncio.')
+@click.option('--max-requests', type=click.IntRange(1), default=50, show_default=True, help='Max in-flight GitHub requests with --async.')
+@click.option('--max-repo-prs', type=click.IntRange(1), default=10, show_default=True, help='Max PRs of one repo processed at once with --async.')
+@click.option('--adaptive/--no-adaptive', default=False, show_default=True, help='Adapt request limit to latency and throttling with --async.')
+@click.option('--response-cache', type=click.Path(dir_okay=False), metavar='FILE', help='SQLite file caching GitHub responses for conditional requests.')
+@click.option('--per-page', type=click.IntRange(1, 100), default=100, show_default=True, help='Page size of GitHub requests.')
+@click.option('--graphql', is_flag=True, help='Fetch PRs with their labels and files by GitHub GraphQL API.')
+@click.option('--state-db', type=click.Path(dir_okay=False), metavar='FILE', help='SQLite file remembering labeled PRs, unchanged PRs are skipped.')
+@click.option('-o', '--output', type=click.Choice(['text', 'jsonl']), default='text', show_default=True, help='Format of the results.')
+@click.option('--api-url', metavar='URL', help='URL of GitHub API, i.e. https://HOST/api/v3 of GitHub Enterprise.')
+@click.option('--org', 'orgs', multiple=True, metavar='NAME', help='Label all repos of organization.')
+@click.option('--user', 'users', multiple=True, metavar='NAME', help='Label all repos of user.')
+@click.option('--include', multiple=True, metavar='GLOB', help='Label only discovered repos with matching name.')
+@click.option('--exclude', multiple=True, metavar='GLOB', help='Skip discovered repos with matching name.')
+@click.option('--skip-archived/--include-archived', default=True, show_default=True, help='Skip archived discovered repos.')
+@click.option('-w', '--workers', type=click.IntRange(1), default=1, show_default=True, help='Number of processes the repos are sharded across.')
+@click.option('--trace', type=click.Path(dir_okay=False, writable=True), metavar='FILE', help='Write spans of repos, PRs and GitHub requests to JSON Lines file.')
+@click.option('--stats', is_flag=True, help='Print metrics of GitHub requests in Prometheus text format to stderr.')
 @click.argument('reposlugs', nargs=-1)
-def cli(reposlugs, state, delete_old, base, config_auth, config_labels, async_run):
+def cli(reposlugs, state, delete_old, base, config_auth, config_labels, async_run, max_requests, max_repo_prs, adaptive,
+        response_cache, per_page, graphql, state_db, output, api_url, orgs, users, include, exclude, skip_archived,
+        workers, trace, stats):
     """
     CLI tool for filename-pattern-based labeling of GitHub Pull Requests (PRs).
 
@@ -124,16 +286,81 @@ def cli(reposlugs, state, delete_old, base, config_auth, config_labels, async_ru
     labels = get_labels(config_labels)
     check_reposlugs(reposlugs)
 
-    fl = Filabel(token, labels, state, base, delete_old, async_run)
+    options = dict(state=state, base=base, delete_old=delete_old, async_run=async_run, max_requests=max_requests,
+                   max_repo_prs=max_repo_prs, adaptive=adaptive, response_cache=response_cache, per_page=per_page,
+                   graphql=graphql, state_db=state_db, api_url=api_url)
 
-    reports = fl.run_repos(reposlugs)
+    writer = JsonLinesWriter() if output == 'jsonl' else None
 
-    for report in reports:
-        if async_run:
+    def show(result):
+        if writer is not None:
+            writer.write(result)
+        else:
+            print_result(result)
+
+    def show_report(report):
+        if writer is not None:
+            for result in report.results():
+                writer.write(result)
+        elif async_run:
             print_report_async(report)
         else:
             print_report(report)
 
+    discovery = dict(orgs=orgs, users=users, include=include, exclude=exclude, skip_archived=skip_archived)
+
+    if trace is not None:
+        if workers > 1:
+            raise click.BadParameter('tracing of sharded run is not supported', param_hint='--trace')
+        options['tracer'] = JsonTracer(open(trace, 'w'))
+
+    if workers > 1:
+        # repos are discovered by this process and labeled by the workers
+        fl = create_filabel(token, labels, **dict(options, async_run=False))
+        try:
+            for report in iter_sharded_reports(fl.iter_reposlugs(reposlugs, **discovery), workers,
+                                               metrics=fl.github.metrics, ratelimit=fl.github.ratelimit,
+                                               state_store=fl.state_store, token=token, labels=labels, **options):
+                show_report(report)
+        except DiscoveryError as e:
+            click.secho(f'Listing of repositories failed! {e}', err=True)
+            exit(1)
+        finally:
+            if writer is not None:
+                writer.flush()
+            fl.close()
+            if fl.github.cache is not None:
+                fl.github.cache.close()
+        print_summary(fl, stats)
+        return
+
+    fl = create_filabel(token, labels, **options)
+    if async_run:
+        reposlugs = fl.aiter_reposlugs(reposlugs, **discovery)
+    else:
+        reposlugs = fl.iter_reposlugs(reposlugs, **discovery)
+    try:
+        if async_run and writer is None:
+            # repos labeled at once are printed whole once they are done, so their PRs are not interleaved
+            for report in fl.iter_run_reports(reposlugs):
+                show_report(report)
+        else:
+            for result in fl.iter_run_repos(reposlugs):
+                show(result)
+    except DiscoveryError as e:
+        click.secho(f'Listing of repositories failed! {e}', err=True)
+        exit(1)
+    finally:
+        if writer is not None:
+            writer.flush()
+        fl.close()
+        if fl.github.cache is not None:
+            fl.github.cache.close()
+        if fl.tracer is not None:
+            fl.tracer.close()
+
+    print_summary(fl, stats)
+
     # if fl.async_run:
     #     fl.async_run_repo(repo)
     # else:
@@ -0,0 +1,447 @@
+from filabel.logic import GitHub
+
+
+PULL_REQUESTS_QUERY = '''
+query PullRequests($owner: String!, $repo: String!, $states: [PullRequestState!], $base: String,
+                   $first: Int!, $after: String, $files: Int!) {
+  repository(owner: $owner, name: $repo) {
+    pullRequests(states: $states, baseRefName: $base, first: $first, after: $after,
+                 orderBy: {field: CREATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        number
+        url
+        headRefOid
+        labels(first: 100) {
+          pageInfo { hasNextPage endCursor }
+          nodes { name }
+        }
+        files(first: $files) {
+          pageInfo { hasNextPage endCursor }
+          nodes { path }
+        }
+      }
+    }
+  }
+}
+'''
+
+# remaining files or labels of single PR, the connection and its node field are filled in
+PULL_REQUEST_CONNECTION_QUERY = '''
+query PullRequest{name}($owner: String!, $repo: String!, $number: Int!, $first: Int!, $after: String) {{
+  repository(owner: $owner, name: $repo) {{
+    pullRequest(number: $number) {{
+      {connection}(first: $first, after: $after) {{
+        pageInfo {{ hasNextPage endCursor }}
+        nodes {{ {field} }}
+      }}
+    }}
+  }}
+}}
+'''
+
+# connection of PR with the field of its nodes and the query of the remaining nodes
+PULL_REQUEST_CONNECTIONS = {
+    'files': ('path', PULL_REQUEST_CONNECTION_QUERY.format(name='Files', connection='files', field='path')),
+    'labels': ('name', PULL_REQUEST_CONNECTION_QUERY.format(name='Labels', connection='labels', field='name')),
+}
+
+LABELS_PER_QUERY = 100
+
+STATES = {
+    'open': ['OPEN'],
+    'closed': ['CLOSED', 'MERGED'],
+    'all': ['OPEN', 'CLOSED', 'MERGED'],
+}
+
+
+class GraphQLError(Exception):
+    """
+    Error reported by GitHub GraphQL API
+    """
+
+
+class GraphQLGitHub(GitHub):
+    """
+    GitHub API Wrapper fetching pull requests with the GraphQL API.
+
+    One query returns a page of pull requests together with their labels, head SHA and changed files,
+    so labeling a repo costs one request per page of PRs instead of one per PR. Remaining files of PRs
+    with more changes are fetched by cursor pagination when the PR is labeled, remaining labels of PRs
+    with more than 100 labels before the PR is yielded. Queries and parsing are shared by sync and async
+    requests. Labels are still written by the REST API.
+    """
+    GRAPHQL = 'https://api.github.com/graphql'
+
+    def __init__(self, token, prs_per_query=None, files_per_query=100, **kwargs):
+        """
+        Initilizer for GraphQL GitHub API wrapper.
+
+        :param Union[str, list[str]] token: GitHub token or tokens
+
+        :param Optional[int] prs_per_query: number of PRs fetched by one query (max 100), page size if None
+
+        :param int files_per_query: number of files fetched by one query (max 100)
+
+        :param kwargs: arguments of GitHub API wrapper
+        """
+        super().__init__(token, **kwargs)
+        if kwargs.get('api_url') is not None:
+            # GitHub Enterprise serves REST API at /api/v3 and GraphQL API at /api/graphql
+            base = self.API[:-len('/v3')] if self.API.endswith('/v3') else self.API
+            self.GRAPHQL = base + '/graphql'
+        self.prs_per_query = prs_per_query or self.per_page or 50
+        self.files_per_query = files_per_query
+        self._filenames = {}
+
+    def graphql(self, query, variables):
+        """
+        Run GraphQL query
+
+        :raise HTTPError: if during the request is raised
+
+        :raise GraphQLError: if the query fails
+
+        :param str query: GraphQL query
+
+        :param dict variables: variables of the query
+
+        :rtype dict: json
+
+        :return: data of the query result
+        """
+        r = self.context.send(self.session, 'post', self.GRAPHQL, json={'query': query, 'variables': variables})
+        r.raise_for_status()
+        return self._data(r.json())
+
+    async def async_graphql(self, query, variables):
+        """
+        Run GraphQL query asynchronously
+
+        :raise GraphQLError: if the query fails
+
+        :param str query: GraphQL query
+
+        :param dict variables: variables of the query
+
+        :rtype dict: json
+
+        :return: corutine of data of the query result
+        """
+        json = await self.strategy._send('POST', self.GRAPHQL, headers=self.auth_header(),
+                                         json={'query': query, 'variables': variables}, context=self.context)
+        return self._data(json)
+
+    @staticmethod
+    def _data(json):
+        """
+        Extract data of GraphQL response
+
+        :raise GraphQLError: if the response contains errors or no repository
+
+        :param dict json: GraphQL response
+
+        :rtype dict: json
+        """
+        if json.get('errors') or not (json.get('data') or {}).get('repository'):
+            messages = '; '.join(e.get('message', '') for e in json.get('errors') or [])
+            raise GraphQLError(messages or 'Repository not found')
+        return json['data']
+
+    def _pull_requests_query(self, owner, repo, state, base, after=None):
+        """
+        Query of page of pull requests with its variables
+
+        :rtype: tuple(str, dict)
+        """
+        return PULL_REQUESTS_QUERY, {
+            'owner': owner,
+            'repo': repo,
+            'states': STATES[state],
+            'base': base,
+            'first': self.prs_per_query,
+            'after': after,
+            'files': self.files_per_query,
+        }
+
+    @staticmethod
+    def _cursor(connection):
+        """
+        Cursor of the next page of connection
+
+        :param dict connection: connection of the query result
+
+        :rtype: Optional[str]
+
+        :return: cursor or None if it is the last page
+        """
+        page_info = connection['pageInfo']
+        return page_info['endCursor'] if page_info['hasNextPage'] else None
+
+    def _pull_requests_page(self, owner, repo, data):
+        """
+        Parse page of pull requests, files of PRs are remembered with the cursor of the files not fetched yet
+
+        :param str owner: GtiHub user or org
+
+        :param str repo: repo name
+
+        :param dict data: data of the pull requests query
+
+        :rtype: tuple(list[tuple(dict, Optional[str])], Optional[str])
+
+        :return: PRs as dicts returned by REST API with the cursor of their labels not fetched yet,
+                 and cursor of the next page
+        """
+        page = data['repository']['pullRequests']
+        prs = []
+        for node in page['nodes']:
+            files = node['files']
+            self._filenames[(owner, repo, node['number'])] = ([f['path'] for f in files['nodes']],
+                                                              self._cursor(files))
+            pr_dict = {
+                'number': node['number'],
+                'html_url': node['url'],
+                'head': {'sha': node['headRefOid']},
+                'labels': node['labels']['nodes'],
+            }
+            prs.append((pr_dict, self._cursor(node['labels'])))
+        return prs, self._cursor(page)
+
+    def _connection_query(self, owner, repo, number, connection, after=None):
+        """
+        Query of page of files or labels of one Pull Request with its variables
+
+        :param str connection: "files" or "labels"
+
+        :rtype: tuple(str, dict)
+        """
+        first = self.files_per_query if connection == 'files' else LABELS_PER_QUERY
+        return PULL_REQUEST_CONNECTIONS[connection][1], {
+            'owner': owner, 'repo': repo, 'number': number, 'first': first, 'after': after,
+        }
+
+    @classmethod
+    def _connection_page(cls, connection, data):
+        """
+        Parse page of files or labels of one Pull Request
+
+        :param str connection: "files" or "labels"
+
+        :param dict data: data of the connection query
+
+        :rtype: tuple(list[str], Optional[str])
+
+        :return: paths of files or names of labels and cursor of the next page
+        """
+        field = PULL_REQUEST_CONNECTIONS[connection][0]
+        page = data['repository']['pullRequest'][connection]
+        return [node[field] for node in page['nodes']], cls._cursor(page)
+
+    def _pr_connection(self, owner, repo, number, connection, after=None):
+        """
+        Get files or labels of one Pull Request by cursor pagination
+
+        :param str owner: Github username
+
+        :param str repo: name of the repository
+
+        :param int number: ID of the PR
+
+        :param str connection: "files" or "labels"
+
+        :param Optional[str] after: cursor of already fetched nodes
+
+        :rtype: list[str]
+        """
+        values = []
+        while True:
+            page, after = self._connection_page(
+                connection, self.graphql(*self._connection_query(owner, repo, number, connection, after)))
+            values += page
+            if after is None:
+                return values
+
+    async def _async_pr_connection(self, owner, repo, number, connection, after=None):
+        """
+        Get files or labels of one Pull Request by cursor pagination asynchronously
+
+        :param str owner: Github username
+
+        :param str repo: name of the repository
+
+        :param int number: ID of the PR
+
+        :param str connection: "files" or "labels"
+
+        :param Optional[str] after: cursor of already fetched nodes
+
+        :rtype: list[str]
+        """
+        values = []
+        while True:
+            page, after = self._connection_page(
+                connection, await self.async_graphql(*self._connection_query(owner, repo, number, connection, after)))
+            values += page
+            if after is None:
+                return values
+
+    def iter_pull_requests(self, owner, repo, state='open', base=None):
+        """
+        Get all Pull Requests of a defined repositary with their files as generator,
+        PRs of a page are yielded once it arrives. Labels of PRs with more labels than fit
+        in the page are completed before the PR is yielded.
+
+        :param str owner: GtiHub user or org
+
+        :param str repo: repo name
+
+        :param str state: defines the state for retrived PR
+                          Default: open
+                          Set of values: ["open", "closed", "all"]
+
+        :param str base: optional branch the PRs are open for
+
+        :rtype: Iterator[dict]
+
+        :return: generator of pull requests for given defined repo
+        """
+        after = None
+        while True:
+            prs, after = self._pull_requests_page(
+                owner, repo, self.graphql(*self._pull_requests_query(owner, repo, state, base, after)))
+            for pr_dict, labels_after in prs:
+                if labels_after is not None:
+                    names = self._pr_connection(owner, repo, pr_dict['number'], 'labels', labels_after)
+                    pr_dict['labels'] += [{'name': name} for name in names]
+                yield pr_dict
+            if after is None:
+                return
+
+    async def aiter_pull_requests(self, owner, repo, state='open', base=None):
+        """
+        Get all Pull Requests of a defined repositary with their files as async generator,
+        PRs of a page are yielded once it arrives. Labels of PRs with more labels than fit
+        in the page are completed before the PR is yielded.
+
+        :param str owner: GtiHub user or org
+
+        :param str repo: repo name
+
+        :param str state: defines the state for retrived PR
+                          Default: open
+                          Set of values: ["open", "closed", "all"]
+
+        :param str base: optional branch the PRs are open for
+
+        :rtype: AsyncIterator[dict]
+
+        :return: async generator of pull requests for given defined repo
+        """
+        after = None
+        while True:
+            prs, after = self._pull_requests_page(
+                owner, repo, await self.async_graphql(*self._pull_requests_query(owner, repo, state, base, after)))
+            for pr_dict, labels_after in prs:
+                if labels_after is not None:
+                    names = await self._async_pr_connection(owner, repo, pr_dict['number'], 'labels', labels_after)
+                    pr_dict['labels'] += [{'name': name} for name in names]
+                yield pr_dict
+            if after is None:
+                return
+
+    def pull_requests(self, owner, repo, state='open', base=None):
+        """
+        Get all Pull Requests of a defined repositary, with their files.
+
+        :param str owner: GtiHub user or org
+
+        :param str repo: repo name
+
+        :param str state: defines the state for retrived PR
+                          Default: open
+                          Set of values: ["open", "closed", "all"]
+
+        :param str base: optional branch the PRs are open for
+
+        :rtype dict: json
+
+        :return: all pull request for given defined repo
+        """
+        return list(self.iter_pull_requests(owner, repo, state, base))
+
+    async def async_pull_requests(self, owner, repo, state='open', base=None):
+        """
+        Get all Pull Requests of a defined repositary, with their files.
+
+        :param str owner: GtiHub user or org
+
+        :param str repo: repo name
+
+        :param str state: defines the state for retrived PR
+                          Default: open
+                          Set of values: ["open", "closed", "all"]
+
+        :param str base: optional branch the PRs are open for
+
+        :rtype dict: json
+
+        :return: all pull request for given defined repo
+        """
+        return [pr_dict async for pr_dict in self.aiter_pull_requests(owner, repo, state, base)]
+
+    def pr_filenames(self, owner, repo, number):
+        """
+        Get just the filename for one Pull Request, already fetched ones are not requested again.
+
+        :param str owner: Github username
+
+        :param str repo: name of the repository
+
+        :param int number: ID of the PR
+
+        :rtype: list[str]
+
+        :return: changed filenames for one given PR
+        """
+        prefetched = self._filenames.pop((owner, repo, number), None)
+        if prefetched is None:
+            return self._pr_connection(owner, repo, number, 'files')
+        filenames, cursor = prefetched
+        if cursor is not None:
+            filenames += self._pr_connection(owner, repo, number, 'files', cursor)
+        return filenames
+
+    async def async_pr_filenames(self, owner, repo, number):
+        """
+        Get just the filename for one Pull Request, already fetched ones are not requested again.
+
+        :param str owner: Github username
+
+        :param str repo: name of the repository
+
+        :param int number: ID of the PR
+
+        :rtype: list[str]
+
+        :return: changed filenames for one given PR
+        """
+        prefetched = self._filenames.pop((owner, repo, number), None)
+        if prefetched is None:
+            return await self._async_pr_connection(owner, repo, number, 'files')
+        filenames, cursor = prefetched
+        if cursor is not None:
+            filenames += await self._async_pr_connection(owner, repo, number, 'files', cursor)
+        return filenames
+
+    def forget_pr_files(self, owner, repo, number):
+        """
+        Drop files of one Pull Request fetched in advance, the PR is not labeled.
+
+        :param str owner: Github username
+
+        :param str repo: name of the repository
+
+        :param int number: ID of the PR
+        """
+        self._filenames.pop((owner, repo, number), None)
@@ -1,21 +1,90 @@
 import enum
-import fnmatch
+import functools
 import itertools
 import requests
-import aiohttp
-import asyncio
+import time
+import types
 import abc
+import collections
 import configparser
+import fnmatch
+from concurrent.futures import ThreadPoolExecutor
 from urllib import parse
+from filabel.matcher import LabelMatcher
+from filabel.metrics import ERROR_STATUS, Metrics
+from filabel.ratelimit import TokenPool
+from filabel.scheduler import ConcurrencyScheduler
+from filabel.state import StateStore
+from filabel import tracing
 from filabel.utils import parse_labels
 
 
+class RequestContext:
+    """
+    What every request of GitHub API wrapper goes through: cache for conditional requests,
+    rate limits of tokens pacing the requests, registry of made requests and tracer.
+
+    The context is owned by GitHub and passed to the pagination strategies as one argument.
+    """
+    def __init__(self, cache=None, ratelimit=None, metrics=None, tracer=None):
+        """
+        Initilizer for RequestContext class.
+
+        :param Optional[ResponseCache] cache: cache for conditional GET requests
+
+        :param Optional[TokenPool] ratelimit: rate limits of tokens pacing the requests, not paced if None
+
+        :param Optional[Metrics] metrics: registry of made requests, not recorded if None
+
+        :param Optional[Tracer] tracer: tracer of HTTP requests, not traced if None
+        """
+        self.cache = cache
+        self.ratelimit = ratelimit
+        self.metrics = metrics
+        self.tracer = tracer
+
+    def send(self, session, method, url, **kwargs):
+        """
+        Send request with requests session, paced by the rate limits, throttled request is retried
+
+        :param session: requests session
+        :param str method: HTTP method
+        :param str url: request url
+        :param kwargs: arguments of the request
+        :return: response
+        """
+        attempt = 0
+        while True:
+            if self.ratelimit is not None:
+                resource = self.ratelimit.resource(url)
+                token, limit = self.ratelimit.pick(resource)
+                time.sleep(limit.delay())
+                kwargs['headers'] = dict(kwargs.get('headers') or {}, **self.ratelimit.auth_header(token))
+            started = time.perf_counter()
+            with tracing.request_span(self.tracer, method, url, kwargs.get('params')) as span:
+                r = getattr(session, method)(url, **kwargs)
+                span.set(status=r.status_code, attempt=attempt)
+            if self.metrics is not None:
+                self.metrics.observe(method, url, r.status_code, time.perf_counter() - started,
+                                     len(r.content or b''))
+            if self.ratelimit is None:
+                return r
+            limit = self.ratelimit.update(token, resource, r.headers)
+            wait = self.ratelimit.retry_delay(limit, r.status_code, r.headers, attempt, resource)
+            if wait is None:
+                return r
+            if self.metrics is not None:
+                self.metrics.retry(method, url)
+            time.sleep(wait)
+            attempt += 1
+
+
 class PaginationStrategy(metaclass=abc.ABCMeta):
     """
     Pagination abstract method for different execution modes (sync/async)
     """
     @abc.abstractmethod
-    def paginated_get(self, url, params=None, headers=None, session=None):
+    def paginated_get(self, url, params=None, headers=None, session=None, context=None):
         """
         Abstract method for paginated get requests
 
@@ -23,44 +92,252 @@ class PaginationStrategy(metaclass=abc.ABCMeta):
         :param Optinal[dict[str, str] params: request parameters
         :param Optinal[dict[str, str] headers: request headers
         :param session: session for request
+        :param Optional[RequestContext] context: cache, rate limits, metrics and tracer of the requests
+        """
+        pass
+
+    def iter_pages(self, url, params=None, headers=None, session=None, context=None):
+        """
+        Paginated get request as generator of pages, by default the whole response is one page
+
+        :param str url: get url
+        :param Optinal[dict[str, str] params: request parameters
+        :param Optinal[dict[str, str] headers: request headers
+        :param session: session for request
+        :param Optional[RequestContext] context: cache, rate limits, metrics and tracer of the requests
+        :return: generator of json pages
+        """
+        yield self.paginated_get(url, params=params, headers=headers, session=session, context=context)
+
+    @staticmethod
+    def _parse_links(link):
+        """
+        Parse Link header of response
+
+        :param Optional[str] link: Link header value
+
+        :rtype: Optional[list[dict[str, str]]]
+
+        :return: parsed links or None if there are no links
+        """
+        if not link:
+            return None
+        return requests.utils.parse_header_links(link)
+
+    def close(self):
+        """
+        Release resources held by the strategy
         """
         pass
 
+    def _url_with_page_num(self, url, num):
+
+        parsed_url = parse.urlparse(url)
+
+        url_dict = parse.parse_qs(parsed_url.query)
+        url_dict['page'] = [num]
+
+        parsed_url = list(parsed_url)
+
+        parsed_url[4] = parse.urlencode(url_dict, doseq=True)
+
+        return parse.urlunparse(parsed_url)
+
+    def _page_num_from_ulr(self, url):
+
+        parsed_url = parse.urlparse(url)
+
+        return int(parse.parse_qs(parsed_url.query)['page'][0])
+
 
 class SyncPagination(PaginationStrategy):
     """
         Paginated startegy for sync excecution.
     """
-    def paginated_get(self, url, params=None, headers=None, session=None):
+    def __init__(self, max_workers=8):
+        """
+        Initilizer for SyncPagination class.
+
+        :param int max_workers: max number of pages fetched concurrently
+        """
+        self.max_workers = max_workers
+
+    def paginated_get(self, url, params=None, headers=None, session=None, context=None):
         """"
         If the request response can be paginated, it retrives the whole response.
 
+        When the first page links the last one, the remaining pages are fetched concurrently
+        on a thread pool sharing the session, otherwise the next links are followed one by one.
+
         :raise HTTPError: if during the request is raised
 
         :param url: url for outgoing request
 
         :param Optinal[dict[str, str] params: parameters for request
 
+        :param Optional[RequestContext] context: cache, rate limits, metrics and tracer of the requests
+
         :rtype dict: json
 
         :return: whole already paginated json reponse for given url and params
         """
+        pages = self.iter_pages(url, params, session=session, context=context)
+        json = next(pages)
+        for page in pages:
+            json += page
+
+        return json
+
+    def iter_pages(self, url, params=None, headers=None, session=None, context=None):
+        """
+        Paginated get request as generator of pages, each page is yielded once it arrives.
+
+        When the first page links the last one, the remaining pages are fetched concurrently
+        on a thread pool sharing the session, otherwise the next links are followed one by one.
+
+        :raise HTTPError: if during the request is raised
+
+        :param url: url for outgoing request
+
+        :param Optinal[dict[str, str] params: parameters for request
+
+        :param Optional[RequestContext] context: cache, rate limits, metrics and tracer of the requests
+
+        :return: generator of json pages in their order
+        """
+        json, links = self._get_response(session, url, params, context)
+        yield json
+
+        if 'next' in links and 'last' in links:
+            next_num = self._page_num_from_ulr(links['next']['url'])
+            last_num = self._page_num_from_ulr(links['last']['url'])
+            urls = [self._url_with_page_num(links['last']['url'], page_num)
+                    for page_num in range(next_num, last_num + 1)]
+
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls))) as executor:
+                # page requests are traced as children of the current span
+                futures = [executor.submit(tracing.wrap_context(self._get_response), session, page_url, params,
+                                           context)
+                           for page_url in urls]
+                try:
+                    # pages are yielded in their order
+                    for future in futures:
+                        yield future.result()[0]
+                finally:
+                    for future in futures:
+                        future.cancel()
+            return
+
+        while 'next' in links and 'url' in links['next']:
+            page, links = self._get_response(session, links['next']['url'], params, context)
+            yield page
+
+    def _get_response(self, session, url, params=None, context=None):
+        """
+        Get single page, conditionally if the response is cached
+
+        :raise HTTPError: if during the request is raised
+
+        :param session: session for request
+        :param url: url for outgoing request
+        :param Optinal[dict[str, str] params: request parameters
+        :param Optional[RequestContext] context: cache, rate limits, metrics and tracer of the requests
+        :return: tuple of json and links by their relation
+        """
+        context = context or RequestContext()
+        cache = context.cache
+        cached = cache.get(url, params) if cache is not None else None
+        headers = cache.conditional_headers(cached) if cache else None
+
+        r = context.send(session, 'get', url, params=params, headers=headers)
+
+        if cache is not None:
+            hit = cache.record(cached, r.status_code)
+            if context.metrics is not None:
+                context.metrics.cache(hit)
+            if hit:
+                links = self._parse_links(cached.link) or []
+                return cached.body, {link.get('rel') or link.get('url'): link for link in links}
 
-        r = session.get(url, params=params)
         r.raise_for_status()
         json = r.json()
+        if cache is not None:
+            cache.store(url, params, r.headers, json)
 
-        if 'next' in r.links and 'url' in r.links['next']:
-            json += self.paginated_get(r.links['next']['url'], params=params, session=session)
-
-        return json
+        return json, r.links
 
 
 class AsyncPagination(PaginationStrategy):
     """
     Paginated startegy for async excecution.
+
+    The strategy owns a long-lived event loop and a single aiohttp session with pooled
+    keep-alive connections, so all the coroutines reuse already opened connections.
     """
-    def paginated_get(self, url, params=None, headers=None, session=None):
+    def __init__(self, limit=100, keepalive_timeout=30, ttl_dns_cache=300, scheduler=None):
+        """
+        Initilizer for AsyncPagination class.
+
+        :param int limit: max number of simultaneous connections
+        :param int keepalive_timeout: seconds an idle connection is kept open
+        :param int ttl_dns_cache: seconds resolved hosts are cached
+        :param Optional[ConcurrencyScheduler] scheduler: limits of in-flight requests
+        """
+        self.scheduler = scheduler or ConcurrencyScheduler()
+        self.connector_options = {
+            'limit': limit,
+            'keepalive_timeout': keepalive_timeout,
+            'ttl_dns_cache': ttl_dns_cache,
+        }
+        self.loop = None
+        self.session = None
+        self.session_loop = None
+
+    def run(self, coroutine):
+        """
+        Run coroutine until complete on the long-lived event loop
+
+        :param coroutine: coroutine to be run
+        :return: result of the coroutine
+        """
+        import asyncio
+        if self.loop is None or self.loop.is_closed():
+            self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        return self.loop.run_until_complete(coroutine)
+
+    def get_session(self):
+        """
+        Get the shared aiohttp session, it is created on first use in the running event loop
+
+        :rtype aiohttp.ClientSession:
+        :return: session for requests
+        """
+        import aiohttp
+        import asyncio
+        loop = asyncio.get_event_loop()
+        if self.session is None or self.session.closed or self.session_loop is not loop:
+            connector = aiohttp.TCPConnector(**self.connector_options)
+            self.session = aiohttp.ClientSession(connector=connector, raise_for_status=True)
+            self.session_loop = loop
+
+        return self.session
+
+    def close(self):
+        """
+        Close the shared session and the event loop
+        """
+        if self.session is not None and not self.session.closed and not self.session_loop.is_closed():
+            self.session_loop.run_until_complete(self.session.close())
+        self.session = None
+        self.session_loop = None
+
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.close()
+        self.loop = None
+
+    def paginated_get(self, url, params=None, headers=None, session=None, context=None):
         """
         Implementation of Abstract method for paginated get requests
 
@@ -68,89 +345,178 @@ class AsyncPagination(PaginationStrategy):
         :param Optinal[dict[str, str] params: request parameters
         :param Optinal[dict[str, str] headers: request headers
         :param session: session for request
+        :param Optional[RequestContext] context: cache, rate limits, metrics and tracer of the requests
         :return: json request response
         """
-        #loop = asyncio.get_event_loop()
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-        json = loop.run_until_complete(self._paginated_get(url, params=params, headers=headers))
-
-        loop.close()
-
-        return json
+        return self.run(self._paginated_get(url, params=params, headers=headers, context=context))
 
-    async def _paginated_get(self, url, params=None, headers=None, session=None):
+    async def _paginated_get(self, url, params=None, headers=None, session=None, context=None):
         """
         Implementation of Abstract method for paginated get requests without event loop!
 
         :param str url: get url
         :param Optinal[dict[str, str] params: request parameters
         :param Optinal[dict[str, str] headers: request headers
-        :param session: session for request
+        :param Optional[aiohttp.ClientSession] session: session for request, the shared one if None
+        :param Optional[RequestContext] context: cache, rate limits, metrics and tracer of the requests
         :return: corutine of json request response
         """
+        pages = self.aiter_pages(url, params, headers, session, context)
+        json = await pages.__anext__()
+        async for page in pages:
+            json += page
 
-        session = aiohttp.ClientSession(headers=headers, raise_for_status=True)
-        async with session:
-            future = asyncio.ensure_future(self._get_reponse(session, url, params))
+        return json
 
-            json, links = await future
+    async def aiter_pages(self, url, params=None, headers=None, session=None, context=None):
+        """
+        Paginated get request as async generator of pages, each page is yielded once it arrives.
+        The remaining pages are requested concurrently as soon as the first one links the last one.
 
-            if links != None:
-                next_num = self._page_num_from_ulr(links[0]['url'])
-                last_num = self._page_num_from_ulr(links[1]['url'])
+        :param str url: get url
+        :param Optinal[dict[str, str] params: request parameters
+        :param Optinal[dict[str, str] headers: request headers
+        :param Optional[aiohttp.ClientSession] session: session for request, the shared one if None
+        :param Optional[RequestContext] context: cache, rate limits, metrics and tracer of the requests
+        :return: async generator of json pages in their order
+        """
+        import aiohttp
+        import asyncio
+        if not isinstance(session, aiohttp.ClientSession):
+            session = self.get_session()
+
+        json, links = await self._get_reponse(session, url, params, headers, context)
+        yield json
+
+        links = {link.get('rel'): link['url'] for link in links or []}
+        if 'next' in links and 'last' in links:
+            next_num = self._page_num_from_ulr(links['next'])
+            last_num = self._page_num_from_ulr(links['last'])
+
+            futures = [asyncio.ensure_future(
+                self._get_reponse(session, self._url_with_page_num(links['next'], page_num),
+                                  headers=headers, context=context))
+                    for page_num in range(next_num, last_num + 1)]
+            try:
+                for future in futures:
+                    yield (await future)[0]
+            finally:
+                for future in futures:
+                    future.cancel()
 
-                futures = [asyncio.ensure_future(
-                    self._get_reponse(session, self._url_with_page_num(links[0]['url'], page_num)))
-                        for page_num in range(next_num, last_num + 1)]
+    async def _request(self, session, method, url, context=None, **kwargs):
+        """
+        Send single request within the request limit, throttled request is retried
 
-                reponse_paginated = await asyncio.gather(*futures)
+        :param session: session for request
+        :param str method: HTTP method
+        :param str url: request url
+        :param Optional[RequestContext] context: cache, rate limits, metrics and tracer of the requests
+        :param kwargs: arguments of the request
+        :return: corutine of tuple of status, headers and json (None if not modified)
+        """
+        import aiohttp
+        import asyncio
+        context = context or RequestContext()
+        ratelimit, metrics = context.ratelimit, context.metrics
+        attempt = 0
+        while True:
+            if ratelimit is not None:
+                resource = ratelimit.resource(url)
+                token, limit = ratelimit.pick(resource)
+                await asyncio.sleep(limit.delay())
+                kwargs['headers'] = dict(kwargs.get('headers') or {}, **ratelimit.auth_header(token))
+            try:
+                async with self.scheduler.request() as slot:
+                    # latency of the request itself, without waiting for the slot
+                    started = time.perf_counter()
+                    try:
+                        with tracing.request_span(context.tracer, method, url, kwargs.get('params')) as span:
+                            async with session.request(method, url, **kwargs) as response:
+                                slot.status = response.status
+                                if ratelimit is not None:
+                                    ratelimit.update(token, resource, response.headers)
+                                body = await response.read()
+                                span.set(status=response.status, attempt=attempt)
+                                if metrics is not None:
+                                    metrics.observe(method, url, response.status, time.perf_counter() - started,
+                                                    len(body))
+                                json = await response.json() if response.status != 304 else None
+                                return response.status, response.headers, json
+                    except aiohttp.ClientResponseError as e:
+                        if metrics is not None:
+                            metrics.observe(method, url, e.status, time.perf_counter() - started)
+                        raise
+                    except (aiohttp.ClientError, asyncio.TimeoutError):
+                        if metrics is not None:
+                            metrics.observe(method, url, ERROR_STATUS, time.perf_counter() - started)
+                        raise
+            except aiohttp.ClientResponseError as e:
+                if ratelimit is None:
+                    raise
+                limit = ratelimit.update(token, resource, e.headers or {})
+                wait = ratelimit.retry_delay(limit, e.status, e.headers or {}, attempt, resource)
+                if wait is None:
+                    raise
+                if metrics is not None:
+                    metrics.retry(method, url)
+                await asyncio.sleep(wait)
+                attempt += 1
+
+    async def _send(self, method, url, headers=None, json=None, session=None, context=None):
+        """
+        Send single request with the shared session, i.e. for editing labels
 
-                for reponse in reponse_paginated:
-                    json += reponse[0]
+        :param str method: HTTP method
+        :param str url: request url
+        :param Optinal[dict[str, str] headers: request headers
+        :param json: optional request body
+        :param Optional[aiohttp.ClientSession] session: session for request, the shared one if None
+        :param Optional[RequestContext] context: cache, rate limits, metrics and tracer of the requests
+        :return: corutine of json response
+        """
+        import aiohttp
+        if not isinstance(session, aiohttp.ClientSession):
+            session = self.get_session()
 
-            return json
+        _, _, response_json = await self._request(session, method, url, context, headers=headers, json=json)
+        return response_json
 
-    async def _get_reponse(self, session, url, params=None):
+    async def _get_reponse(self, session, url, params=None, headers=None, context=None):
         """
-        Specified get reponse for pagination
+        Specified get reponse for pagination, conditional if the response is cached
 
         :param session: session for request
         :param url: session for request
         :param Optinal[dict[str, str] params: request parameters
+        :param Optinal[dict[str, str] headers: request headers
+        :param Optional[RequestContext] context: cache, rate limits, metrics and tracer of the requests
         :return: tuple of corutine utine json and corutine links
         """
+        import asyncio
+        context = context or RequestContext()
+        cache = context.cache
+        # SQLite queries of the cache would block the event loop
+        loop = asyncio.get_event_loop()
+        cached = await loop.run_in_executor(None, cache.get, url, params) if cache is not None else None
+        if cached is not None:
+            headers = dict(headers or {}, **cache.conditional_headers(cached))
 
-        async with session.get(url, params=params) as response:
-
-            future_json = await response.json()
-            links = None
-            if response.headers.get('Link'):
-                links = requests.utils.parse_header_links(response.headers.get('Link'))
-
-            return future_json, links
-
-    def _url_with_page_num(self, url, num):
-
-        parsed_url = parse.urlparse(url)
-
-        url_dict = parse.parse_qs(parsed_url.query)
-        url_dict['page'] = [num]
-
-        parsed_url = list(parsed_url)
-
-        parsed_url[4] = parse.urlencode(url_dict, doseq=True)
-
-        return parse.urlunparse(parsed_url)
-
-
+        status, response_headers, future_json = await self._request(
+            session, 'GET', url, context, params=params, headers=headers
+        )
 
-    def _page_num_from_ulr(self, url):
+        if cache is not None:
+            hit = cache.record(cached, status)
+            if context.metrics is not None:
+                context.metrics.cache(hit)
+            if hit:
+                return cached.body, self._parse_links(cached.link)
 
-        parsed_url = parse.urlparse(url)
+        if cache is not None:
+            await loop.run_in_executor(None, cache.store, url, params, response_headers, future_json)
 
-        return int(parse.parse_qs(parsed_url.query)['page'][0])
+        return future_json, self._parse_links(response_headers.get('Link'))
 
 
 class GitHub:
@@ -162,22 +528,122 @@ class GitHub:
     """
     API = 'https://api.github.com'
 
-    def __init__(self, token, strategy=SyncPagination(), session=None):
+    def __init__(self, token, strategy=SyncPagination(), session=None, cache=None, per_page=None, ratelimit=None,
+                 api_url=None, metrics=None, tracer=None):
         """
         Initilizer for GitHub API wrapper.
 
-        :param str token: GitHub token
+        :param Union[str, list[str]] token: GitHub token or tokens used by their remaining rate limit
 
         :param Optinal[session] session: optional requests session
+
+        :param Optional[ResponseCache] cache: optional cache for conditional GET requests
+
+        :param Optional[int] per_page: page size of paginated requests (max 100), GitHub default if None
+
+        :param Optional[TokenPool] ratelimit: rate limits of tokens pacing the requests
+
+        :param Optional[str] api_url: url of GitHub API, i.e. of GitHub Enterprise, api.github.com if None
+
+        :param Optional[Metrics] metrics: registry of made requests, new one if None
+
+        :param Optional[Tracer] tracer: tracer of HTTP requests, not traced if None
         """
+        if api_url is not None:
+            self.API = api_url.rstrip('/')
 
         self.strategy = strategy or SyncPagination()
+        self.per_page = per_page
+        self.context = RequestContext(cache, ratelimit or TokenPool(token),
+                                      metrics if metrics is not None else Metrics(), tracer)
 
-        self.token = token
+        self.token = self.ratelimit.tokens[0]
         self.session = session or requests.Session()
         self.session.headers = {'User-Agent': 'filabel'}
         self.session.auth = self._token_auth
 
+    @property
+    def cache(self):
+        """
+        Cache for conditional GET requests
+
+        :rtype: Optional[ResponseCache]
+        """
+        return self.context.cache
+
+    @property
+    def ratelimit(self):
+        """
+        Rate limits of tokens pacing the requests
+
+        :rtype: TokenPool
+        """
+        return self.context.ratelimit
+
+    @property
+    def metrics(self):
+        """
+        Registry of made requests
+
+        :rtype: Metrics
+        """
+        return self.context.metrics
+
+    @metrics.setter
+    def metrics(self, metrics):
+        self.context.metrics = metrics
+
+    @property
+    def tracer(self):
+        """
+        Tracer of HTTP requests
+
+        :rtype: Optional[Tracer]
+        """
+        return self.context.tracer
+
+    @property
+    def scheduler(self):
+        """
+        Concurrency scheduler of async strategy
+
+        :rtype: Optional[ConcurrencyScheduler]
+
+        :return: scheduler or None for sync strategy
+        """
+        return getattr(self.strategy, 'scheduler', None)
+
+    def run(self, coroutine):
+        """
+        Run coroutine on the event loop of async strategy
+
+        :param coroutine: coroutine to be run
+
+        :return: result of the coroutine
+        """
+        return self.strategy.run(coroutine)
+
+    def close(self):
+        """
+        Close sessions and event loop used for communication with GitHub
+        """
+        self.strategy.close()
+        self.session.close()
+
+    def _page_params(self, params=None):
+        """
+        Add page size to parameters of paginated request
+
+        :param Optinal[dict[str, str] params: request parameters
+
+        :rtype: Optinal[dict[str, str]]
+
+        :return: request parameters with page size
+        """
+        if self.per_page is None:
+            return params
+        return dict(params or {}, per_page=self.per_page)
+
     def _token_auth(self, req):
         """
         This alters all our outgoing requests by setting up the Github authentication token in the header request.
@@ -186,7 +652,7 @@ class GitHub:
 
         :return: updated requests with GitHub token
         """
-        req.headers['Authorization'] = 'token ' + self.token
+        req.headers.setdefault('Authorization', 'token ' + self.token)
         return req
 
     def auth_header(self):
@@ -204,7 +670,7 @@ class GitHub:
         #return self._paginated_json_get(f'{self.API}/user')
 
         url = f'{self.API}/user'
-        return self.strategy.paginated_get(url, headers=self.auth_header(), session=self.session)
+        return self.strategy.paginated_get(url, headers=self.auth_header(), session=self.session, context=self.context)
 
 
     def pull_requests(self, owner, repo, state='open', base=None):
@@ -229,8 +695,9 @@ class GitHub:
         if base is not None:
             params['base'] = base
         url = f'{self.API}/repos/{owner}/{repo}/pulls'
+        params = self._page_params(params)
 
-        return self.strategy.paginated_get(url, params=params, headers=self.auth_header(), session=self.session)
+        return self.strategy.paginated_get(url, params=params, headers=self.auth_header(), session=self.session, context=self.context)
 
     async def async_pull_requests(self, owner, repo, state='open', base=None):
         """
@@ -254,8 +721,100 @@ class GitHub:
         if base is not None:
             params['base'] = base
         url = f'{self.API}/repos/{owner}/{repo}/pulls'
+        params = self._page_params(params)
+
+        return await self.strategy._paginated_get(url, params=params, headers=self.auth_header(), context=self.context)
+
+    def iter_repos(self, owner, kind='orgs'):
+        """
+        Get all repositories of organization or user as generator, repos of a page are yielded once it arrives.
+
+        :param str owner: GitHub organization or user
+
+        :param str kind: "orgs" or "users"
+
+        :rtype: Iterator[dict]
+
+        :return: generator of repositories
+        """
+        url = f'{self.API}/{kind}/{owner}/repos'
+        for page in self.strategy.iter_pages(url, params=self._page_params(), headers=self.auth_header(),
+                                             session=self.session, context=self.context):
+            yield from page
+
+    async def aiter_repos(self, owner, kind='orgs'):
+        """
+        Get all repositories of organization or user as async generator, repos of a page are yielded once it arrives.
+
+        :param str owner: GitHub organization or user
+
+        :param str kind: "orgs" or "users"
+
+        :rtype: AsyncIterator[dict]
+
+        :return: async generator of repositories
+        """
+        url = f'{self.API}/{kind}/{owner}/repos'
+        async for page in self.strategy.aiter_pages(url, params=self._page_params(), headers=self.auth_header(),
+                                                    context=self.context):
+            for repo_dict in page:
+                yield repo_dict
+
+    def _pull_requests_params(self, state='open', base=None):
+        """
+        Parameters of Pull Requests listing
+        """
+        params = {'state': state}
+        if base is not None:
+            params['base'] = base
+        return self._page_params(params)
+
+    def iter_pull_requests(self, owner, repo, state='open', base=None):
+        """
+        Get all Pull Requests of a defined repositary as generator, PRs of a page are yielded once it arrives.
+
+        :param str owner: GtiHub user or org
+
+        :param str repo: repo name
+
+        :param str state: defines the state for retrived PR
+                          Default: open
+                          Set of values: ["open", "closed", "all"]
+
+        :param str base: optional branch the PRs are open for
+
+        :rtype: Iterator[dict]
+
+        :return: generator of pull requests for given defined repo
+        """
+        url = f'{self.API}/repos/{owner}/{repo}/pulls'
+        for page in self.strategy.iter_pages(url, params=self._pull_requests_params(state, base),
+                                             headers=self.auth_header(), session=self.session, context=self.context):
+            yield from page
+
+    async def aiter_pull_requests(self, owner, repo, state='open', base=None):
+        """
+        Get all Pull Requests of a defined repositary as async generator, PRs of a page are yielded once it arrives.
+
+        :param str owner: GtiHub user or org
+
+        :param str repo: repo name
+
+        :param str state: defines the state for retrived PR
+                          Default: open
+                          Set of values: ["open", "closed", "all"]
+
+        :param str base: optional branch the PRs are open for
 
-        return await self.strategy._paginated_get(url, params=params, headers=self.auth_header(), session=self.session)
+        :rtype: AsyncIterator[dict]
+
+        :return: async generator of pull requests for given defined repo
+        """
+        url = f'{self.API}/repos/{owner}/{repo}/pulls'
+        async for page in self.strategy.aiter_pages(url, params=self._pull_requests_params(state, base),
+                                                    headers=self.auth_header(), context=self.context):
+            for pr_dict in page:
+                yield pr_dict
 
     def pr_files(self, owner, repo, number):
         """
@@ -273,7 +832,7 @@ class GitHub:
         """
         url = f'{self.API}/repos/{owner}/{repo}/pulls/{number}/files'
 
-        return self.strategy.paginated_get(url, headers=self.auth_header(), session=self.session)
+        return self.strategy.paginated_get(url, params=self._page_params(), headers=self.auth_header(), session=self.session, context=self.context)
 
     async def async_pr_files(self, owner, repo, number):
         """
@@ -291,7 +850,7 @@ class GitHub:
         """
         url = f'{self.API}/repos/{owner}/{repo}/pulls/{number}/files'
 
-        return await self.strategy._paginated_get(url, headers=self.auth_header(), session=self.session)
+        return await self.strategy._paginated_get(url, params=self._page_params(), headers=self.auth_header(), context=self.context)
 
     def pr_filenames(self, owner, repo, number):
         """
@@ -325,27 +884,246 @@ class GitHub:
         """
         return (f['filename'] for f in await self.async_pr_files(owner, repo, number))
 
-    def reset_labels(self, owner, repo, number, labels):
+    def forget_pr_files(self, owner, repo, number):
         """
-        Set's labels for Pull Request by replacing all the existing lables.
+        Drop files of one Pull Request fetched in advance, the PR is not labeled.
+        REST API files are fetched only when requested, so there is nothing to drop.
 
         :param str owner: Github username
 
         :param str repo: name of the repository
 
         :param int number: ID of the PR
+        """
+        pass
 
-        :param list[str] lables: all lables this PR will have
+    def reset_labels(self, owner, repo, number, labels):
+        """
+        Set's labels for Pull Request by replacing all the existing lables.
 
-        :rtype dict: json
+        :param str owner: Github username
+
+        :param str repo: name of the repository
+
+        :param int number: ID of the PR
+
+        :param list[str] lables: all lables this PR will have
+
+        :rtype dict: json
 
         :return: new labels for the pull request
         """
         url = f'{self.API}/repos/{owner}/{repo}/issues/{number}'
-        r = self.session.patch(url, json={'labels': labels})
+        r = self.context.send(self.session, 'patch', url, json={'labels': labels})
         r.raise_for_status()
         return r.json()['labels']
 
+    async def async_reset_labels(self, owner, repo, number, labels):
+        """
+        Set's labels for Pull Request by replacing all the existing lables, asynchronously.
+
+        :param str owner: Github username
+
+        :param str repo: name of the repository
+
+        :param int number: ID of the PR
+
+        :param list[str] lables: all lables this PR will have
+
+        :rtype dict: json
+
+        :return: corutine of new labels for the pull request
+        """
+        url = f'{self.API}/repos/{owner}/{repo}/issues/{number}'
+        json = await self.strategy._send('PATCH', url, headers=self.auth_header(), json={'labels': labels},
+                                         context=self.context)
+        return json['labels']
+
+    def add_labels(self, owner, repo, number, labels):
+        """
+        Add labels to Pull Request, the existing labels are kept.
+
+        :param str owner: Github username
+
+        :param str repo: name of the repository
+
+        :param int number: ID of the PR
+
+        :param list[str] lables: lables to be added
+
+        :rtype dict: json
+
+        :return: new labels for the pull request
+        """
+        url = f'{self.API}/repos/{owner}/{repo}/issues/{number}/labels'
+        r = self.context.send(self.session, 'post', url, json={'labels': labels})
+        r.raise_for_status()
+        return r.json()
+
+    async def async_add_labels(self, owner, repo, number, labels):
+        """
+        Add labels to Pull Request, the existing labels are kept, asynchronously.
+
+        :param str owner: Github username
+
+        :param str repo: name of the repository
+
+        :param int number: ID of the PR
+
+        :param list[str] lables: lables to be added
+
+        :rtype dict: json
+
+        :return: corutine of new labels for the pull request
+        """
+        url = f'{self.API}/repos/{owner}/{repo}/issues/{number}/labels'
+        return await self.strategy._send('POST', url, headers=self.auth_header(), json={'labels': labels},
+                                         context=self.context)
+
+    def remove_label(self, owner, repo, number, label):
+        """
+        Remove single label from Pull Request.
+
+        :param str owner: Github username
+
+        :param str repo: name of the repository
+
+        :param int number: ID of the PR
+
+        :param str label: lable to be removed
+
+        :rtype Optional[dict]: json
+
+        :return: new labels for the pull request, None if the label was already removed (404)
+        """
+        url = f'{self.API}/repos/{owner}/{repo}/issues/{number}/labels/{parse.quote(label, safe="")}'
+        r = self.context.send(self.session, 'delete', url)
+        if r.status_code == 404:
+            return None
+        r.raise_for_status()
+        return r.json()
+
+    async def async_remove_label(self, owner, repo, number, label):
+        """
+        Remove single label from Pull Request, asynchronously.
+
+        :param str owner: Github username
+
+        :param str repo: name of the repository
+
+        :param int number: ID of the PR
+
+        :param str label: lable to be removed
+
+        :rtype Optional[dict]: json
+
+        :return: corutine of new labels for the pull request, None if the label was already removed (404)
+        """
+        import aiohttp
+        url = f'{self.API}/repos/{owner}/{repo}/issues/{number}/labels/{parse.quote(label, safe="")}'
+        try:
+            return await self.strategy._send('DELETE', url, headers=self.auth_header(), context=self.context)
+        except aiohttp.ClientResponseError as e:
+            if e.status != 404:
+                raise
+            return None
+
+    def update_labels(self, owner, repo, number, existing, future):
+        """
+        Change labels of Pull Request from existing to future with the cheapest requests.
+
+        :param str owner: Github username
+
+        :param str repo: name of the repository
+
+        :param int number: ID of the PR
+
+        :param set[str] existing: labels the PR currently has
+
+        :param set[str] future: all lables this PR will have
+
+        :rtype dict: json
+
+        :return: new labels for the pull request
+        """
+        labels = [{'name': label} for label in sorted(existing)]
+        for method, argument in self._label_requests(existing, future):
+            new_labels = getattr(self, method)(owner, repo, number, argument)
+            labels = self._labels_after(labels, method, argument, new_labels)
+        return labels
+
+    async def async_update_labels(self, owner, repo, number, existing, future):
+        """
+        Change labels of Pull Request from existing to future with the cheapest requests, asynchronously.
+
+        :param str owner: Github username
+
+        :param str repo: name of the repository
+
+        :param int number: ID of the PR
+
+        :param set[str] existing: labels the PR currently has
+
+        :param set[str] future: all lables this PR will have
+
+        :rtype dict: json
+
+        :return: corutine of new labels for the pull request
+        """
+        labels = [{'name': label} for label in sorted(existing)]
+        for method, argument in self._label_requests(existing, future):
+            new_labels = await getattr(self, 'async_' + method)(owner, repo, number, argument)
+            labels = self._labels_after(labels, method, argument, new_labels)
+        return labels
+
+    @staticmethod
+    def _labels_after(labels, method, argument, new_labels):
+        """
+        Labels of Pull Request after label request, label that was already removed counts as removed
+
+        :param list[dict] labels: labels before the request
+
+        :param str method: method name of the request
+
+        :param argument: last argument of the request
+
+        :param Optional[list[dict]] new_labels: labels returned by the request
+
+        :rtype: list[dict]
+        """
+        if new_labels is None and method == 'remove_label':
+            return [label for label in labels if label['name'] != argument]
+        return new_labels
+
+    def _label_requests(self, existing, future):
+        """
+        Plan the cheapest requests changing labels from existing to future.
+
+        Nothing is sent when the labels do not change. Replacing all labels costs one request,
+        adding costs one request and every removed label costs one more, so the labels
+        are changed one by one only when it means fewer requests or a smaller payload.
+
+        :param set[str] existing: labels the PR currently has
+
+        :param set[str] future: all lables this PR will have
+
+        :rtype: list[tuple(str, object)]
+
+        :return: list of method names with their last argument
+        """
+        added = future - existing
+        removed = existing - future
+        if not added and not removed:
+            return []
+
+        replace_cost = (1, len(future))
+        incremental_cost = (int(bool(added)) + len(removed), len(added))
+        if incremental_cost >= replace_cost:
+            return [('reset_labels', sorted(future))]
+
+        plan = [('add_labels', sorted(added))] if added else []
+        return plan + [('remove_label', label) for label in sorted(removed)]
+
 
 class Change(enum.Enum):
     """
@@ -357,6 +1135,50 @@ class Change(enum.Enum):
     NONE = 3
 
 
+class DiscoveryError(Exception):
+    """
+    Listing of repositories of organization or user failed
+    """
+
+
+RepoResult = collections.namedtuple('RepoResult', ['repo', 'ok'])
+RepoResult.__doc__ = """
+Result of listing PRs of repo, yielded before results of its PRs
+"""
+
+PRResult = collections.namedtuple('PRResult', ['repo', 'url', 'changes', 'elapsed'])
+PRResult.__doc__ = """
+Result of single PR, changes are None on failure, elapsed are seconds the PR took
+"""
+
+ListingFailed = collections.namedtuple('ListingFailed', ['repo'])
+ListingFailed.__doc__ = """
+Failed listing of later page of PRs of repo, yielded after results of PRs of the listed pages,
+PRs of the failed and following pages are not labeled
+"""
+
+
+class LabelPlan(collections.namedtuple('LabelPlan', ['matching', 'added', 'remained', 'deleted', 'future'])):
+    """
+    Labels planned for PR by its files and existing labels: matching labels, labels to be added,
+    kept and deleted and the labels the PR should have
+    """
+    __slots__ = ()
+
+    @property
+    def changes(self):
+        """
+        Sorted label changes as reported for labeled PR
+
+        :rtype: list[tuple(str, Change)]
+        """
+        return sorted(itertools.chain(
+            [(a, Change.ADD) for a in self.added],
+            [(r, Change.NONE) for r in self.remained],
+            [(d, Change.DELETE) for d in self.deleted]
+        ))
+
+
 class Report:
     """
     Simple container for reporting repo-pr label changes
@@ -370,6 +1192,34 @@ class Report:
         self.repo = repo
         self.ok = True
         self.prs = {}
+        # listing failed after PRs of the previous pages were labeled
+        self.listing_failed = False
+
+    def add(self, result):
+        """
+        Add streamed result of the repo or of its PR, repo is not ok if listing of any page failed
+
+        :param Union[RepoResult, PRResult, ListingFailed] result: result to be reported
+        """
+        if isinstance(result, RepoResult):
+            self.ok = result.ok
+        elif isinstance(result, ListingFailed):
+            self.ok = False
+            self.listing_failed = True
+        else:
+            self.prs[result.url] = result.changes
+
+    def results(self):
+        """
+        Results of the report as they would be streamed
+
+        :rtype: Iterator[Union[RepoResult, PRResult, ListingFailed]]
+        """
+        yield RepoResult(self.repo, self.ok or self.listing_failed)
+        for url, changes in self.prs.items():
+            yield PRResult(self.repo, url, changes, None)
+        if self.listing_failed:
+            yield ListingFailed(self.repo)
 
 
 class Filabel:
@@ -378,11 +1228,13 @@ class Filabel:
 
     We provide a configuration which files should be labeled and Filabel tool do the rest.
     """
-    def __init__(self, token, labels, state='open', base=None, delete_old=True, async_run=False, github=None):
+    def __init__(self, token, labels, state='open', base=None, delete_old=True, async_run=False, github=None,
+                 cache_size=4096, response_cache=None, per_page=None, scheduler=None, graphql=False,
+                 state_store=None, api_url=None, metrics=None, tracer=None, ratelimit=None):
         """
         Initilizer for Filabel class.
 
-        :param str token: GitHub token
+        :param Union[str, list[str]] token: GitHub token or tokens used by their remaining rate limit
 
         :param list[str] labels: Configuration of labels with globs
 
@@ -393,18 +1245,109 @@ class Filabel:
         :param delete_old: If no longer matching labels should be deleted
 
         :param Optional[Github] github: inilized Github API wrapper
+
+        :param Optional[int] cache_size: max number of filenames with remembered labels, None for unbounded
+
+        :param Optional[ResponseCache] response_cache: cache for conditional GitHub requests
+
+        :param Optional[int] per_page: page size of paginated GitHub requests
+
+        :param Optional[ConcurrencyScheduler] scheduler: concurrency limits of async run
+
+        :param bool graphql: If PRs with their labels and files should be fetched by GitHub GraphQL API
+
+        :param Optional[StateStore] state_store: state of labeled PRs, unchanged PRs are skipped
+
+        :param Optional[str] api_url: url of GitHub API, api.github.com if None
+
+        :param Optional[Metrics] metrics: registry of made GitHub requests, new one if None
+
+        :param Optional[Tracer] tracer: tracer of repos, PRs and HTTP requests, not traced if None
+
+        :param Optional[TokenPool] ratelimit: rate limits of tokens pacing the requests, pool of the token if None
         """
 
+        github_class = GitHub
+        if graphql:
+            from filabel.graphql import GraphQLGitHub
+            github_class = GraphQLGitHub
+
         if async_run:
-            self.github = github or GitHub(token, strategy=AsyncPagination())
+            self.github = github or github_class(token, strategy=AsyncPagination(scheduler=scheduler),
+                                                 cache=response_cache, per_page=per_page, api_url=api_url,
+                                                 metrics=metrics, tracer=tracer, ratelimit=ratelimit)
         else:
-            self.github = github or GitHub(token, strategy=SyncPagination())
+            self.github = github or github_class(token, strategy=SyncPagination(), cache=response_cache,
+                                                 per_page=per_page, api_url=api_url, metrics=metrics,
+                                                 tracer=tracer, ratelimit=ratelimit)
 
+        self.cache_size = cache_size
+        self._delete_old = delete_old
         self.labels = labels
         self.state = state
         self.base = base
-        self.delete_old = delete_old
         self.async_run = async_run
+        self.state_store = state_store
+        self.tracer = tracer if tracer is not None else getattr(self.github, 'tracer', None)
+
+    @property
+    def labels(self):
+        """
+        Configuration of labels with globs, read-only. The matcher and the cache of labels
+        are built when the labels are set, so a changed configuration has to be assigned again.
+
+        :rtype: Mapping[str, tuple[str]]
+
+        :return: labels with their patterns
+        """
+        return self._labels
+
+    @labels.setter
+    def labels(self, labels):
+        """
+        Set configuration of labels and compile it for matching, the configuration is copied,
+        so later changes of the given dict do not take effect until it is assigned again
+
+        :param dict[str, list[str]] labels: Configuration of labels with globs
+        """
+        labels = types.MappingProxyType({label: tuple(patterns) for label, patterns in labels.items()})
+        self._labels = labels
+        self.matcher = LabelMatcher(labels)
+        # new cache for every configuration, remembered labels would be stale
+        self._filename_labels = functools.lru_cache(maxsize=self.cache_size)(
+            lambda filename: frozenset(self.matcher.filename_labels(filename))
+        )
+        # fingerprints of labeled PRs are checked with the hash once per PR
+        self._config_hash = StateStore.config_hash(labels, self.delete_old)
+
+    @property
+    def delete_old(self):
+        """
+        If no longer matching labels are deleted
+
+        :rtype: bool
+        """
+        return self._delete_old
+
+    @delete_old.setter
+    def delete_old(self, delete_old):
+        """
+        Set if no longer matching labels are deleted, it is part of the configuration hash
+
+        :param bool delete_old: If no longer matching labels should be deleted
+        """
+        self._delete_old = delete_old
+        self._config_hash = StateStore.config_hash(self.labels, delete_old)
+
+    def cache_info(self):
+        """
+        Statistics of the filename to labels cache
+
+        :rtype: functools._CacheInfo
+
+        :return: named tuple of hits, misses, maxsize and currsize
+        """
+        return self._filename_labels.cache_info()
 
     @property
     def defined_labels(self):
@@ -429,11 +1372,9 @@ class Filabel:
         """
         labels = set()
         for filename in pr_filenames:
-            for label, patterns in self.labels.items():
-                for pattern in patterns:
-                    if fnmatch.fnmatch(filename, pattern):
-                        labels.add(label)
-                        break
+            labels |= self._filename_labels(filename)
+            if len(labels) == len(self.matcher.labels):
+                break
         return labels
 
     def _compute_labels(self, defined, matching, existing):
@@ -460,9 +1401,25 @@ class Filabel:
         future = future | matching
         return added, remained, deleted, future
 
-    def run_pr(self, owner, repo, pr_dict):
+    def plan_labels(self, filenames, existing):
         """
-        Manage labels for single given PR
+        Plan labels of PR with given files and labels by the configuration, without any request
+
+        :param Iterable[str] filenames: changed files of PR
+
+        :param Iterable[str] existing: names of labels the PR has
+
+        :rtype: LabelPlan
+
+        :return: matching, added, remained, deleted and future labels of the PR
+        """
+        matching = self._matching_labels(filenames)
+        added, remained, deleted, future = self._compute_labels(self.defined_labels, matching, set(existing))
+        return LabelPlan(matching, added, remained, deleted, future)
+
+    def _skipped_changes(self, owner, repo, pr_dict):
+        """
+        Report of PR that has not changed since its last labeling, if any
 
         :param str owner: Owner of GitHub repository
 
@@ -470,28 +1427,87 @@ class Filabel:
 
         :param dict pr_dict: PR as dict from GitHub API
 
+        :rtype: Optional[list[tuple(str, Change)]]
 
-        :return:
+        :return: sorted unchanged labels or None if the PR has to be labeled
         """
-        pr_filenames = list(
-            self.github.pr_filenames(owner, repo, pr_dict['number'])
-        )
-        added, remained, deleted, future = self._compute_labels(
-            self.defined_labels,
-            self._matching_labels(pr_filenames),
-            set(l['name'] for l in pr_dict['labels'])
-        )
+        if self.state_store is None:
+            return None
+        matching = self.state_store.unchanged(owner, repo, pr_dict, self._config_hash)
+        if matching is None:
+            return None
+        self.github.forget_pr_files(owner, repo, pr_dict['number'])
+        return sorted((label, Change.NONE) for label in matching)
+
+    def _remember(self, owner, repo, pr_dict, future, matching, changes):
+        """
+        Store fingerprint of successfully labeled PR
 
-        new_labels = self.github.reset_labels(
-            owner, repo, pr_dict['number'], list(future)
-        )
+        :param str owner: Owner of GitHub repository
+
+        :param str repo: Name of GitHub repository
+
+        :param dict pr_dict: PR as dict from GitHub API
+
+        :param set[str] future: Set of labels the PR was left with
+
+        :param set[str] matching: Set of labels matching the PR files
+
+        :param Optional[list[tuple(str, Change)]] changes: label changes, None on failure
+        """
+        if self.state_store is not None and changes is not None:
+            self.state_store.store(owner, repo, pr_dict, future, matching, self._config_hash)
+
+    def _pr_changes(self, plan, new_labels):
+        """
+        Report label changes of PR if its labels were set as expected
+
+        :param LabelPlan plan: labels planned for the PR
+
+        :param list[dict] new_labels: labels the PR has according to GitHub API
+
+        :rtype: Optional[list[tuple(str, Change)]]
 
+        :return: sorted label changes or None on failure
+        """
         new_label_names = set(l['name'] for l in new_labels)
-        return sorted(itertools.chain(
-            [(a, Change.ADD) for a in added],
-            [(r, Change.NONE) for r in remained],
-            [(d, Change.DELETE) for d in deleted]
-        )) if future == new_label_names else None
+        return plan.changes if plan.future == new_label_names else None
+
+    def run_pr(self, owner, repo, pr_dict):
+        """
+        Manage labels for single given PR
+
+        :param str owner: Owner of GitHub repository
+
+        :param str repo: Name of GitHub repository
+
+        :param dict pr_dict: PR as dict from GitHub API
+
+
+        :return:
+        """
+        with tracing.span(self.tracer, 'pr', repo=f'{owner}/{repo}', number=pr_dict.get('number')) as span:
+            skipped = self._skipped_changes(owner, repo, pr_dict)
+            if skipped is not None:
+                span.set(skipped=True)
+                return skipped
+
+            with tracing.span(self.tracer, 'files'):
+                pr_filenames = list(
+                    self.github.pr_filenames(owner, repo, pr_dict['number'])
+                )
+            with tracing.span(self.tracer, 'match', files=len(pr_filenames)):
+                existing = set(l['name'] for l in pr_dict['labels'])
+                plan = self.plan_labels(pr_filenames, existing)
+
+            with tracing.span(self.tracer, 'labels'):
+                new_labels = self.github.update_labels(
+                    owner, repo, pr_dict['number'], existing, plan.future
+                )
+
+            changes = self._pr_changes(plan, new_labels)
+            self._remember(owner, repo, pr_dict, plan.future, plan.matching, changes)
+            return changes
 
     async def async_run_pr(self, owner, repo, pr_dict):
         """
@@ -507,24 +1523,81 @@ class Filabel:
 
         :return:
         """
+        with tracing.span(self.tracer, 'pr', repo=f'{owner}/{repo}', number=pr_dict.get('number')) as span:
+            skipped = self._skipped_changes(owner, repo, pr_dict)
+            if skipped is not None:
+                span.set(skipped=True)
+                return skipped
 
-        pr_filenames = list(await self.github.async_pr_filenames(owner, repo, pr_dict['number']))
+            with tracing.span(self.tracer, 'files'):
+                pr_filenames = list(await self.github.async_pr_filenames(owner, repo, pr_dict['number']))
 
-        added, remained, deleted, future = self._compute_labels(
-            self.defined_labels,
-            self._matching_labels(pr_filenames),
-            set(l['name'] for l in pr_dict['labels'])
-        )
+            with tracing.span(self.tracer, 'match', files=len(pr_filenames)):
+                existing = set(l['name'] for l in pr_dict['labels'])
+                plan = self.plan_labels(pr_filenames, existing)
 
-        new_labels = self.github.reset_labels(owner, repo, pr_dict['number'], list(future))
+            with tracing.span(self.tracer, 'labels'):
+                new_labels = await self.github.async_update_labels(
+                    owner, repo, pr_dict['number'], existing, plan.future
+                )
 
-        new_label_names = set(l['name'] for l in new_labels)
+            changes = self._pr_changes(plan, new_labels)
+            self._remember(owner, repo, pr_dict, plan.future, plan.matching, changes)
+            return changes
 
-        return sorted(itertools.chain(
-            [(a, Change.ADD) for a in added],
-            [(r, Change.NONE) for r in remained],
-            [(d, Change.DELETE) for d in deleted]
-        )) if future == new_label_names else None
+    async def _async_run_pr_limited(self, reposlug, pr_dict):
+        """
+        Manage labels for single given PR once the repo limit of concurrency allows
+
+        :param str reposlug: Reposlug (full name) of GitHub repo (i.e. "owner/name")
+
+        :param dict pr_dict: PR as dict from GitHub API
+
+        :return: corutine of label changes
+        """
+        owner, repo = reposlug.split('/')
+        async with self.github.scheduler.repo(reposlug):
+            return await self.async_run_pr(owner, repo, pr_dict)
+
+    def _iter_repo(self, reposlug):
+        """
+        Manage labels for all matching PRs in given repo, yielding results as they complete
+
+        :param str reposlug: Reposlug (full name) of GitHub repo (i.e. "owner/name")
+
+        :rtype: Iterator[Union[RepoResult, PRResult, ListingFailed]]
+
+        :return: generator of repo result followed by results of its PRs, failed listing of later page
+                 is yielded as ListingFailed
+        """
+        owner, repo = reposlug.split('/')
+        with tracing.span(self.tracer, 'repo', repo=reposlug) as span:
+            prs = self.github.iter_pull_requests(owner, repo, self.state, self.base)
+            listed = False
+            while True:
+                try:
+                    pr_dict = next(prs)
+                except StopIteration:
+                    break
+                except Exception:
+                    span.set(ok=False)
+                    # repo was already reported as listed, the failed page is reported after its PRs
+                    yield ListingFailed(reposlug) if listed else RepoResult(reposlug, False)
+                    return
+                if not listed:
+                    yield RepoResult(reposlug, True)
+                    listed = True
+
+                url = pr_dict.get('html_url', 'unknown')
+                started = time.monotonic()
+                try:
+                    changes = self.run_pr(owner, repo, pr_dict)
+                except Exception:
+                    changes = None
+                yield PRResult(reposlug, url, changes, time.monotonic() - started)
+
+            if not listed:
+                yield RepoResult(reposlug, True)
 
     def run_repo(self, reposlug):
         """
@@ -537,24 +1610,58 @@ class Filabel:
         :return: report
         """
         report = Report(reposlug)
+        for result in self._iter_repo(reposlug):
+            report.add(result)
+        return report
+
+    async def _stream_repo(self, reposlug, emit):
+        """
+        Manage labels for all matching PRs in given repo using async execution, emitting results as they complete
+
+        :param str reposlug: Reposlug (full name) of GitHub repo (i.e. "owner/name")
+
+        :param Callable emit: called with repo result and then with result of every PR,
+                              failed listing of later page emits ListingFailed after results of the PRs
+
+        :return: corutine
+        """
+        import asyncio
         owner, repo = reposlug.split('/')
-        try:
-            prs = self.github.pull_requests(owner, repo, self.state, self.base)
-        except Exception:
-            report.ok = False
-            return report
 
-        # make async for prs
-        for pr_dict in prs:
+        async def run_pr(pr_dict):
             url = pr_dict.get('html_url', 'unknown')
-            report.prs[url] = None
+            started = time.monotonic()
             try:
-                report.prs[url] = self.run_pr(owner, repo, pr_dict)
+                changes = await self._async_run_pr_limited(reposlug, pr_dict)
             except Exception:
-                pass
+                changes = None
+            emit(PRResult(reposlug, url, changes, time.monotonic() - started))
 
-        return report
+        with tracing.span(self.tracer, 'repo', repo=reposlug) as span:
+            # PRs are labeled while the next pages are fetched, their tasks inherit the repo span
+            tasks = []
+            prs = self.github.aiter_pull_requests(owner, repo, self.state, self.base)
+            try:
+                async for pr_dict in prs:
+                    if not tasks:
+                        emit(RepoResult(reposlug, True))
+                    tasks.append(asyncio.ensure_future(run_pr(pr_dict)))
+            except asyncio.CancelledError:
+                for task in tasks:
+                    task.cancel()
+                raise
+            except Exception:
+                span.set(ok=False)
+                # repo was already reported as listed, the failed page is reported after its PRs
+                failed = ListingFailed(reposlug) if tasks else RepoResult(reposlug, False)
+            else:
+                failed = None
+                if not tasks:
+                    emit(RepoResult(reposlug, True))
 
+            await asyncio.gather(*tasks)
+            if failed is not None:
+                emit(failed)
 
     async def _run_repo(self, reposlug):
         """
@@ -567,26 +1674,256 @@ class Filabel:
         :return: corutine report
         """
         report = Report(reposlug)
-        owner, repo = reposlug.split('/')
+        await self._stream_repo(reposlug, report.add)
+        return report
+
+    def aiter_run_repos(self, reposlugs):
+        """
+        Manage labels of PRs in given repos concurrently, yielding results as they complete.
+        Must be iterated on the event loop of GitHub API wrapper.
+
+        :raise Exception: if iterating the reposlugs fails, i.e. listing of discovered repos
+
+        :param Union[Iterable[str], AsyncIterable[str]] reposlugs: reposlugs, [{user}/{repo}],
+                                                                   repos are labeled as they are iterated
+
+        :rtype: AsyncIterator[Union[RepoResult, PRResult, ListingFailed]]
+
+        :return: async generator of results, result of repo comes before results of its PRs
+        """
+        return self._aiter_repos(reposlugs, self._stream_repo)
+
+    async def aiter_run_reports(self, reposlugs):
+        """
+        Manage labels of PRs in given repos concurrently, yielding report of every repo once it is done.
+        Must be iterated on the event loop of GitHub API wrapper.
+
+        :raise Exception: if iterating the reposlugs fails, i.e. listing of discovered repos
+
+        :param Union[Iterable[str], AsyncIterable[str]] reposlugs: reposlugs, [{user}/{repo}],
+                                                                   repos are labeled as they are iterated
+
+        :rtype: AsyncIterator[Report]
+
+        :return: async generator of reports in order the repos are done
+        """
+        async def run_repo(reposlug, emit):
+            emit(await self._run_repo(reposlug))
+
+        async for report in self._aiter_repos(reposlugs, run_repo):
+            yield report
+
+    async def _aiter_repos(self, reposlugs, stream):
+        """
+        Run given coroutine function for every repo concurrently, yielding what the runs emit
+
+        :param Union[Iterable[str], AsyncIterable[str]] reposlugs: reposlugs, [{user}/{repo}],
+                                                                   repos are run as they are iterated
+
+        :param stream: coroutine function taking reposlug and emit callback
+
+        :rtype: AsyncIterator
+
+        :return: async generator of emitted items
+        """
+        import asyncio
+        results = asyncio.Queue()
+        listed = object()
+        tasks = []
+
+        async def stream_repo(reposlug):
+            try:
+                await stream(reposlug, results.put_nowait)
+            finally:
+                results.put_nowait(None)
+
+        async def list_repos():
+            try:
+                if hasattr(reposlugs, '__aiter__'):
+                    async for reposlug in reposlugs:
+                        tasks.append(asyncio.ensure_future(stream_repo(reposlug)))
+                else:
+                    for reposlug in reposlugs:
+                        tasks.append(asyncio.ensure_future(stream_repo(reposlug)))
+            finally:
+                results.put_nowait(listed)
+
+        lister = asyncio.ensure_future(list_repos())
         try:
-            prs = await self.github.async_pull_requests(owner, repo, self.state, self.base)
-        except Exception as e:
-            report.ok = False
-            return report
+            all_listed = False
+            finished = 0
+            while not all_listed or finished < len(tasks):
+                result = await results.get()
+                if result is listed:
+                    all_listed = True
+                elif result is None:
+                    finished += 1
+                else:
+                    yield result
+            # failed listing is raised once the listed repos are done
+            await lister
+        finally:
+            lister.cancel()
+            for task in tasks:
+                task.cancel()
+
+    def iter_run_repos(self, reposlugs):
+        """
+        Manage labels of PRs in given repos, yielding results as they complete,
+        so they can be printed right away and no report is kept.
 
-        # make async for prs
-        prs_report = await asyncio.gather(*[self.async_run_pr(owner, repo, pr_dict) for pr_dict in prs], return_exceptions=True)
+        :raise Exception: if iterating the reposlugs fails, i.e. listing of discovered repos
 
+        :param Union[Iterable[str], AsyncIterable[str]] reposlugs: reposlugs, [{user}/{repo}],
+                                                                   async iterable only in async mode
 
-        for pr_report, pr_dict in zip(prs_report, prs):
-            url = pr_dict.get('html_url', 'unknown')
-            if not isinstance(pr_report, requests.HTTPError):
-                report.prs[url] = pr_report
-            else:
-                report.prs[url] = None
+        :rtype: Iterator[Union[RepoResult, PRResult, ListingFailed]]
 
+        :return: generator of results, result of repo comes before results of its PRs
+        """
+        if not self.async_run:
+            for reposlug in reposlugs:
+                yield from self._iter_repo(reposlug)
+            return
 
-        return report
+        yield from self._iter_async(self.aiter_run_repos(reposlugs))
+
+    def iter_run_reports(self, reposlugs):
+        """
+        Manage labels of PRs in given repos, yielding report of every repo once it is done,
+        so results of repos labeled at once in async mode are not interleaved
+
+        :raise Exception: if iterating the reposlugs fails, i.e. listing of discovered repos
+
+        :param Union[Iterable[str], AsyncIterable[str]] reposlugs: reposlugs, [{user}/{repo}],
+                                                                   async iterable only in async mode
+
+        :rtype: Iterator[Report]
+
+        :return: generator of reports
+        """
+        if not self.async_run:
+            for reposlug in reposlugs:
+                yield self.run_repo(reposlug)
+            return
+
+        yield from self._iter_async(self.aiter_run_reports(reposlugs))
+
+    def _iter_async(self, results):
+        """
+        Iterate async generator on the event loop of GitHub API wrapper
+
+        :param AsyncIterator results: async generator to be iterated
+
+        :rtype: Iterator
+        """
+        try:
+            while True:
+                try:
+                    yield self.github.run(results.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self.github.run(results.aclose())
+
+    @staticmethod
+    def _repo_selected(repo_dict, include=(), exclude=(), skip_archived=True):
+        """
+        Check if discovered repo should be labeled
+
+        :param dict repo_dict: repo as dict from GitHub API
+
+        :param list[str] include: globs of repo names, any of them has to match if given
+
+        :param list[str] exclude: globs of repo names, none of them can match
+
+        :param bool skip_archived: if archived repos are skipped
+
+        :rtype: bool
+        """
+        name = repo_dict['name']
+        if skip_archived and repo_dict.get('archived'):
+            return False
+        if include and not any(fnmatch.fnmatchcase(name, pattern) for pattern in include):
+            return False
+        return not any(fnmatch.fnmatchcase(name, pattern) for pattern in exclude)
+
+    def iter_reposlugs(self, reposlugs=(), orgs=(), users=(), include=(), exclude=(), skip_archived=True):
+        """
+        Given reposlugs followed by repos discovered in organizations and users,
+        discovered reposlugs are yielded as the listing pages arrive
+
+        :raise DiscoveryError: if listing of repos fails
+
+        :param [str] reposlugs: array of reposlugs, [{user}/{repo}], they are not filtered
+
+        :param list[str] orgs: GitHub organizations
+
+        :param list[str] users: GitHub users
+
+        :param list[str] include: globs of repo names, any of them has to match if given
+
+        :param list[str] exclude: globs of repo names, none of them can match
+
+        :param bool skip_archived: if archived repos are skipped
+
+        :rtype: Iterator[str]
+
+        :return: generator of reposlugs
+        """
+        yield from reposlugs
+        owners = [(org, 'orgs') for org in orgs] + [(user, 'users') for user in users]
+        for owner, kind in owners:
+            repos = self.github.iter_repos(owner, kind)
+            while True:
+                # only the listing is guarded, errors of the consumer are thrown in at yield
+                try:
+                    repo_dict = next(repos)
+                except StopIteration:
+                    break
+                except Exception as e:
+                    raise DiscoveryError(f'repos of {kind[:-1]} {owner} could not be listed') from e
+                if self._repo_selected(repo_dict, include, exclude, skip_archived):
+                    yield repo_dict['full_name']
+
+    async def aiter_reposlugs(self, reposlugs=(), orgs=(), users=(), include=(), exclude=(), skip_archived=True):
+        """
+        Given reposlugs followed by repos discovered in organizations and users,
+        discovered reposlugs are yielded as the listing pages arrive
+
+        :raise DiscoveryError: if listing of repos fails
+
+        :param [str] reposlugs: array of reposlugs, [{user}/{repo}], they are not filtered
+
+        :param list[str] orgs: GitHub organizations
+
+        :param list[str] users: GitHub users
+
+        :param list[str] include: globs of repo names, any of them has to match if given
+
+        :param list[str] exclude: globs of repo names, none of them can match
+
+        :param bool skip_archived: if archived repos are skipped
+
+        :rtype: AsyncIterator[str]
+
+        :return: async generator of reposlugs
+        """
+        for reposlug in reposlugs:
+            yield reposlug
+        owners = [(org, 'orgs') for org in orgs] + [(user, 'users') for user in users]
+        for owner, kind in owners:
+            repos = self.github.aiter_repos(owner, kind)
+            while True:
+                # only the listing is guarded, errors of the consumer are thrown in at yield
+                try:
+                    repo_dict = await repos.__anext__()
+                except StopAsyncIteration:
+                    break
+                except Exception as e:
+                    raise DiscoveryError(f'repos of {kind[:-1]} {owner} could not be listed') from e
+                if self._repo_selected(repo_dict, include, exclude, skip_archived):
+                    yield repo_dict['full_name']
 
     def run_repos(self, reposlugs):
         """
@@ -606,20 +1943,26 @@ class Filabel:
     def async_run_repos(self, reposlugs):
         """
         Main function for running asynchornous Filabel.
-        It initilizes the event loop.
+        It runs on the long-lived event loop of GitHub API wrapper.
 
         :param [str] reposlugs: array of reposlugs, [{user}/{repo}]
         :return: reports
         """
+        import asyncio
 
-        loop = asyncio.get_event_loop()
-
-        reports = loop.run_until_complete(asyncio.gather(*[self._run_repo(reposlug=reposlug) for reposlug in reposlugs]))
+        async def run_repos():
+            return await asyncio.gather(*[self._run_repo(reposlug=reposlug) for reposlug in reposlugs])
 
-        loop.close()
+        return self.github.run(run_repos())
 
-        return reports
 
+    def close(self):
+        """
+        Close connections to GitHub and the state store, to be called when the run ends
+        """
+        self.github.close()
+        if self.state_store is not None:
+            self.state_store.close()
 
     def sync_run_repos(self, reposlugs):
         """
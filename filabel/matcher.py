@@ -0,0 +1,117 @@
+import fnmatch
+import os
+import re
+
+
+SPECIAL_CHARS = frozenset('*?[')
+
+
+def _is_literal(text):
+    """
+    Check if given text contains no glob special characters
+
+    :param str text: part of the pattern
+
+    :rtype: bool
+
+    :return: True if text is matched only by itself
+    """
+    return not SPECIAL_CHARS.intersection(text)
+
+
+class LabelMatcher:
+    """
+    Label configuration compiled for fast filename matching.
+
+    Patterns are sorted into four classes, each answered by the cheapest lookup:
+
+    * literal (``LICENSE``) - dictionary lookup of the whole filename
+    * prefix (``docs/*``) - dictionary lookup of filename prefixes by known lengths
+    * suffix (``*.md``) - dictionary lookup of filename suffixes by known lengths
+    * general (``*/templates/*``) - one regular expression per label, an alternation of its globs
+
+    The results are identical to calling :py:func:`fnmatch.fnmatch` for every pattern.
+    """
+    def __init__(self, labels):
+        """
+        Initilizer for LabelMatcher class.
+
+        :param dict[str, list[str]] labels: Configuration of labels with globs
+        """
+        # labels without patterns can never match, so they are not waited for
+        self.labels = frozenset(label for label, patterns in labels.items() if patterns)
+        self.literals = {}
+        self.prefixes = {}
+        self.suffixes = {}
+        general = {}
+
+        for label, patterns in labels.items():
+            for pattern in patterns:
+                # fnmatch.fnmatch normalizes both the filename and the pattern
+                pattern = os.path.normcase(pattern)
+                if _is_literal(pattern):
+                    self.literals.setdefault(pattern, set()).add(label)
+                elif pattern.endswith('*') and _is_literal(pattern[:-1]):
+                    self.prefixes.setdefault(pattern[:-1], set()).add(label)
+                elif pattern.startswith('*') and _is_literal(pattern[1:]):
+                    self.suffixes.setdefault(pattern[1:], set()).add(label)
+                else:
+                    general.setdefault(label, []).append(fnmatch.translate(pattern))
+
+        self.prefix_lengths = sorted(set(len(p) for p in self.prefixes))
+        self.suffix_lengths = sorted(set(len(s) for s in self.suffixes))
+
+        # globs of one label are joined into single alternation, so the regex engine stops
+        # at the first matching glob and labels already matched by cheaper lookups are not tried
+        self.regexes = [
+            (label, re.compile('|'.join(patterns)).match)
+            for label, patterns in general.items()
+        ]
+
+    def filename_labels(self, filename):
+        """
+        Find labels matching single filename
+
+        :param str filename: filename from PR
+
+        :rtype: set[str]
+
+        :return: labels matching the filename
+        """
+        filename = os.path.normcase(filename)
+        labels = set(self.literals.get(filename, ()))
+
+        size = len(filename)
+        for length in self.prefix_lengths:
+            if length > size:
+                break
+            labels.update(self.prefixes.get(filename[:length], ()))
+        for length in self.suffix_lengths:
+            if length > size:
+                break
+            labels.update(self.suffixes.get(filename[size - length:], ()))
+
+        for label, match in self.regexes:
+            if label not in labels and match(filename):
+                labels.add(label)
+
+        return labels
+
+    def match(self, filenames):
+        """
+        Find labels matching any of given filenames
+
+        Stops early once every defined label has matched.
+
+        :param list[str] filenames: list of filenames as strings
+
+        :rtype: set[str]
+
+        :return: used labels in PR filenames
+        """
+        labels = set()
+        for filename in filenames:
+            labels |= self.filename_labels(filename)
+            if len(labels) == len(self.labels):
+                break
+        return labels
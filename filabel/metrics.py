@@ -0,0 +1,201 @@
+import bisect
+import collections
+import re
+import threading
+from urllib import parse
+
+
+# status of request failed without response, i.e. connection error or timeout
+ERROR_STATUS = 'error'
+
+# seconds, upper bounds of latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# path segments replaced by placeholders, so requests are counted by endpoint and not by url
+ENDPOINT_PATTERNS = [
+    (re.compile(r'^/repos/[^/]+/[^/]+'), '/repos/{owner}/{repo}'),
+    (re.compile(r'^/(orgs|users)/[^/]+'), r'/\1/{owner}'),
+    (re.compile(r'/labels/[^/]+$'), '/labels/{name}'),
+    (re.compile(r'/\d+(?=/|$)'), '/{number}'),
+]
+
+
+def endpoint(url):
+    """
+    Endpoint of GitHub API url, i.e. ``/repos/{owner}/{repo}/pulls/{number}/files``
+
+    :param str url: request url
+
+    :rtype: str
+    """
+    path = parse.urlparse(url).path
+    # GitHub Enterprise API is served under prefix
+    for prefix in ('/api/v3', '/api'):
+        if path.startswith(prefix + '/'):
+            path = path[len(prefix):]
+            break
+    for pattern, replacement in ENDPOINT_PATTERNS:
+        path = pattern.sub(replacement, path)
+    return path
+
+
+def _labels(**labels):
+    """
+    Labels of Prometheus sample
+
+    :rtype: str
+    """
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels.items()) + '}'
+
+
+class Metrics:
+    """
+    Registry of GitHub requests made by both pagination strategies and label edits.
+
+    Requests are counted by method, endpoint and status together with received bytes,
+    latency histogram and retries. Hits and misses of conditional requests are counted too.
+    The registry is shared by threads and the event loop and rendered in Prometheus text format.
+    """
+    def __init__(self, buckets=BUCKETS):
+        """
+        Initilizer for Metrics class.
+
+        :param tuple[float] buckets: upper bounds of latency histogram buckets in seconds
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.requests = collections.Counter()
+        self.bytes = collections.Counter()
+        self.retries = collections.Counter()
+        self.latency_buckets = {}
+        self.latency_sum = collections.Counter()
+        self.latency_count = collections.Counter()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._lock = threading.Lock()
+
+    def observe(self, method, url, status, seconds, size=0):
+        """
+        Record single request
+
+        :param str method: HTTP method
+
+        :param str url: request url
+
+        :param Union[int, str] status: response status code or ERROR_STATUS if no response was received
+
+        :param float seconds: latency of the request
+
+        :param int size: number of received bytes
+        """
+        key = (method.upper(), endpoint(url))
+        with self._lock:
+            self.requests[key + (str(status),)] += 1
+            self.bytes[key] += size
+            self.latency_sum[key] += seconds
+            self.latency_count[key] += 1
+            counts = self.latency_buckets.setdefault(key, [0] * len(self.buckets))
+            for num in range(bisect.bisect_left(self.buckets, seconds), len(self.buckets)):
+                counts[num] += 1
+
+    def retry(self, method, url):
+        """
+        Record retry of throttled request
+
+        :param str method: HTTP method
+
+        :param str url: request url
+        """
+        with self._lock:
+            self.retries[(method.upper(), endpoint(url))] += 1
+
+    def cache(self, hit):
+        """
+        Record conditional request
+
+        :param bool hit: if the cached response was used
+        """
+        with self._lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+    def merge(self, other):
+        """
+        Add requests recorded by other registry, i.e. of worker process
+
+        :param Metrics other: registry with the same buckets
+        """
+        with self._lock:
+            self.requests.update(other.requests)
+            self.bytes.update(other.bytes)
+            self.retries.update(other.retries)
+            self.latency_sum.update(other.latency_sum)
+            self.latency_count.update(other.latency_count)
+            for key, counts in other.latency_buckets.items():
+                mine = self.latency_buckets.setdefault(key, [0] * len(self.buckets))
+                self.latency_buckets[key] = [a + b for a, b in zip(mine, counts)]
+            self.cache_hits += other.cache_hits
+            self.cache_misses += other.cache_misses
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def total(self):
+        """
+        Number of recorded requests
+
+        :rtype: int
+        """
+        with self._lock:
+            return sum(self.requests.values())
+
+    def render(self):
+        """
+        Metrics in Prometheus text exposition format
+
+        :rtype: str
+        """
+        lines = []
+        with self._lock:
+            lines.append('# HELP filabel_github_requests_total GitHub requests by endpoint and status.')
+            lines.append('# TYPE filabel_github_requests_total counter')
+            for (method, path, status), count in sorted(self.requests.items()):
+                lines.append(f'filabel_github_requests_total{_labels(method=method, endpoint=path, status=status)}'
+                             f' {count}')
+
+            lines.append('# HELP filabel_github_response_bytes_total Bytes received from GitHub.')
+            lines.append('# TYPE filabel_github_response_bytes_total counter')
+            for (method, path), size in sorted(self.bytes.items()):
+                lines.append(f'filabel_github_response_bytes_total{_labels(method=method, endpoint=path)} {size}')
+
+            lines.append('# HELP filabel_github_request_duration_seconds Latency of GitHub requests.')
+            lines.append('# TYPE filabel_github_request_duration_seconds histogram')
+            for (method, path), counts in sorted(self.latency_buckets.items()):
+                name = 'filabel_github_request_duration_seconds'
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f'{name}_bucket{_labels(method=method, endpoint=path, le=repr(bound))} {count}')
+                count = self.latency_count[(method, path)]
+                lines.append(f'{name}_bucket{_labels(method=method, endpoint=path, le="+Inf")} {count}')
+                lines.append(f'{name}_sum{_labels(method=method, endpoint=path)} '
+                             f'{self.latency_sum[(method, path)]:.6f}')
+                lines.append(f'{name}_count{_labels(method=method, endpoint=path)} {count}')
+
+            lines.append('# HELP filabel_github_retries_total Retried throttled GitHub requests.')
+            lines.append('# TYPE filabel_github_retries_total counter')
+            for (method, path), count in sorted(self.retries.items()):
+                lines.append(f'filabel_github_retries_total{_labels(method=method, endpoint=path)} {count}')
+
+            lines.append('# HELP filabel_github_cache_total Conditional GitHub requests by result.')
+            lines.append('# TYPE filabel_github_cache_total counter')
+            lines.append(f'filabel_github_cache_total{_labels(result="hit")} {self.cache_hits}')
+            lines.append(f'filabel_github_cache_total{_labels(result="miss")} {self.cache_misses}')
+
+        return '\n'.join(lines) + '\n'
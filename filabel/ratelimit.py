@@ -0,0 +1,428 @@
+import datetime
+import email.utils
+import threading
+import time
+from urllib import parse
+
+
+class RateLimit:
+    """
+    GitHub rate limit tracked from response headers, shared by sync and async requests.
+
+    Requests are paced by token bucket once the remaining budget drops to the reserve,
+    its rate spreads the remaining requests until the reset, so a long run slows down
+    instead of running out. Throttled requests (429, or 403 with ``Retry-After``
+    or no remaining budget) are backed off and retried. Processes sending requests
+    with the same token see the same remaining budget, every one of them paces its share.
+    """
+    def __init__(self, reserve=500, burst=10, backoff=60, max_retries=3, max_wait=900, share=1.0):
+        """
+        Initilizer for RateLimit class.
+
+        :param int reserve: remaining requests from which the requests are paced
+
+        :param int burst: requests that can be sent at once when paced
+
+        :param float backoff: seconds to wait before first retry without Retry-After, doubled for next ones
+
+        :param int max_retries: max number of retries of single request
+
+        :param float max_wait: seconds, longer waits are not worth it and the request fails
+
+        :param float share: fraction of the remaining budget paced by this process, the rest is left to other
+            processes with the same token
+        """
+        self.reserve = reserve
+        self.burst = burst
+        self.backoff = backoff
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self.share = share
+
+        self.limit = None
+        self.remaining = None
+        self.reset = None
+        self.requests = 0
+        self.retries = 0
+        self.waited = 0.0
+
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+        self._lock = threading.Lock()
+
+    def update(self, headers):
+        """
+        Update the budget from rate limit headers of response
+
+        :param headers: response headers
+        """
+        with self._lock:
+            self.requests += 1
+            if headers.get('X-RateLimit-Remaining') is None:
+                return
+            self.limit = int(headers.get('X-RateLimit-Limit', self.limit or 0))
+            self.remaining = int(headers['X-RateLimit-Remaining'])
+            if headers.get('X-RateLimit-Reset') is not None:
+                self.reset = int(headers['X-RateLimit-Reset'])
+
+    @property
+    def rate(self):
+        """
+        Requests per second that make the share of the remaining budget last until the reset
+
+        :rtype: Optional[float]
+
+        :return: rate or None if requests are not paced
+        """
+        if self.remaining is None or self.reset is None or self.remaining > self.reserve:
+            return None
+        return self.remaining * self.share / max(1.0, self.reset - time.time())
+
+    def delay(self):
+        """
+        Take token for the next request
+
+        :rtype: float
+
+        :return: seconds to wait before the request is sent
+        """
+        with self._lock:
+            now = time.monotonic()
+            rate = self.rate
+            if rate is None:
+                self._tokens = float(self.burst)
+                self._refilled = now
+                return 0.0
+            if self.remaining == 0:
+                wait = max(0.0, self.reset - time.time())
+                self.waited += wait
+                return wait
+
+            self._tokens = min(float(self.burst), self._tokens + (now - self._refilled) * rate)
+            self._refilled = now
+            self._tokens -= 1
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / rate
+            self.waited += wait
+            return wait
+
+    @staticmethod
+    def _retry_after(value):
+        """
+        Parse Retry-After header, given as seconds or HTTP-date
+
+        :param Optional[str] value: header value
+
+        :rtype: Optional[float]
+
+        :return: seconds to wait or None if the header is missing or not valid
+        """
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            date = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError):
+            return None
+        if date is None:
+            return None
+        if date.tzinfo is None:
+            # -0000 zone, the date is in UTC
+            date = date.replace(tzinfo=datetime.timezone.utc)
+        return max(0.0, date.timestamp() - time.time())
+
+    def retry_delay(self, status, headers, attempt):
+        """
+        Decide if throttled request should be retried
+
+        :param int status: response status code
+
+        :param headers: response headers
+
+        :param int attempt: number of already made retries
+
+        :rtype: Optional[float]
+
+        :return: seconds to wait before retry or None if the request should not be retried
+        """
+        if status not in (403, 429) or attempt >= self.max_retries:
+            return None
+
+        retry_after = self._retry_after(headers.get('Retry-After'))
+        if retry_after is not None:
+            wait = retry_after
+        elif headers.get('X-RateLimit-Remaining') == '0' and headers.get('X-RateLimit-Reset') is not None:
+            wait = max(0.0, int(headers['X-RateLimit-Reset']) - time.time())
+        elif status == 429 or headers.get('Retry-After') is not None:
+            # throttled without usable Retry-After or reset time
+            wait = self.backoff * 2 ** attempt
+        else:
+            # 403 without rate limit signs is a permission problem
+            return None
+
+        if wait > self.max_wait:
+            return None
+        with self._lock:
+            self.retries += 1
+            self.waited += wait
+        return wait
+
+    def merge(self, other):
+        """
+        Add requests of other rate limit of the same token, i.e. of worker process,
+        the budget is taken from the later response
+
+        :param RateLimit other: rate limit of the same token and resource
+        """
+        with self._lock:
+            self.requests += other.requests
+            self.retries += other.retries
+            self.waited += other.waited
+            # the budget only decreases until the reset
+            if other.remaining is not None and (
+                    self.remaining is None or (other.reset or 0, -other.remaining) > (self.reset or 0, -self.remaining)):
+                self.limit, self.remaining, self.reset = other.limit, other.remaining, other.reset
+
+    def reset_counts(self):
+        """
+        Start counting requests, retries and waiting from zero, the budget is kept
+        """
+        with self._lock:
+            self.requests = 0
+            self.retries = 0
+            self.waited = 0.0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def summary(self):
+        """
+        Human readable summary of the budget
+
+        :rtype: str
+        """
+        budget = 'unknown'
+        if self.remaining is not None:
+            budget = f'{self.remaining}/{self.limit} remaining'
+            if self.reset is not None:
+                budget += ', resets at ' + time.strftime('%H:%M:%S', time.localtime(self.reset))
+        return f'{budget}, {self.requests} requests, {self.retries} retries, {self.waited:.1f}s waited'
+
+
+class TokenPool:
+    """
+    Pool of GitHub tokens with their rate limits.
+
+    GitHub counts requests of every token separately by resource (``X-RateLimit-Resource``),
+    i.e. REST API (core) and GraphQL API have their own budgets, so every token has a rate
+    limit per resource. Every request is sent with the token that has the most remaining budget
+    of the resource (tokens not used yet come first), so the budget of all the tokens is spent
+    evenly. When a token runs out, the throttled request is retried with another one right away
+    instead of waiting for reset.
+    """
+    CORE = 'core'
+
+    def __init__(self, tokens, **options):
+        """
+        Initilizer for TokenPool class.
+
+        :param list[str] tokens: GitHub tokens
+
+        :param options: options of RateLimit of every token and resource
+        """
+        if isinstance(tokens, str):
+            tokens = [tokens]
+        if not tokens:
+            raise ValueError('At least one token is required')
+        self.tokens = list(tokens)
+        self.options = options
+        self.limits = {(token, self.CORE): RateLimit(**options) for token in self.tokens}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def resource(cls, url):
+        """
+        Resource of request url, used until the response tells it
+
+        :param str url: request url
+
+        :rtype: str
+        """
+        return 'graphql' if parse.urlparse(url).path.endswith('/graphql') else cls.CORE
+
+    def limit(self, token, resource=CORE):
+        """
+        Rate limit of token for resource, created on first use
+
+        :param str token: GitHub token
+
+        :param str resource: rate limit resource, i.e. "core" or "graphql"
+
+        :rtype: RateLimit
+        """
+        with self._lock:
+            if (token, resource) not in self.limits:
+                self.limits[(token, resource)] = RateLimit(**self.options)
+            return self.limits[(token, resource)]
+
+    def pick(self, resource=CORE):
+        """
+        Pick token for the next request
+
+        :param str resource: rate limit resource of the request
+
+        :rtype: tuple(str, RateLimit)
+
+        :return: token with the most remaining budget of the resource and its rate limit
+        """
+        return max(
+            ((token, self.limit(token, resource)) for token in self.tokens),
+            key=lambda item: float('inf') if item[1].remaining is None else item[1].remaining
+        )
+
+    def update(self, token, resource, headers):
+        """
+        Update rate limit of token from response headers
+
+        :param str token: GitHub token the request was sent with
+
+        :param str resource: resource of the request, ``X-RateLimit-Resource`` header takes precedence
+
+        :param headers: response headers
+
+        :rtype: RateLimit
+
+        :return: the updated rate limit
+        """
+        limit = self.limit(token, headers.get('X-RateLimit-Resource') or resource)
+        limit.update(headers)
+        return limit
+
+    @staticmethod
+    def auth_header(token):
+        """
+        Authorization header of token
+
+        :param str token: GitHub token
+
+        :rtype: dict[str, str]
+        """
+        return {'Authorization': f'token {token}'}
+
+    def retry_delay(self, limit, status, headers, attempt, resource=CORE):
+        """
+        Decide if throttled request should be retried, rotating exhausted token
+
+        :param RateLimit limit: rate limit of the token the request was sent with, as updated by the response
+
+        :param int status: response status code
+
+        :param headers: response headers
+
+        :param int attempt: number of already made retries
+
+        :param str resource: resource of the request, ``X-RateLimit-Resource`` header takes precedence
+
+        :rtype: Optional[float]
+
+        :return: seconds to wait before retry or None if the request should not be retried
+        """
+        if status in (403, 429) and limit.remaining == 0 and attempt < limit.max_retries:
+            other = self.pick(headers.get('X-RateLimit-Resource') or resource)[1]
+            if other is not limit and other.remaining != 0:
+                with limit._lock:
+                    limit.retries += 1
+                return 0.0
+        return limit.retry_delay(status, headers, attempt)
+
+    def _limits(self):
+        """
+        Snapshot of the rate limits, they are added by other threads
+
+        :rtype: dict[tuple(str, str), RateLimit]
+        """
+        with self._lock:
+            return dict(self.limits)
+
+    @property
+    def remaining(self):
+        """
+        Remaining REST API (core) budget of all the tokens
+
+        :rtype: Optional[int]
+        """
+        known = [limit.remaining for (_, resource), limit in self._limits().items()
+                 if resource == self.CORE and limit.remaining is not None]
+        return sum(known) if known else None
+
+    @property
+    def requests(self):
+        """
+        Number of requests sent with all the tokens
+
+        :rtype: int
+        """
+        return sum(limit.requests for limit in self._limits().values())
+
+    @property
+    def retries(self):
+        """
+        Number of retried requests of all the tokens
+
+        :rtype: int
+        """
+        return sum(limit.retries for limit in self._limits().values())
+
+    def merge(self, other):
+        """
+        Add requests of other pool of the same tokens, i.e. of worker process
+
+        :param TokenPool other: pool with the same tokens
+        """
+        for (token, resource), limit in other._limits().items():
+            self.limit(token, resource).merge(limit)
+
+    def reset_counts(self):
+        """
+        Start counting requests, retries and waiting of every token from zero, the budgets are kept
+        """
+        for limit in self._limits().values():
+            limit.reset_counts()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def summary(self):
+        """
+        Human readable summary of the budget of every token and resource
+
+        :rtype: str
+        """
+        limits = self._limits()
+        resources = sorted({resource for _, resource in limits}, key=lambda resource: (resource != self.CORE, resource))
+        parts = []
+        for num, token in enumerate(self.tokens, start=1):
+            for resource in resources:
+                if (token, resource) not in limits:
+                    continue
+                label = ' '.join(filter(None, [
+                    f'token {num}' if len(self.tokens) > 1 else None,
+                    resource if len(resources) > 1 else None,
+                ]))
+                summary = limits[(token, resource)].summary()
+                parts.append(f'{label}: {summary}' if label else summary)
+        return '; '.join(parts)
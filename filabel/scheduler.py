@@ -0,0 +1,168 @@
+import time
+
+
+class ConcurrencyLimit:
+    """
+    Limit of simultaneous tasks, optionally adapted AIMD-style (additive increase, multiplicative decrease).
+
+    The limit grows by one per window of successful tasks and it is halved when a task
+    is throttled (403/429) or slower than the latency target. Only tasks started after
+    the last decrease can decrease it again, so one burst of failures halves it once.
+    """
+    THROTTLED = (403, 429)
+
+    def __init__(self, limit, adaptive=False, min_limit=1, latency_target=2.0):
+        """
+        Initilizer for ConcurrencyLimit class.
+
+        :param int limit: max number of simultaneous tasks
+
+        :param bool adaptive: if the limit should adapt to observed latency and throttling
+
+        :param int min_limit: the adapted limit never drops below
+
+        :param float latency_target: seconds, slower tasks decrease the adapted limit
+        """
+        self.max_limit = limit
+        self.limit = float(limit)
+        self.adaptive = adaptive
+        self.min_limit = min_limit
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self._condition = None
+        self._loop = None
+        self._last_decrease = 0.0
+
+    def _get_condition(self):
+        """
+        Condition of the running event loop, created on first use in the loop
+        """
+        import asyncio
+        loop = asyncio.get_event_loop()
+        if self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._loop = loop
+        return self._condition
+
+    async def acquire(self):
+        """
+        Wait until a task can start
+
+        :rtype: float
+
+        :return: monotonic time the task started
+        """
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < max(self.min_limit, int(self.limit)))
+            self.in_flight += 1
+        return time.monotonic()
+
+    async def release(self, started, status=None):
+        """
+        Finish the task and adapt the limit by its outcome
+
+        :param float started: monotonic time the task started
+
+        :param Optional[int] status: HTTP status of the task if any
+        """
+        self.feedback(started, time.monotonic() - started, status)
+        condition = self._get_condition()
+        async with condition:
+            self.in_flight -= 1
+            condition.notify_all()
+
+    def feedback(self, started, latency, status=None):
+        """
+        Adapt the limit by outcome of single task
+
+        :param float started: monotonic time the task started
+
+        :param float latency: seconds the task took
+
+        :param Optional[int] status: HTTP status of the task if any
+        """
+        if not self.adaptive:
+            return
+        if status in self.THROTTLED or latency > self.latency_target:
+            if started >= self._last_decrease:
+                self.limit = max(self.min_limit, self.limit / 2)
+                self._last_decrease = time.monotonic()
+        elif status is None or status < 400:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def slot(self):
+        """
+        Async context manager holding one slot of the limit
+
+        :rtype: Slot
+        """
+        return Slot(self)
+
+
+class Slot:
+    """
+    Async context manager for one task of ConcurrencyLimit.
+
+    The HTTP status is taken from ``status`` attribute set by the task or from the raised error.
+    """
+    def __init__(self, limit):
+        """
+        Initilizer for Slot class.
+
+        :param ConcurrencyLimit limit: limit the slot belongs to
+        """
+        self.limit = limit
+        self.status = None
+        self.started = None
+
+    async def __aenter__(self):
+        self.started = await self.limit.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        status = getattr(exc, 'status', None) if exc is not None else self.status
+        await self.limit.release(self.started, status)
+        return False
+
+
+class ConcurrencyScheduler:
+    """
+    Scheduler of async GitHub communication with global limit of in-flight requests
+    and per-repo limit of PRs processed at once.
+    """
+    def __init__(self, max_requests=50, max_repo_prs=10, adaptive=False, latency_target=2.0):
+        """
+        Initilizer for ConcurrencyScheduler class.
+
+        :param int max_requests: max number of in-flight requests
+
+        :param int max_repo_prs: max number of PRs of single repo processed at once
+
+        :param bool adaptive: if the request limit should adapt to latency and throttling
+
+        :param float latency_target: seconds, slower requests decrease the adapted limit
+        """
+        self.requests = ConcurrencyLimit(max_requests, adaptive=adaptive, latency_target=latency_target)
+        self.max_repo_prs = max_repo_prs
+        self.repos = {}
+
+    def request(self):
+        """
+        Async context manager holding one global request slot
+
+        :rtype: Slot
+        """
+        return self.requests.slot()
+
+    def repo(self, reposlug):
+        """
+        Async context manager holding one PR slot of given repo
+
+        :param str reposlug: Reposlug (full name) of GitHub repo (i.e. "owner/name")
+
+        :rtype: Slot
+        """
+        if reposlug not in self.repos:
+            self.repos[reposlug] = ConcurrencyLimit(self.max_repo_prs)
+        return self.repos[reposlug].slot()
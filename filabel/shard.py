@@ -0,0 +1,181 @@
+import collections
+import concurrent.futures
+import itertools
+import multiprocessing.util
+import sys
+
+from filabel.cache import ResponseCache
+from filabel.logic import Filabel
+from filabel.metrics import Metrics
+from filabel.ratelimit import TokenPool
+from filabel.scheduler import ConcurrencyScheduler
+from filabel.state import StateStore
+
+
+# Filabel of the worker process, created by the pool initializer
+_filabel = None
+
+# repos handed to worker at once in async mode, so they share its event loop and scheduler
+ASYNC_BATCH_SIZE = 10
+
+
+def create_filabel(token, labels, state='open', base=None, delete_old=True, async_run=False, max_requests=50,
+                   max_repo_prs=10, adaptive=False, response_cache=None, per_page=None, graphql=False,
+                   state_db=None, api_url=None, tracer=None, ratelimit_share=1.0):
+    """
+    Create Filabel from plain options, so it can be created the same way in every worker process
+
+    :param Union[str, list[str]] token: GitHub token or tokens
+
+    :param dict[str, list[str]] labels: Configuration of labels with globs
+
+    :param str state: State of PR to be (re)labeled
+
+    :param str base: Base branch of PRs to be (re)labeled
+
+    :param bool delete_old: If no longer matching labels should be deleted
+
+    :param bool async_run: If asyncio should be used
+
+    :param int max_requests: max number of in-flight requests with async run
+
+    :param int max_repo_prs: max number of PRs of single repo processed at once with async run
+
+    :param bool adaptive: if the request limit should adapt to latency and throttling
+
+    :param Optional[str] response_cache: path to SQLite file caching GitHub responses
+
+    :param Optional[int] per_page: page size of paginated GitHub requests
+
+    :param bool graphql: If PRs should be fetched by GitHub GraphQL API
+
+    :param Optional[str] state_db: path to SQLite file remembering labeled PRs
+
+    :param Optional[str] api_url: url of GitHub API, api.github.com if None
+
+    :param Optional[Tracer] tracer: tracer of repos, PRs and HTTP requests
+
+    :param float ratelimit_share: fraction of the remaining budget of the tokens paced by this process
+
+    :rtype: Filabel
+    """
+    if response_cache is not None:
+        response_cache = ResponseCache(response_cache)
+
+    state_store = None
+    if state_db is not None:
+        state_store = StateStore(state_db)
+
+    scheduler = ConcurrencyScheduler(max_requests, max_repo_prs, adaptive)
+
+    return Filabel(token, labels, state, base, delete_old, async_run, response_cache=response_cache,
+                   per_page=per_page, scheduler=scheduler, graphql=graphql, state_store=state_store,
+                   api_url=api_url, tracer=tracer, ratelimit=TokenPool(token, share=ratelimit_share))
+
+
+def _close_worker():
+    """
+    Close Filabel of the worker process with its sessions, event loop and SQLite connections
+    """
+    global _filabel
+    if _filabel is not None:
+        _filabel.close()
+        if _filabel.github.cache is not None:
+            _filabel.github.cache.close()
+        _filabel = None
+
+
+def _init_worker(options):
+    """
+    Create Filabel of the worker process, it is closed when the process exits
+
+    :param dict options: options of :py:func:`create_filabel`
+    """
+    global _filabel
+    if _filabel is not None:
+        return
+    _filabel = create_filabel(**options)
+    # atexit hooks are not run by forked pool processes, multiprocessing finalizers are
+    multiprocessing.util.Finalize(None, _close_worker, exitpriority=10)
+
+
+def _run_repos(options, reposlugs):
+    """
+    Label PRs of batch of repos in worker process, with its own GitHub client and event loop
+
+    :param dict options: options of :py:func:`create_filabel`
+
+    :param list[str] reposlugs: Reposlugs (full names) of GitHub repos (i.e. "owner/name")
+
+    :rtype: tuple(list[Report], Metrics, TokenPool, int)
+
+    :return: reports in the order of reposlugs, GitHub requests made for the repos,
+             rate limits of the tokens with the requests counted for the repos and number of skipped PRs
+    """
+    # Python 3.6 pool has no initializer
+    _init_worker(options)
+    # requests of every batch are sent back to be merged in the parent process,
+    # the budgets are kept for pacing of the next batches
+    _filabel.github.metrics = Metrics()
+    _filabel.github.ratelimit.reset_counts()
+    if _filabel.state_store is not None:
+        _filabel.state_store.skipped = 0
+    reports = _filabel.run_repos(reposlugs)
+    skipped = _filabel.state_store.skipped if _filabel.state_store is not None else 0
+    return reports, _filabel.github.metrics, _filabel.github.ratelimit, skipped
+
+
+def iter_sharded_reports(reposlugs, workers, metrics=None, batch_size=None, ratelimit=None, state_store=None,
+                         **options):
+    """
+    Label PRs of given repos sharded across pool of processes, so JSON parsing and matching
+    of different repos run on different cores. The workers send requests with the same tokens,
+    so every worker paces its share of their remaining budget.
+
+    :param Iterable[str] reposlugs: reposlugs, [{user}/{repo}], repos are submitted as they are iterated
+
+    :param int workers: number of worker processes
+
+    :param Optional[Metrics] metrics: registry the requests made by the workers are merged to
+
+    :param Optional[int] batch_size: number of repos labeled by worker at once,
+                                     :py:data:`ASYNC_BATCH_SIZE` in async mode and 1 otherwise if None
+
+    :param Optional[TokenPool] ratelimit: pool of the same tokens the rate limits of the workers are merged to
+
+    :param Optional[StateStore] state_store: state store the PRs skipped by the workers are counted to
+
+    :param options: options of :py:func:`create_filabel`
+
+    :rtype: Iterator[Report]
+
+    :return: generator of reports in the order of reposlugs
+    """
+    if batch_size is None:
+        batch_size = ASYNC_BATCH_SIZE if options.get('async_run') else 1
+
+    options = dict(options, ratelimit_share=options.get('ratelimit_share', 1.0) / workers)
+
+    def results(future):
+        reports, batch_metrics, batch_ratelimit, skipped = future.result()
+        if metrics is not None:
+            metrics.merge(batch_metrics)
+        if ratelimit is not None:
+            ratelimit.merge(batch_ratelimit)
+        if state_store is not None:
+            state_store.skipped += skipped
+        return reports
+
+    pool_options = {}
+    if sys.version_info >= (3, 7):
+        pool_options = dict(initializer=_init_worker, initargs=(options,))
+
+    reposlugs = iter(reposlugs)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, **pool_options) as executor:
+        futures = collections.deque()
+        for batch in iter(lambda: list(itertools.islice(reposlugs, batch_size)), []):
+            futures.append(executor.submit(_run_repos, options, batch))
+            while futures and futures[0].done():
+                yield from results(futures.popleft())
+        while futures:
+            yield from results(futures.popleft())
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import threading
+
+from filabel.utils import connect_sqlite
+
+
+class StateStore:
+    """
+    Persistent state of labeled PRs stored in SQLite file.
+
+    Every successfully labeled PR is remembered by its fingerprint: head SHA, the labels it was left with
+    and hash of the label configuration. A PR with the same fingerprint on the next run has the same files
+    and labels, so it is skipped before its files are requested.
+    """
+    def __init__(self, path):
+        """
+        Initilizer for StateStore class.
+
+        :param str path: path to SQLite database file, created if missing
+        """
+        self.path = path
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._connection = connect_sqlite(path)
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS prs ('
+                'key TEXT PRIMARY KEY, head_sha TEXT, labels TEXT, config_hash TEXT, matching TEXT)'
+            )
+
+    @staticmethod
+    def key(owner, repo, number):
+        """
+        State key of PR
+
+        :param str owner: Owner of GitHub repository
+
+        :param str repo: Name of GitHub repository
+
+        :param int number: ID of the PR
+
+        :rtype: str
+        """
+        return f'{owner}/{repo}#{number}'
+
+    @staticmethod
+    def config_hash(labels, delete_old):
+        """
+        Hash of label configuration, any change of it invalidates the fingerprints
+
+        :param Mapping[str, Sequence[str]] labels: Configuration of labels with globs
+
+        :param bool delete_old: If no longer matching labels are deleted
+
+        :rtype: str
+        """
+        config = json.dumps({'labels': dict(labels), 'delete_old': delete_old}, sort_keys=True)
+        return hashlib.sha256(config.encode()).hexdigest()
+
+    @staticmethod
+    def _head_sha(pr_dict):
+        """
+        Head SHA of PR as dict from GitHub API
+
+        :rtype: Optional[str]
+        """
+        return (pr_dict.get('head') or {}).get('sha')
+
+    def unchanged(self, owner, repo, pr_dict, config_hash):
+        """
+        Check if PR has not changed since its last successful labeling
+
+        :param str owner: Owner of GitHub repository
+
+        :param str repo: Name of GitHub repository
+
+        :param dict pr_dict: PR as dict from GitHub API
+
+        :param str config_hash: hash of current label configuration
+
+        :rtype: Optional[set[str]]
+
+        :return: labels matching the PR files last time or None if the PR has to be labeled
+        """
+        head_sha = self._head_sha(pr_dict)
+        if head_sha is None:
+            return None
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT head_sha, labels, config_hash, matching FROM prs WHERE key = ?',
+                (self.key(owner, repo, pr_dict['number']),)
+            ).fetchone()
+        labels = sorted(l['name'] for l in pr_dict['labels'])
+        if row is None or tuple(row[:3]) != (head_sha, json.dumps(labels), config_hash):
+            return None
+        with self._lock:
+            self.skipped += 1
+        return set(json.loads(row[3]))
+
+    def store(self, owner, repo, pr_dict, labels, matching, config_hash):
+        """
+        Remember fingerprint of successfully labeled PR
+
+        :param str owner: Owner of GitHub repository
+
+        :param str repo: Name of GitHub repository
+
+        :param dict pr_dict: PR as dict from GitHub API
+
+        :param set[str] labels: labels the PR was left with
+
+        :param set[str] matching: labels matching the PR files
+
+        :param str config_hash: hash of current label configuration
+        """
+        head_sha = self._head_sha(pr_dict)
+        if head_sha is None:
+            return
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO prs VALUES (?, ?, ?, ?, ?)',
+                (self.key(owner, repo, pr_dict['number']), head_sha, json.dumps(sorted(labels)), config_hash,
+                 json.dumps(sorted(matching)))
+            )
+
+    def close(self):
+        """
+        Close the database connection
+        """
+        self._connection.close()
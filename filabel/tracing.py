@@ -0,0 +1,280 @@
+import functools
+import itertools
+import json
+import threading
+import time
+from urllib import parse
+
+from filabel.metrics import endpoint
+
+try:
+    import contextvars
+except ImportError:  # Python 3.6, spans are recorded without their parents
+    contextvars = None
+
+
+_current = contextvars.ContextVar('filabel_span', default=None) if contextvars else None
+
+
+class Span:
+    """
+    Traced phase of the run, i.e. labeling of repo, PR or single HTTP request.
+
+    Span is the context manager calling hooks of its tracer, the current span becomes its parent.
+    The current span is kept in context variable, so it is inherited by asyncio tasks.
+    """
+    def __init__(self, tracer, name, attributes):
+        """
+        Initilizer for Span class.
+
+        :param Tracer tracer: tracer the hooks are called on
+
+        :param str name: name of the phase, i.e. "repo", "pr" or "http"
+
+        :param dict attributes: attributes of the span, i.e. repo, PR number, page or status
+        """
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.span_id = next(tracer._ids)
+        self.parent = None
+        self.thread = None
+        self.start = None
+        self.end = None
+        self._previous = None
+
+    @property
+    def parent_id(self):
+        """
+        Id of parent span
+
+        :rtype: Optional[int]
+        """
+        return self.parent.span_id if self.parent is not None else None
+
+    @property
+    def duration(self):
+        """
+        Seconds the span took, None if it has not ended
+
+        :rtype: Optional[float]
+        """
+        return None if self.end is None else self.end - self.start
+
+    def set(self, **attributes):
+        """
+        Add attributes known during the span, i.e. response status
+        """
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        if _current is not None:
+            self.parent = _current.get()
+            self._previous = _current.set(self)
+        self.thread = threading.get_ident()
+        self.start = time.time()
+        self.tracer.start(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.end = time.time()
+        if exc_type is not None:
+            self.attributes.setdefault('error', exc_type.__name__)
+            # status of failed HTTP request
+            if getattr(exc_value, 'status', None) is not None:
+                self.attributes.setdefault('status', exc_value.status)
+        if _current is not None:
+            try:
+                _current.reset(self._previous)
+            except ValueError:
+                # generator closed in other context than it was started in
+                _current.set(self.parent)
+        self.tracer.end(self)
+        return False
+
+
+class _NoSpan:
+    """
+    Span of no tracer, all the calls do nothing
+    """
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NO_SPAN = _NoSpan()
+
+
+class Tracer:
+    """
+    Hook interface called by Filabel and GitHub at start and end of every span.
+
+    Spans are made for every repo, every PR with its phases (files, matching, labels)
+    and every HTTP request. This tracer does nothing, subclasses override :py:meth:`start`
+    and :py:meth:`end`.
+    """
+    def __init__(self):
+        """
+        Initilizer for Tracer class.
+        """
+        self._ids = itertools.count(1)
+
+    def span(self, name, **attributes):
+        """
+        New span to be entered as context manager
+
+        :param str name: name of the phase
+
+        :param attributes: attributes of the span
+
+        :rtype: Span
+        """
+        return Span(self, name, attributes)
+
+    def start(self, span):
+        """
+        Hook called when span starts
+
+        :param Span span: started span
+        """
+        pass
+
+    def end(self, span):
+        """
+        Hook called when span ends
+
+        :param Span span: ended span
+        """
+        pass
+
+    def close(self):
+        """
+        Release resources of the tracer
+        """
+        pass
+
+
+class JsonTracer(Tracer):
+    """
+    Tracer writing ended spans as JSON Lines, one object per span with its id, parent id,
+    thread, start and end timestamps and attributes, so the run can be analyzed offline
+    i.e. as a flamegraph built from the parent links.
+    """
+    def __init__(self, stream, buffer_size=65536):
+        """
+        Initilizer for JsonTracer class.
+
+        :param stream: text stream the spans are written to
+
+        :param int buffer_size: number of characters written at once
+        """
+        super().__init__()
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self._buffer = []
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def record(span):
+        """
+        Record of ended span
+
+        :param Span span: ended span
+
+        :rtype: dict
+        """
+        return {
+            'name': span.name,
+            'id': span.span_id,
+            'parent': span.parent_id,
+            'thread': span.thread,
+            'start': round(span.start, 6),
+            'end': round(span.end, 6),
+            'duration': round(span.duration, 6),
+            'attributes': span.attributes,
+        }
+
+    def end(self, span):
+        line = json.dumps(self.record(span), separators=(',', ':'), default=str) + '\n'
+        with self._lock:
+            self._buffer.append(line)
+            self._size += len(line)
+            if self._size >= self.buffer_size:
+                self._flush()
+
+    def _flush(self):
+        self.stream.write(''.join(self._buffer))
+        self.stream.flush()
+        self._buffer = []
+        self._size = 0
+
+    def flush(self):
+        """
+        Write the buffered spans to the stream
+        """
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        """
+        Write the buffered spans and close the stream
+        """
+        self.flush()
+        self.stream.close()
+
+
+def span(tracer, name, **attributes):
+    """
+    Span of given tracer, does nothing if there is no tracer
+
+    :param Optional[Tracer] tracer: tracer of the run
+
+    :param str name: name of the phase
+
+    :param attributes: attributes of the span
+
+    :rtype: Union[Span, _NoSpan]
+    """
+    if tracer is None:
+        return NO_SPAN
+    return tracer.span(name, **attributes)
+
+
+def request_span(tracer, method, url, params=None):
+    """
+    Span of single HTTP request with its method, endpoint, url and page
+
+    :param Optional[Tracer] tracer: tracer of the run
+
+    :param str method: HTTP method
+
+    :param str url: request url
+
+    :param Optinal[dict[str, str] params: request parameters
+
+    :rtype: Union[Span, _NoSpan]
+    """
+    if tracer is None:
+        return NO_SPAN
+    page = (params or {}).get('page') or parse.parse_qs(parse.urlparse(url).query).get('page', [1])[0]
+    return tracer.span('http', method=method.upper(), endpoint=endpoint(url), url=url, page=int(page))
+
+
+def wrap_context(func):
+    """
+    Function running in copy of the current context, so spans started by it in thread pool
+    get the current span as their parent. Every call must be wrapped on its own.
+
+    :param Callable func: function to be run in other thread
+
+    :rtype: Callable
+    """
+    if contextvars is None:
+        return func
+    return functools.partial(contextvars.copy_context().run, func)
@@ -1,3 +1,10 @@
+import sqlite3
+
+
+# seconds a connection waits for other process writing to the same SQLite file
+SQLITE_TIMEOUT = 30.0
+
+
 
 
 def parse_labels(cfg):
@@ -13,3 +20,19 @@ def parse_labels(cfg):
         label: list(filter(None, cfg['labels'][label].splitlines()))
         for label in cfg['labels']
     }
+
+
+def connect_sqlite(path):
+    """
+    Connect to SQLite file shared by threads and by worker processes of sharded run.
+
+    Write-ahead log lets readers go on while other process writes and the busy timeout makes
+    concurrent writers wait for each other instead of failing with "database is locked".
+
+    :param str path: path to SQLite database file, created if missing
+
+    :rtype: sqlite3.Connection
+    """
+    connection = sqlite3.connect(path, timeout=SQLITE_TIMEOUT, check_same_thread=False)
+    connection.execute('PRAGMA journal_mode=WAL')
+    return connection
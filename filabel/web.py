@@ -7,6 +7,7 @@ import os
 
 from filabel.logic import Filabel
 from filabel.utils import parse_labels
+from filabel.worker import WorkerPool
 
 
 def webhook_verify_signature(payload, signature, secret, encoding='utf-8'):
@@ -26,11 +27,11 @@ def webhook_verify_signature(payload, signature, secret, encoding='utf-8'):
 
 def process_webhook_pr(payload):
     """
-    Process webhook event "pull_request"
+    Process webhook event "pull_request", the PR is labeled in background
 
     :param dict payload: event payload
     """
-    filabel = flask.current_app.config['filabel']
+    workers = flask.current_app.config['workers']
     try:
         action = payload['action']
         pull_request = payload['pull_request']
@@ -46,22 +47,20 @@ def process_webhook_pr(payload):
             )
             return 'Accepted but action not processed', 202
 
-        filabel.run_pr(owner, repo, pull_request)
-
-        flask.current_app.logger.info(
-            f'Action {action} from {reposlug}#{pr_number} processed'
-        )
-        return 'PR successfully filabeled', 200
-    except (KeyError, IndexError):
+        if 'labels' not in pull_request:
+            raise KeyError('labels')
+    except (KeyError, IndexError, TypeError):
         flask.current_app.logger.info(
             f'Incorrect data entity from IP {flask.request.remote_addr}'
         )
         flask.abort(422, 'Missing required payload fields')
-    except Exception:
-        flask.current_app.logger.error(
-            f'Error occurred while processing {repo}#{pr_number}'
-        )
-        flask.abort(500, 'Processing PR error')
+
+    workers.submit(owner, repo, pull_request)
+
+    flask.current_app.logger.info(
+        f'Action {action} from {reposlug}#{pr_number} queued'
+    )
+    return 'PR queued for filabeling', 202
 
 
 def process_webhook_ping(payload):
@@ -112,21 +111,35 @@ def create_app(github=None, *args, **kwargs):
         exit(1)
 
     try:
-        app.config['github_token'] = cfg.get('github', 'token')
+        app.config['github_token'] = cfg.get('github', 'token').split()
+        if not app.config['github_token']:
+            raise ValueError('No token')
         app.config['secret'] = cfg.get('github', 'secret', fallback=None)
     except Exception:
         app.logger.critical('Auth configuration not usable!', err=True)
         exit(1)
 
+    try:
+        workers = cfg.getint('webhook', 'workers', fallback=4)
+        debounce = cfg.getfloat('webhook', 'debounce', fallback=0.0)
+        if workers < 1 or debounce < 0:
+            raise ValueError('Workers must be positive and debounce non-negative')
+    except ValueError:
+        app.logger.critical('Webhook configuration not usable: workers must be positive integer '
+                            'and debounce non-negative number of seconds!')
+        exit(1)
+
     filabel = Filabel(app.config['github_token'], app.config['labels'], github=github)
 
     try:
         app.config['github_user'] = filabel.github.user()
-        app.config['filabel'] = filabel
     except Exception:
         app.logger.critical('Bad token: could not get GitHub user!', err=True)
         exit(1)
 
+    app.config['filabel'] = filabel
+    app.config['workers'] = WorkerPool(filabel, workers, app.logger, debounce)
+
     @app.template_filter('github_user_link')
     def github_user_link_filter(github_user):
         """
@@ -146,9 +159,26 @@ def create_app(github=None, *args, **kwargs):
         return flask.render_template(
             'infopage.html',
             labels=flask.current_app.config['labels'],
-            user=flask.current_app.config['github_user']
+            user=flask.current_app.config['github_user'],
+            cache=flask.current_app.config['filabel'].cache_info(),
+            queue=flask.current_app.config['workers'].stats()
         )
 
+    @app.route('/queue', methods=['GET'])
+    def queue():
+        """
+        Statistics of webhook processing queue
+        """
+        return flask.jsonify(flask.current_app.config['workers'].stats())
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """
+        Metrics of GitHub requests in Prometheus text format
+        """
+        return flask.Response(flask.current_app.config['filabel'].github.metrics.render(),
+                              mimetype='text/plain; version=0.0.4')
+
     @app.route('/', methods=['POST'])
     def webhook_listener():
         """
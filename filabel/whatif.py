@@ -0,0 +1,326 @@
+import click
+import collections
+import concurrent.futures
+import gzip
+import itertools
+import json
+import os
+
+from filabel.cli import JsonLinesWriter, check_reposlugs, get_labels, get_token, print_pr_result, print_repo_result
+from filabel.logic import Change, Filabel, GitHub, PRResult, RepoResult, SyncPagination
+
+
+SNAPSHOT_VERSION = 1
+
+WhatIfSummary = collections.namedtuple(
+    'WhatIfSummary', ['prs', 'relabeled', 'added', 'deleted', 'failed_prs', 'failed_repos']
+)
+
+# Filabel of the worker process with its labels configuration and delete_old flag
+_filabel = None
+_filabel_config = None
+
+
+def write_snapshot(github, reposlugs, stream, state='open', base=None, jobs=8):
+    """
+    Write PRs of given repos with their labels and changed files to snapshot, gzipped JSON Lines
+    with header and one compact record per PR. Repos and PRs that could not be fetched are recorded
+    without files, so the snapshot tells it is incomplete.
+
+    :param GitHub github: GitHub API wrapper the PRs are fetched with
+
+    :param Iterable[str] reposlugs: reposlugs, [{user}/{repo}]
+
+    :param stream: binary stream the snapshot is written to
+
+    :param str state: State of PRs
+
+    :param str base: Base branch of PRs
+
+    :param int jobs: number of threads fetching files of PRs
+
+    :rtype: Iterator[Union[RepoResult, PRResult]]
+
+    :return: generator of results of repos and their PRs as they are written, PRs have no changes
+             or None if their files could not be fetched
+    """
+    def filenames(owner, repo, pr_dict):
+        return list(github.pr_filenames(owner, repo, pr_dict['number']))
+
+    with gzip.GzipFile(fileobj=stream, mode='wb') as snapshot, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        header = {'filabel-snapshot': SNAPSHOT_VERSION, 'state': state, 'base': base}
+        snapshot.write(json.dumps(header).encode() + b'\n')
+
+        for reposlug in reposlugs:
+            owner, repo = reposlug.split('/')
+            try:
+                prs = github.pull_requests(owner, repo, state, base)
+            except Exception:
+                record = {'repo': reposlug, 'number': None, 'files': None}
+                snapshot.write(json.dumps(record, separators=(',', ':')).encode() + b'\n')
+                yield RepoResult(reposlug, False)
+                continue
+            yield RepoResult(reposlug, True)
+
+            futures = [executor.submit(filenames, owner, repo, pr_dict) for pr_dict in prs]
+            for pr_dict, future in zip(prs, futures):
+                url = pr_dict.get('html_url', 'unknown')
+                try:
+                    files = future.result()
+                except Exception:
+                    files = None
+                record = {
+                    'repo': reposlug,
+                    'number': pr_dict['number'],
+                    'url': url,
+                    'labels': [label['name'] for label in pr_dict['labels']],
+                    'files': files,
+                }
+                snapshot.write(json.dumps(record, separators=(',', ':')).encode() + b'\n')
+                yield PRResult(reposlug, url, None if files is None else [], None)
+
+
+def iter_snapshot_chunks(path, chunk_size=2000):
+    """
+    Read records of snapshot in chunks of raw lines, so they are parsed by the workers
+
+    :raise ValueError: if the file is not a snapshot
+
+    :param str path: path to snapshot file
+
+    :param int chunk_size: number of PRs in one chunk
+
+    :rtype: Iterator[list[bytes]]
+    """
+    with gzip.open(path, 'rb') as snapshot:
+        try:
+            header = json.loads(snapshot.readline())
+        except (OSError, ValueError):
+            header = None
+        if not isinstance(header, dict) or header.get('filabel-snapshot') != SNAPSHOT_VERSION:
+            raise ValueError(f'{path} is not a filabel snapshot')
+
+        while True:
+            chunk = list(itertools.islice(snapshot, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def _worker_filabel(labels, delete_old):
+    """
+    Filabel of the worker process for given configuration, created once per configuration
+
+    :rtype: Filabel
+    """
+    global _filabel, _filabel_config
+    config = (labels, delete_old)
+    if _filabel is None or _filabel_config != config:
+        _filabel = Filabel('<OFFLINE>', labels, delete_old=delete_old)
+        _filabel_config = config
+    return _filabel
+
+
+def evaluate_chunk(labels, delete_old, lines):
+    """
+    Compute label changes of PRs in chunk of snapshot records with given configuration
+
+    :param dict[str, list[str]] labels: Configuration of labels with globs
+
+    :param bool delete_old: If no longer matching labels should be deleted
+
+    :param list[bytes] lines: raw records of the snapshot
+
+    :rtype: tuple(int, list[Union[RepoResult, PRResult]])
+
+    :return: number of evaluated PRs in the chunk and results of PRs that would be relabeled,
+             together with failed results of repos and PRs missing in the snapshot
+    """
+    fl = _worker_filabel(labels, delete_old)
+    prs = 0
+    results = []
+    for line in lines:
+        record = json.loads(line)
+        if record['files'] is None:
+            if record['number'] is None:
+                results.append(RepoResult(record['repo'], False))
+            else:
+                results.append(PRResult(record['repo'], record['url'], None, None))
+            continue
+        prs += 1
+        plan = fl.plan_labels(record['files'], record['labels'])
+        if plan.added or plan.deleted:
+            results.append(PRResult(record['repo'], record['url'], plan.changes, None))
+    return prs, results
+
+
+def iter_what_if(path, labels, delete_old=True, workers=None, chunk_size=2000):
+    """
+    Evaluate labels configuration against snapshot without any request, chunks of PRs
+    are matched across pool of processes
+
+    :param str path: path to snapshot file
+
+    :param dict[str, list[str]] labels: Configuration of labels with globs
+
+    :param bool delete_old: If no longer matching labels should be deleted
+
+    :param Optional[int] workers: number of processes, all cores if None, 1 evaluates in this process
+
+    :param int chunk_size: number of PRs evaluated at once by a worker
+
+    :rtype: Iterator[tuple(int, list[Union[RepoResult, PRResult]])]
+
+    :return: generator of number of evaluated PRs and results of relabeled and failed PRs for every chunk,
+             in the snapshot order
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = iter_snapshot_chunks(path, chunk_size)
+    if workers == 1:
+        for chunk in chunks:
+            yield evaluate_chunk(labels, delete_old, chunk)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = collections.deque()
+        for chunk in chunks:
+            futures.append(executor.submit(evaluate_chunk, labels, delete_old, chunk))
+            # only a few chunks per worker are kept in memory
+            while len(futures) > 2 * workers or (futures and futures[0].done()):
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
+
+
+def what_if_summary(path, labels, delete_old=True, workers=None, chunk_size=2000, emit=None):
+    """
+    Evaluate labels configuration against snapshot and summarize the label changes
+
+    :param str path: path to snapshot file
+
+    :param dict[str, list[str]] labels: Configuration of labels with globs
+
+    :param bool delete_old: If no longer matching labels should be deleted
+
+    :param Optional[int] workers: number of processes, all cores if None
+
+    :param int chunk_size: number of PRs evaluated at once by a worker
+
+    :param Optional[Callable] emit: called with result of every relabeled PR and of every repo or PR
+                                    missing in the snapshot
+
+    :rtype: WhatIfSummary
+    """
+    prs = relabeled = added = deleted = failed_prs = failed_repos = 0
+    for count, results in iter_what_if(path, labels, delete_old, workers, chunk_size):
+        prs += count
+        for result in results:
+            if isinstance(result, RepoResult):
+                failed_repos += 1
+            elif result.changes is None:
+                failed_prs += 1
+            else:
+                relabeled += 1
+                added += sum(t == Change.ADD for _, t in result.changes)
+                deleted += sum(t == Change.DELETE for _, t in result.changes)
+            if emit is not None:
+                emit(result)
+    return WhatIfSummary(prs, relabeled, added, deleted, failed_prs, failed_repos)
+
+
+def print_result(result):
+    """
+    Print result of relabeled PR or of repo or PR missing in the snapshot to command line
+
+    :param Union[RepoResult, PRResult] result: result to be printed
+    """
+    if isinstance(result, RepoResult):
+        print_repo_result(result)
+    else:
+        print_pr_result(result)
+
+
+@click.command('snapshot')
+@click.option('-s', '--state', type=click.Choice(['open', 'closed', 'all']), default='open', show_default=True, help='Filter pulls by state.')
+@click.option('-b', '--base', type=str, metavar='BRANCH', help='Filter pulls by base (PR target) branch name.')
+@click.option('-a', '--config-auth', type=click.File('r'), help='File with authorization configuration.')
+@click.option('--per-page', type=click.IntRange(1, 100), default=100, show_default=True, help='Page size of GitHub requests.')
+@click.option('--api-url', metavar='URL', help='URL of GitHub API, i.e. https://HOST/api/v3 of GitHub Enterprise.')
+@click.option('-j', '--jobs', type=click.IntRange(1), default=8, show_default=True, help='Number of threads fetching files of PRs.')
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+@click.argument('reposlugs', nargs=-1)
+def snapshot(state, base, config_auth, per_page, api_url, jobs, path, reposlugs):
+    """
+    Save PRs of repos with their labels and changed files to snapshot file for offline what-if evaluation.
+    """
+    token = get_token(config_auth)
+    check_reposlugs(reposlugs)
+
+    github = GitHub(token, strategy=SyncPagination(), per_page=per_page, api_url=api_url)
+    written = failed_prs = failed_repos = 0
+    try:
+        with open(path, 'wb') as stream:
+            for result in write_snapshot(github, reposlugs, stream, state, base, jobs):
+                if isinstance(result, RepoResult):
+                    print_repo_result(result)
+                    failed_repos += not result.ok
+                elif result.changes is None:
+                    print_pr_result(result, '  ')
+                    failed_prs += 1
+                else:
+                    written += 1
+    finally:
+        github.close()
+
+    click.secho(f'SNAPSHOT {written} PRs saved to {path}', err=True)
+    if failed_prs or failed_repos:
+        click.secho(f'SNAPSHOT is incomplete, {failed_repos} repos and {failed_prs} PRs could not be fetched',
+                    err=True)
+
+
+@click.command('what-if')
+@click.option('-l', '--config-labels', type=click.File('r'), help='File with candidate labels configuration.')
+@click.option('-d/-D', '--delete-old/--no-delete-old', default=True, show_default=True, help='Delete labels that do not match anymore.')
+@click.option('-w', '--workers', type=click.IntRange(1), help='Number of processes, all cores by default.')
+@click.option('--chunk-size', type=click.IntRange(1), default=2000, show_default=True, help='PRs evaluated at once by a process.')
+@click.option('-o', '--output', type=click.Choice(['text', 'jsonl']), default='text', show_default=True, help='Format of the results.')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def what_if(config_labels, delete_old, workers, chunk_size, output, path):
+    """
+    Show which PRs of snapshot would be relabeled with candidate labels configuration, without any request.
+    """
+    labels = get_labels(config_labels)
+
+    writer = JsonLinesWriter() if output == 'jsonl' else None
+    emit = writer.write if writer is not None else print_result
+    try:
+        summary = what_if_summary(path, labels, delete_old, workers, chunk_size, emit)
+    except ValueError as e:
+        click.secho(str(e), err=True)
+        exit(1)
+    finally:
+        if writer is not None:
+            writer.flush()
+
+    click.secho(f'WHAT-IF {summary.relabeled} of {summary.prs} PRs would be relabeled, '
+                f'{summary.added} labels added, {summary.deleted} deleted', err=True)
+    if summary.failed_prs or summary.failed_repos:
+        click.secho(f'WHAT-IF snapshot is incomplete, {summary.failed_repos} repos and {summary.failed_prs} PRs '
+                    f'were not fetched', err=True)
+
+
+@click.group()
+def cli():
+    """
+    Offline evaluation of labels configuration against snapshot of PRs.
+    """
+    pass
+
+
+cli.add_command(snapshot)
+cli.add_command(what_if)
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,217 @@
+import collections
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+
+Job = collections.namedtuple('Job', ['owner', 'repo', 'pr_dict', 'enqueued', 'ready'])
+
+
+class WorkerPool:
+    """
+    Pool of background threads labeling PRs received by webhooks.
+
+    The webhook request only enqueues the PR and the labeling with its blocking GitHub requests
+    is done by one of the workers, so a burst of events does not hold the web server
+    and GitHub gets its answer in time.
+
+    Events of a PR that is already waiting in the queue are coalesced, the latest one replaces
+    the waiting one. With debounce window the PR waits until no event came for that long,
+    so a burst of pushes is labeled once. Waiting PRs are ordered by the time they are due,
+    so the workers never sleep on single PR, and a PR is never labeled by two workers at once,
+    its new event waits until the running job finishes.
+    """
+    def __init__(self, filabel, workers=4, logger=None, debounce=0.0):
+        """
+        Initilizer for WorkerPool class.
+
+        :param Filabel filabel: Filabel labeling the PRs
+
+        :param int workers: number of background threads
+
+        :param Optional[logging.Logger] logger: logger of processed jobs
+
+        :param float debounce: seconds a PR waits for newer events before it is labeled
+        """
+        self.filabel = filabel
+        self.workers = workers
+        self.logger = logger or logging.getLogger(__name__)
+        self.debounce = debounce
+        self.pending = {}
+        self.running = set()
+
+        self.coalesced = 0
+        self.processed = 0
+        self.failed = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+        self._threads = []
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        # (ready, order, key) of waiting PRs, entries of coalesced events are left behind as stale
+        self._due = []
+        self._order = itertools.count()
+        self._stopping = False
+
+    def start(self):
+        """
+        Start the worker threads, if not running yet
+        """
+        with self._lock:
+            if self._threads:
+                return
+            self._stopping = False
+            for num in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'filabel-worker-{num}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, owner, repo, pr_dict):
+        """
+        Enqueue PR to be labeled, replacing the waiting event of the same PR
+
+        :param str owner: Owner of GitHub repository
+
+        :param str repo: Name of GitHub repository
+
+        :param dict pr_dict: PR as dict from GitHub API
+        """
+        self.start()
+        key = (owner, repo, pr_dict.get('number'))
+        now = time.monotonic()
+        with self._changed:
+            waiting = self.pending.get(key)
+            if waiting is not None:
+                # the latency is measured from the oldest coalesced event
+                job = waiting._replace(pr_dict=pr_dict, ready=now + self.debounce)
+                self.coalesced += 1
+            else:
+                job = Job(owner, repo, pr_dict, now, now + self.debounce)
+            self.pending[key] = job
+            heapq.heappush(self._due, (job.ready, next(self._order), key))
+            self._changed.notify_all()
+
+    def _work(self):
+        """
+        Worker loop labeling enqueued PRs until stopped
+        """
+        while True:
+            key, job = self._take()
+            if job is None:
+                return
+            try:
+                self._run(job)
+            finally:
+                with self._changed:
+                    self.running.discard(key)
+                    if key in self.pending:
+                        # event came while the PR was labeled, it is due once the job finished
+                        heapq.heappush(self._due, (self.pending[key].ready, next(self._order), key))
+                    self._changed.notify_all()
+
+    def _take(self):
+        """
+        Wait for the next PR whose debounce window passed and that is not being labeled
+
+        :rtype: tuple(Optional[tuple], Optional[Job])
+
+        :return: key and the latest job of the PR or None when the pool is stopped and no PR waits
+        """
+        with self._changed:
+            while True:
+                while self._due:
+                    ready, _, key = self._due[0]
+                    job = self.pending.get(key)
+                    if job is None or job.ready != ready or key in self.running:
+                        # stale entry of coalesced event or PR being labeled, pushed again when it finishes
+                        heapq.heappop(self._due)
+                        continue
+                    break
+                else:
+                    if self._stopping and not self.pending:
+                        return None, None
+                    self._changed.wait()
+                    continue
+
+                wait = ready - time.monotonic()
+                if wait > 0:
+                    self._changed.wait(wait)
+                    continue
+                heapq.heappop(self._due)
+                self.running.add(key)
+                return key, self.pending.pop(key)
+
+    def _run(self, job):
+        """
+        Label PR of single job and record its outcome
+
+        :param Job job: enqueued PR
+        """
+        reposlug = f'{job.owner}/{job.repo}#{job.pr_dict.get("number")}'
+        ok = True
+        try:
+            self.filabel.run_pr(job.owner, job.repo, job.pr_dict)
+            self.logger.info(f'PR {reposlug} processed')
+        except Exception:
+            ok = False
+            self.logger.error(f'Error occurred while processing {reposlug}')
+
+        latency = time.monotonic() - job.enqueued
+        with self._lock:
+            self.processed += 1
+            self.failed += not ok
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+
+    def join(self):
+        """
+        Wait until all the enqueued PRs are processed
+        """
+        with self._changed:
+            while self.pending or self.running:
+                self._changed.wait()
+
+    def stop(self):
+        """
+        Process the enqueued PRs and stop the worker threads
+        """
+        with self._changed:
+            threads, self._threads = self._threads, []
+            self._stopping = True
+            self._changed.notify_all()
+        for thread in threads:
+            thread.join()
+
+    @property
+    def depth(self):
+        """
+        Number of PRs waiting in the queue
+
+        :rtype: int
+        """
+        with self._lock:
+            return len(self.pending)
+
+    def stats(self):
+        """
+        Statistics of the queue and processed jobs
+
+        :rtype: dict
+
+        :return: queue depth, number of workers, coalesced events, processed and failed jobs,
+                 average and max latency in seconds
+        """
+        depth = self.depth
+        with self._lock:
+            return {
+                'depth': depth,
+                'workers': self.workers,
+                'coalesced': self.coalesced,
+                'processed': self.processed,
+                'failed': self.failed,
+                'latency_avg': self.latency_total / self.processed if self.processed else 0.0,
+                'latency_max': self.latency_max,
+            }
@@ -15,7 +15,7 @@ setup(
     license='MIT',
     url='https://github.com/cvut/filabel',
     zip_safe=False,
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
     package_data={
         'filabel': [
             'static/*.css',
@@ -25,6 +25,8 @@ setup(
     entry_points={
         'console_scripts': [
             'filabel = filabel:cli',
+            'filabel-snapshot = filabel.whatif:snapshot',
+            'filabel-what-if = filabel.whatif:what_if',
         ]
     },
     install_requires=[
@@ -39,6 +41,7 @@ setup(
     ],
     tests_require=[
         'pytest',
+        'pytest-benchmark',
         'betamax'
     ],
     classifiers=[
@@ -0,0 +1,361 @@
+import aiohttp.web
+import asyncio
+import collections
+import pytest
+import random
+import threading
+
+
+DIRS = ['docs', 'src/filabel', 'src/filabel/templates', 'tests', 'static/css', 'scripts']
+EXTENSIONS = ['py', 'md', 'html', 'css', 'cfg', 'txt']
+
+
+class FakeGitHub:
+    """
+    Fake of GitHub REST and GraphQL endpoints used by Filabel, serving given repos with pull requests.
+
+    Every request is counted by its endpoint and label writes are recorded. Pages are cut by
+    max_per_page, a fraction of responses can be replaced by injected errors and interceptors
+    can answer any request before the fake does.
+    """
+    def __init__(self, repos=None, max_per_page=100, error_rate=0.0, error_status=500, seed=0, archived=(),
+                 login='filabel'):
+        """
+        Initilizer for FakeGitHub class.
+
+        :param dict[str, list[dict]] repos: PRs by reposlug, every PR has ``number`` and optionally ``html_url``,
+            ``sha``, ``labels`` and ``files`` (names)
+
+        :param int max_per_page: max page size, per_page parameter above is lowered
+
+        :param float error_rate: fraction of requests answered with error
+
+        :param int error_status: status of injected errors, 403/429 come with Retry-After
+
+        :param int seed: seed of injected errors
+
+        :param Iterable[str] archived: reposlugs of archived repos
+
+        :param str login: login of the authenticated user
+        """
+        self.repos = {
+            reposlug: [dict({'html_url': f'pr{pr["number"]}', 'sha': f'sha{pr["number"]}', 'labels': [], 'files': []},
+                            **pr) for pr in repo_prs]
+            for reposlug, repo_prs in (repos or {}).items()
+        }
+        self.max_per_page = max_per_page
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.archived = set(archived)
+        self.login = login
+        # labels of GraphQL page of PRs, the rest has to be queried separately
+        self.labels_per_page = 100
+
+        self.requests = collections.Counter()
+        self.errors = 0
+        self.written = []
+        self.queries = []
+        self.interceptors = []
+
+    @classmethod
+    def generated(cls, repos=1, prs=100, files=10, seed=0, **kwargs):
+        """
+        Fake of owner "bench" with repos "repo0", "repo1", ... with generated PRs
+
+        :param int repos: number of repos
+
+        :param int prs: number of open PRs of every repo
+
+        :param int files: number of changed files of every PR
+
+        :param int seed: seed of generated filenames and injected errors
+
+        :rtype: FakeGitHub
+        """
+        generated = {}
+        for repo in range(repos):
+            reposlug = f'bench/repo{repo}'
+            generated[reposlug] = []
+            for number in range(1, prs + 1):
+                rnd = random.Random(f'{seed}/{reposlug}/{number}')
+                generated[reposlug].append({
+                    'number': number,
+                    'html_url': f'https://github.com/{reposlug}/pull/{number}',
+                    'sha': f'{number:040x}',
+                    'files': [f'{rnd.choice(DIRS)}/file{num}.{rnd.choice(EXTENSIONS)}' for num in range(files)],
+                })
+        return cls(generated, seed=seed, **kwargs)
+
+    @property
+    def reposlugs(self):
+        """
+        Reposlugs of the served repos
+
+        :rtype: list[str]
+        """
+        return list(self.repos)
+
+    def pr(self, reposlug, number):
+        """
+        Served PR
+
+        :rtype: dict
+        """
+        return next(pr for pr in self.repos[reposlug] if pr['number'] == number)
+
+    def intercept(self, handler):
+        """
+        Register coroutine called with every request before the fake answers it,
+        the request is answered by the interceptor if it returns a response
+
+        :param handler: coroutine function taking the request, returning response or None
+
+        :return: the handler, so the method can be used as decorator
+        """
+        self.interceptors.append(handler)
+        return handler
+
+    def _page(self, request, items):
+        """
+        Response with one page of items, Link header as GitHub sends it
+        """
+        per_page = min(int(request.query.get('per_page', 30)), self.max_per_page)
+        page = int(request.query.get('page', 1))
+        last = max(1, -(-len(items) // per_page))
+
+        links = []
+        if page < last:
+            links.append(f'<{request.url.update_query(page=page + 1)}>; rel="next"')
+            links.append(f'<{request.url.update_query(page=last)}>; rel="last"')
+        headers = {'Link': ', '.join(links)} if links else {}
+
+        return aiohttp.web.json_response(items[(page - 1) * per_page:page * per_page], headers=headers)
+
+    def _pr(self, request):
+        """
+        PR of the request url, 404 if not served
+        """
+        reposlug = f'{request.match_info["owner"]}/{request.match_info["repo"]}'
+        if reposlug not in self.repos:
+            raise aiohttp.web.HTTPNotFound()
+        return reposlug, self.pr(reposlug, int(request.match_info['number']))
+
+    async def user(self, request):
+        return aiohttp.web.json_response({'login': self.login, 'html_url': f'https://github.com/{self.login}'})
+
+    async def owner_repos(self, request):
+        owner = request.match_info['owner']
+        repos = [{
+            'name': reposlug.split('/')[1],
+            'full_name': reposlug,
+            'archived': reposlug in self.archived,
+        } for reposlug in self.repos if reposlug.split('/')[0] == owner]
+        if not repos:
+            raise aiohttp.web.HTTPNotFound()
+        return self._page(request, repos)
+
+    async def pulls(self, request):
+        reposlug = f'{request.match_info["owner"]}/{request.match_info["repo"]}'
+        if reposlug not in self.repos:
+            raise aiohttp.web.HTTPNotFound()
+        return self._page(request, [{
+            'number': pr['number'],
+            'html_url': pr['html_url'],
+            'head': {'sha': pr['sha']},
+            'labels': [{'name': label} for label in pr['labels']],
+        } for pr in self.repos[reposlug]])
+
+    async def pr_files(self, request):
+        _, pr = self._pr(request)
+        return self._page(request, [{'filename': filename} for filename in pr['files']])
+
+    async def reset_labels(self, request):
+        reposlug, pr = self._pr(request)
+        pr['labels'] = sorted((await request.json())['labels'])
+        self.written.append(('PATCH', reposlug, pr['number'], pr['labels']))
+        return aiohttp.web.json_response({'labels': [{'name': label} for label in pr['labels']]})
+
+    async def add_labels(self, request):
+        reposlug, pr = self._pr(request)
+        added = (await request.json())['labels']
+        pr['labels'] = sorted(set(pr['labels']) | set(added))
+        self.written.append(('POST', reposlug, pr['number'], sorted(added)))
+        return aiohttp.web.json_response([{'name': label} for label in pr['labels']])
+
+    async def remove_label(self, request):
+        reposlug, pr = self._pr(request)
+        name = request.match_info['name']
+        if name not in pr['labels']:
+            return aiohttp.web.json_response({'message': 'Label does not exist'}, status=404)
+        pr['labels'] = [label for label in pr['labels'] if label != name]
+        self.written.append(('DELETE', reposlug, pr['number'], [name]))
+        return aiohttp.web.json_response([{'name': label} for label in pr['labels']])
+
+    async def graphql(self, request):
+        """
+        Queries of filabel.graphql, cursors are offsets
+        """
+        def page(items, first, after):
+            start = int(after or 0)
+            end = start + first
+            return {
+                'pageInfo': {'hasNextPage': end < len(items), 'endCursor': str(end)},
+                'nodes': items[start:end],
+            }
+
+        body = await request.json()
+        variables = body['variables']
+        name = body['query'].split('(')[0].split()[-1]
+        self.queries.append((name, variables.get('after')))
+        reposlug = f'{variables["owner"]}/{variables["repo"]}'
+        if reposlug not in self.repos:
+            return aiohttp.web.json_response({'data': {'repository': None},
+                                              'errors': [{'message': 'Could not resolve to a Repository'}]})
+
+        if 'number' in variables:
+            pr = self.pr(reposlug, variables['number'])
+            if name == 'PullRequestLabels':
+                nodes = {'labels': [{'name': label} for label in pr['labels']]}
+            else:
+                nodes = {'files': [{'path': filename} for filename in pr['files']]}
+            connection = {key: page(items, variables['first'], variables['after']) for key, items in nodes.items()}
+            return aiohttp.web.json_response({'data': {'repository': {'pullRequest': connection}}})
+
+        nodes = [{
+            'number': pr['number'],
+            'url': pr['html_url'],
+            'headRefOid': pr['sha'],
+            'labels': page([{'name': label} for label in pr['labels']], self.labels_per_page, None),
+            'files': page([{'path': filename} for filename in pr['files']], variables['files'], None),
+        } for pr in self.repos[reposlug]]
+        return aiohttp.web.json_response({'data': {'repository': {
+            'pullRequests': page(nodes, variables['first'], variables['after'])
+        }}})
+
+    @aiohttp.web.middleware
+    async def middleware(self, request, handler):
+        """
+        Count the request, let interceptors answer it and inject errors
+        """
+        resource = request.match_info.route.resource
+        self.requests[f'{request.method} {resource.canonical if resource else request.path}'] += 1
+        for interceptor in self.interceptors:
+            response = await interceptor(request)
+            if response is not None:
+                return response
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.errors += 1
+            headers = {'Retry-After': '0'} if self.error_status in (403, 429) else {}
+            return aiohttp.web.json_response({'message': 'Injected error'}, status=self.error_status,
+                                             headers=headers)
+        return await handler(request)
+
+    def app(self):
+        """
+        aiohttp application of the fake
+
+        :rtype: aiohttp.web.Application
+        """
+        app = aiohttp.web.Application(middlewares=[self.middleware])
+        app.router.add_get('/user', self.user)
+        app.router.add_get('/orgs/{owner}/repos', self.owner_repos)
+        app.router.add_get('/users/{owner}/repos', self.owner_repos)
+        app.router.add_get('/repos/{owner}/{repo}/pulls', self.pulls)
+        app.router.add_get('/repos/{owner}/{repo}/pulls/{number}/files', self.pr_files)
+        app.router.add_patch('/repos/{owner}/{repo}/issues/{number}', self.reset_labels)
+        app.router.add_post('/repos/{owner}/{repo}/issues/{number}/labels', self.add_labels)
+        app.router.add_delete('/repos/{owner}/{repo}/issues/{number}/labels/{name}', self.remove_label)
+        app.router.add_post('/graphql', self.graphql)
+        return app
+
+
+class FakeFilabel:
+    """
+    Fake Filabel recording labeled PRs and its closing, PRs numbered 0 fail
+    """
+    def __init__(self, gate=None, github=None):
+        """
+        Initilizer for FakeFilabel class.
+
+        :param Optional[threading.Event] gate: labeling of every PR waits for the event if given
+
+        :param Optional[GitHub] github: GitHub client closed together with the fake
+        """
+        self.labeled = []
+        self.prs = []
+        self.started = []
+        self.closed = False
+        self.gate = gate
+        self.github = github
+
+    def run_pr(self, owner, repo, pr_dict):
+        self.started.append(pr_dict['number'])
+        if self.gate is not None:
+            self.gate.wait()
+        if not pr_dict['number']:
+            raise ValueError('PR failed')
+        self.labeled.append((owner, repo, pr_dict['number']))
+        self.prs.append(pr_dict)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def local_server():
+    """
+    Run aiohttp application on localhost in background thread, returns its base url
+    """
+    loop = asyncio.new_event_loop()
+    runners = []
+
+    def serve(app):
+        runner = aiohttp.web.AppRunner(app)
+        loop.run_until_complete(runner.setup())
+        site = aiohttp.web.TCPSite(runner, '127.0.0.1', 0)
+        loop.run_until_complete(site.start())
+        runners.append(runner)
+        port = site._server.sockets[0].getsockname()[1]
+        return f'http://127.0.0.1:{port}'
+
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+
+    def start(app):
+        url = serve(app)
+        thread.start()
+        return url
+
+    yield start
+
+    if thread.is_alive():
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+    for runner in runners:
+        loop.run_until_complete(runner.cleanup())
+    loop.close()
+
+
+@pytest.fixture
+def fake_github(local_server):
+    """
+    Factory of FakeGitHub served on localhost, its base url is in ``api_url`` attribute,
+    given number of repos is generated if the PRs by reposlug are not given
+    """
+    def create(repos=1, **kwargs):
+        if isinstance(repos, dict):
+            fake = FakeGitHub(repos, **kwargs)
+        else:
+            fake = FakeGitHub.generated(repos, **kwargs)
+        fake.api_url = local_server(fake.app())
+        return fake
+
+    return create
+
+
+@pytest.fixture
+def fake_filabel():
+    """
+    Factory of FakeFilabel
+    """
+    return FakeFilabel
@@ -0,0 +1,30 @@
+import pytest
+
+from filabel.logic import Filabel
+
+# the benchmarks are not part of installed package
+fake_module = pytest.importorskip('benchmarks.fake_github')
+
+
+LABELS = {'docs': ['docs/*'], 'python': ['*.py']}
+
+
+@pytest.mark.parametrize('async_run', [False, True], ids=['sync', 'async'])
+def test_fake_github(local_server, async_run):
+    fake = fake_module.FakeGitHub(repos=2, prs=7, files=12, max_per_page=5)
+    filabel = Filabel('<TOKEN>', LABELS, async_run=async_run, per_page=5, api_url=local_server(fake.app()))
+    try:
+        reports = filabel.run_repos(fake.reposlugs + ['bench/missing'])
+    finally:
+        filabel.close()
+
+    assert [report.ok for report in reports] == [True, True, False]
+    assert all(changes is not None for report in reports[:2] for changes in report.prs.values())
+    # 2 pages of PRs and 3 pages of files of every PR
+    assert fake.requests['GET /repos/{owner}/{repo}/pulls'] == 2 * 2 + 1
+    assert fake.requests['GET /repos/{owner}/{repo}/pulls/{number}/files'] == 2 * 7 * 3
+
+    for (repo, number), labels in fake.labels.items():
+        filenames = fake.filenames(repo, number)
+        assert ('docs' in labels) == any(f.startswith('docs/') for f in filenames)
+        assert ('python' in labels) == any(f.endswith('.py') for f in filenames)
@@ -0,0 +1,125 @@
+import aiohttp.web
+import json
+import requests
+import threading
+
+import filabel
+from click.testing import CliRunner
+from filabel.cache import ResponseCache
+from filabel.logic import AsyncPagination, GitHub
+from .conftest import CONFIGS_PATH
+
+
+class ETagSession:
+    """
+    Fake requests session answering with ETag and 304 for matching If-None-Match
+    """
+    def __init__(self, body):
+        self.body = body
+        self.requests = []
+
+    def get(self, url, params=None, headers=None):
+        self.requests.append(headers)
+        response = requests.Response()
+        response.headers['ETag'] = '"abc"'
+        if headers and headers.get('If-None-Match') == '"abc"':
+            response.status_code = 304
+        else:
+            response.status_code = 200
+            response._content = json.dumps(self.body).encode()
+        return response
+
+
+def test_cache_store(tmp_path):
+
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'))
+
+    assert cache.get('url', {'state': 'open'}) is None
+
+    cache.store('url', {'state': 'open'}, {'ETag': '"abc"', 'Link': '<next>; rel="next"'}, [1, 2])
+    cache.store('url', {'state': 'open'}, {}, [3])
+
+    cached = cache.get('url', {'state': 'open'})
+
+    assert cached.body == [1, 2]
+    assert cache.conditional_headers(cached) == {'If-None-Match': '"abc"'}
+    assert cache.get('url', {'state': 'closed'}) is None
+
+
+def test_cache_persistent(tmp_path):
+
+    path = str(tmp_path / 'cache.sqlite')
+    cache = ResponseCache(path)
+    cache.store('url', None, {'Last-Modified': 'yesterday'}, {'login': 'filabel'})
+    cache.close()
+
+    cached = ResponseCache(path).get('url')
+
+    assert cached.body == {'login': 'filabel'}
+    assert cached.last_modified == 'yesterday'
+
+
+def test_not_modified_from_cache(tmp_path):
+
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'))
+    session = ETagSession([{'number': 1}])
+    github = GitHub('<TOKEN>', session=session, cache=cache)
+
+    first = github.pull_requests('owner', 'repo')
+    second = github.pull_requests('owner', 'repo')
+
+    assert first == second == [{'number': 1}]
+    assert [headers.get('If-None-Match') for headers in session.requests] == [None, '"abc"']
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+class ThreadRecordingCache(ResponseCache):
+    """
+    Response cache recording threads its SQLite queries run in
+    """
+    def __init__(self, path):
+        super().__init__(path)
+        self.threads = []
+
+    def get(self, url, params=None):
+        self.threads.append(threading.get_ident())
+        return super().get(url, params)
+
+    def store(self, url, params, headers, body):
+        self.threads.append(threading.get_ident())
+        super().store(url, params, headers, body)
+
+
+def test_async_cache_off_event_loop(fake_github, tmp_path):
+
+    fake = fake_github({})
+
+    @fake.intercept
+    async def user(request):
+        return aiohttp.web.json_response({'login': 'filabel'}, headers={'ETag': '"abc"'})
+
+    cache = ThreadRecordingCache(str(tmp_path / 'cache.sqlite'))
+    github = GitHub('<TOKEN>', strategy=AsyncPagination(), cache=cache, api_url=fake.api_url)
+    try:
+        assert github.user() == {'login': 'filabel'}
+    finally:
+        github.close()
+        cache.close()
+
+    assert len(cache.threads) == 2
+    assert threading.get_ident() not in cache.threads
+
+
+def test_cli_closes_cache(fake_github, tmp_path, monkeypatch):
+
+    closed = []
+    monkeypatch.setattr(ResponseCache, 'close', lambda self: closed.append(self.path))
+    path = str(tmp_path / 'cache.sqlite')
+
+    result = CliRunner().invoke(filabel.cli, [
+        '-a', CONFIGS_PATH + '/auth.fff.cfg', '-l', CONFIGS_PATH + '/labels.abc.cfg',
+        '--api-url', fake_github(prs=2).api_url, '--response-cache', path, 'bench/repo0',
+    ])
+
+    assert result.exit_code == 0
+    assert closed == [path]
@@ -1,6 +1,11 @@
+import io
+import json
 import os
 import filabel
 
+from filabel.cli import JsonLinesWriter
+from filabel.logic import Change, PRResult, RepoResult
+
 from click.testing import CliRunner
 
 ABS_PATH = os.path.abspath(os.path.dirname(__file__))
@@ -40,3 +45,26 @@ def test_cli_reposlug_not_valid(runner):
 
     assert 'Reposlug {} not valid'.format(reposlug) in result.output
 
+
+
+def test_jsonl_writer():
+
+    stream = io.StringIO()
+    writer = JsonLinesWriter(stream, buffer_size=200)
+
+    writer.write(RepoResult('owner/repo', True))
+    writer.write(PRResult('owner/repo', 'pr1', [('a', Change.ADD), ('b', Change.NONE), ('c', Change.DELETE)], 0.12345))
+    # buffered until the buffer size is reached
+    assert stream.getvalue() == ''
+
+    writer.write(PRResult('owner/repo', 'pr2', None, 0.5))
+    writer.write(RepoResult('owner/missing', False))
+    writer.flush()
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert records == [
+        {'repo': 'owner/repo', 'pr': 'pr1', 'status': 'ok', 'added': ['a'], 'kept': ['b'], 'deleted': ['c'],
+         'elapsed': 0.123},
+        {'repo': 'owner/repo', 'pr': 'pr2', 'status': 'fail', 'added': [], 'kept': [], 'deleted': [], 'elapsed': 0.5},
+        {'repo': 'owner/missing', 'pr': None, 'status': 'fail'},
+    ]
@@ -0,0 +1,117 @@
+import pytest
+import sys
+
+import filabel
+from click.testing import CliRunner
+from filabel.logic import AsyncPagination, DiscoveryError, Filabel, GitHub, PRResult, RepoResult, SyncPagination
+
+from .conftest import CONFIGS_PATH
+
+
+REPOS = [
+    {'name': 'repo', 'full_name': 'owner/repo', 'archived': False},
+    {'name': 'docs', 'full_name': 'owner/docs', 'archived': False},
+    {'name': 'old', 'full_name': 'owner/old', 'archived': True},
+    {'name': 'tool', 'full_name': 'owner/tool', 'archived': False},
+]
+
+
+def owner_repos(fake_github):
+    """
+    Fake GitHub listing repos of organization in pages of two, every repo has one PR
+    """
+    return fake_github({
+        repo['full_name']: [{'number': 1, 'html_url': f'{repo["name"]}/pr1', 'files': ['aaaa']}] for repo in REPOS
+    }, max_per_page=2, archived=[repo['full_name'] for repo in REPOS if repo['archived']])
+
+
+@pytest.mark.parametrize('async_run', (False, True))
+def test_discovered_repos_labeled(fake_github, async_run):
+
+    strategy = AsyncPagination() if async_run else SyncPagination()
+    github = GitHub('<TOKEN>', strategy=strategy, api_url=owner_repos(fake_github).api_url)
+    fl = Filabel('<TOKEN>', {'a': ['a*']}, async_run=async_run, github=github)
+
+    iter_reposlugs = fl.aiter_reposlugs if async_run else fl.iter_reposlugs
+    reposlugs = iter_reposlugs(['other/explicit'], orgs=['owner'], exclude=['doc*'])
+    results = list(fl.iter_run_repos(reposlugs))
+    fl.close()
+
+    assert sorted(r for r in results if isinstance(r, RepoResult)) == [
+        RepoResult('other/explicit', False), RepoResult('owner/repo', True), RepoResult('owner/tool', True),
+    ]
+    assert sorted(r.url for r in results if isinstance(r, PRResult)) == ['repo/pr1', 'tool/pr1']
+
+
+def test_repo_filters():
+
+    assert Filabel._repo_selected(REPOS[0])
+    assert not Filabel._repo_selected(REPOS[2])
+    assert Filabel._repo_selected(REPOS[2], skip_archived=False)
+    assert Filabel._repo_selected(REPOS[3], include=['re*', 't*'])
+    assert not Filabel._repo_selected(REPOS[1], include=['re*', 't*'])
+    assert not Filabel._repo_selected(REPOS[0], include=['re*'], exclude=['*po'])
+
+
+def test_cli_org(fake_github):
+
+    api_url = owner_repos(fake_github).api_url
+
+    result = CliRunner().invoke(filabel.cli, [
+        '-a', CONFIGS_PATH + '/auth.fff.cfg', '-l', CONFIGS_PATH + '/labels.abc.cfg',
+        '--api-url', api_url, '--org', 'owner', '--include', 'repo', '--output', 'jsonl',
+    ])
+
+    assert result.exit_code == 0
+    assert result.output.count('"pr":') == 1
+    assert '"repo":"owner/repo","pr":"repo/pr1","status":"ok","added":["a","ab","abc"]' in result.output
+
+
+def test_cli_org_not_found(fake_github):
+
+    api_url = owner_repos(fake_github).api_url
+
+    result = CliRunner().invoke(filabel.cli, [
+        '-a', CONFIGS_PATH + '/auth.fff.cfg', '-l', CONFIGS_PATH + '/labels.abc.cfg',
+        '--api-url', api_url, '--user', 'nobody',
+    ])
+
+    assert result.exit_code == 1
+    assert 'Listing of repositories failed' in result.output
+
+
+@pytest.mark.parametrize('async_run', (False, True))
+def test_discovery_error(fake_github, async_run):
+
+    strategy = AsyncPagination() if async_run else SyncPagination()
+    github = GitHub('<TOKEN>', strategy=strategy, api_url=owner_repos(fake_github).api_url)
+    fl = Filabel('<TOKEN>', {'a': ['a*']}, async_run=async_run, github=github)
+
+    iter_reposlugs = fl.aiter_reposlugs if async_run else fl.iter_reposlugs
+    results = []
+    try:
+        with pytest.raises(DiscoveryError, match='repos of user nobody could not be listed'):
+            for result in fl.iter_run_repos(iter_reposlugs(['other/explicit'], users=['nobody'])):
+                results.append(result)
+    finally:
+        fl.close()
+
+    assert results == [RepoResult('other/explicit', False)]
+
+
+@pytest.mark.parametrize('workers', (1, 2))
+def test_cli_output_error_not_listing(fake_github, monkeypatch, workers):
+
+    api_url = owner_repos(fake_github).api_url
+
+    def broken_output(result, indent='  '):
+        raise RuntimeError('output broken')
+
+    monkeypatch.setattr(sys.modules['filabel.cli'], 'print_result', broken_output)
+    result = CliRunner().invoke(filabel.cli, [
+        '-a', CONFIGS_PATH + '/auth.fff.cfg', '-l', CONFIGS_PATH + '/labels.abc.cfg',
+        '--api-url', api_url, '--org', 'owner', '--workers', str(workers),
+    ])
+
+    assert isinstance(result.exception, RuntimeError)
+    assert 'Listing of repositories failed' not in result.output
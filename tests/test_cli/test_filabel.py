@@ -1,8 +1,22 @@
+import aiohttp.web
+import asyncio
+import json
 import pytest
 import betamax
 
+import filabel as filabel_package
+from click.testing import CliRunner
+from filabel.logic import AsyncPagination
+from filabel.logic import Filabel
+from filabel.logic import GitHub
 from filabel.logic import Report
 from filabel.logic import Change
+from filabel.logic import ListingFailed
+from filabel.logic import PRResult
+from filabel.logic import RepoResult
+from filabel.logic import SyncPagination
+
+from .conftest import CONFIGS_PATH
 
 REPO = 'filabel-testrepo4'
 
@@ -49,4 +63,235 @@ def test_matching_labels(username, filabel_param, github):
     else:
         assert 'a' in labels
         assert 'ab' in labels
-        assert 'abc' in labels
\ No newline at end of file
+        assert 'abc' in labels
+
+def test_matching_labels_cache(filabel):
+
+    filabel._matching_labels(['aaa', 'bbb'])
+    filabel._matching_labels(['aaa', 'zzz'])
+
+    info = filabel.cache_info()
+
+    assert info.hits == 1
+    assert info.misses == 3
+
+    filabel.labels = {'z': ['z*']}
+
+    assert filabel.cache_info().currsize == 0
+    assert filabel._matching_labels(['aaa', 'zzz']) == {'z'}
+
+
+def test_labels_copied():
+
+    labels = {'a': ['a*']}
+    filabel = Filabel('<TOKEN>', labels)
+    assert filabel._matching_labels(['aaa', 'bbb']) == {'a'}
+
+    # changes in place would not match the cached labels, they take effect once assigned
+    labels['a'].append('b*')
+    labels['c'] = ['c*']
+    assert filabel._matching_labels(['aaa', 'bbb', 'ccc']) == {'a'}
+    with pytest.raises(TypeError):
+        filabel.labels['c'] = ['c*']
+
+    filabel.labels = labels
+    assert filabel._matching_labels(['bbb', 'ccc']) == {'a', 'c'}
+
+
+@pytest.mark.parametrize('delete_old', [True, False], ids=['delete', 'keep'])
+def test_plan_labels(delete_old):
+
+    filabel = Filabel('<TOKEN>', {'a': ['a*'], 'b': ['b*'], 'c': ['c*']}, delete_old=delete_old)
+
+    plan = filabel.plan_labels(['aaa', 'bbb'], ['b', 'c', 'bug'])
+
+    assert plan.matching == {'a', 'b'}
+    assert (plan.added, plan.remained) == ({'a'}, {'b'})
+    if delete_old:
+        assert plan.deleted == {'c'}
+        assert plan.future == {'a', 'b', 'bug'}
+        assert plan.changes == [('a', Change.ADD), ('b', Change.NONE), ('c', Change.DELETE)]
+    else:
+        assert plan.deleted == set()
+        assert plan.future == {'a', 'b', 'c', 'bug'}
+        assert plan.changes == [('a', Change.ADD), ('b', Change.NONE)]
+
+
+PRS = [
+    {'number': 1, 'labels': [], 'files': ['aaaa']},
+    {'number': 2, 'labels': ['a'], 'files': ['aaaa']},
+]
+
+
+def test_async_run_repos(fake_github):
+
+    fake = fake_github({'owner/repo': PRS})
+    github = GitHub('<TOKEN>', strategy=AsyncPagination())
+    github.API = fake.api_url
+    filabel = Filabel('<TOKEN>', {'a': ['a*'], 'b': ['b*']}, async_run=True, github=github)
+
+    report, = filabel.run_repos(['owner/repo'])
+    filabel.close()
+
+    assert fake.written == [('PATCH', 'owner/repo', 1, ['a'])]
+    assert report.prs == {'pr1': [('a', Change.ADD)], 'pr2': [('a', Change.NONE)]}
+
+
+@pytest.mark.parametrize('async_run', (False, True))
+def test_iter_run_repos(fake_github, async_run):
+
+    strategy = AsyncPagination() if async_run else SyncPagination()
+    github = GitHub('<TOKEN>', strategy=strategy)
+    github.API = fake_github({'owner/repo': PRS}).api_url
+    filabel = Filabel('<TOKEN>', {'a': ['a*']}, async_run=async_run, github=github)
+
+    results = list(filabel.iter_run_repos(['owner/repo', 'owner/missing']))
+
+    # repos complete in any order in async mode
+    repo_results = [r for r in results if isinstance(r, RepoResult)]
+    assert sorted(repo_results) == [RepoResult('owner/missing', False), RepoResult('owner/repo', True)]
+    # result of the repo comes before results of its PRs
+    assert isinstance(results[0], RepoResult)
+    first_pr = min(i for i, r in enumerate(results) if isinstance(r, PRResult))
+    assert results.index(RepoResult('owner/repo', True)) < first_pr
+    assert sorted(r[:3] for r in results if isinstance(r, PRResult)) == [
+        ('owner/repo', 'pr1', [('a', Change.ADD)]),
+        ('owner/repo', 'pr2', [('a', Change.NONE)]),
+    ]
+
+    # stopped iteration cancels the rest of the run
+    results = filabel.iter_run_repos(['owner/repo'])
+    assert next(results) == RepoResult('owner/repo', True)
+    results.close()
+    filabel.close()
+
+
+@pytest.mark.parametrize('async_run', (False, True))
+def test_iter_run_reports(fake_github, async_run):
+
+    strategy = AsyncPagination() if async_run else SyncPagination()
+    github = GitHub('<TOKEN>', strategy=strategy)
+    github.API = fake_github({'owner/repo': PRS, 'owner/other': PRS}).api_url
+    filabel = Filabel('<TOKEN>', {'a': ['a*']}, async_run=async_run, github=github)
+
+    try:
+        reports = list(filabel.iter_run_reports(['owner/repo', 'owner/other', 'owner/missing']))
+    finally:
+        filabel.close()
+
+    # every repo is reported whole, repos complete in any order in async mode
+    assert sorted((report.repo, report.ok, report.prs) for report in reports) == [
+        ('owner/missing', False, {}),
+        ('owner/other', True, {'pr1': [('a', Change.ADD)], 'pr2': [('a', Change.NONE)]}),
+        ('owner/repo', True, {'pr1': [('a', Change.ADD)], 'pr2': [('a', Change.NONE)]}),
+    ]
+
+
+@pytest.mark.parametrize('async_run', (False, True))
+def test_labeling_while_paginating(fake_github, async_run):
+
+    # pages of single PR
+    fake = fake_github({'owner/repo': [
+        {'number': 1, 'files': ['aaaa']}, {'number': 2, 'files': ['aaaa']},
+    ]}, max_per_page=1)
+    first_pr_files = asyncio.Event()
+    events = []
+
+    @fake.intercept
+    async def second_page_after_files(request):
+        if request.path.endswith('/files'):
+            first_pr_files.set()
+        elif request.path.endswith('/pulls'):
+            assert request.query['per_page'] == '100'
+            if request.query.get('page', '1') == '1':
+                return None
+            # the last page waits until the PR from the first page is being labeled
+            try:
+                await asyncio.wait_for(first_pr_files.wait(), 2)
+                events.append('page 2 after PR 1')
+            except asyncio.TimeoutError:
+                events.append('page 2 timed out')
+        return None
+
+    strategy = AsyncPagination() if async_run else SyncPagination()
+    github = GitHub('<TOKEN>', strategy=strategy, per_page=100)
+    github.API = fake.api_url
+    filabel = Filabel('<TOKEN>', {'a': ['a*']}, async_run=async_run, github=github)
+
+    report, = filabel.run_repos(['owner/repo'])
+    filabel.close()
+
+    assert events == ['page 2 after PR 1']
+    assert report.prs == {'pr1': [('a', Change.ADD)], 'pr2': [('a', Change.ADD)]}
+
+
+def later_page_failing(fake_github):
+    """
+    Fake GitHub with repo owner/other, second page of its PRs cannot be listed
+    """
+    fake = fake_github({'owner/other': [{'number': 1, 'files': ['aaaa']}, {'number': 2}]}, max_per_page=1)
+
+    @fake.intercept
+    async def later_page_missing(request):
+        if request.path.endswith('/pulls') and request.query.get('page', '1') != '1':
+            return aiohttp.web.json_response({'message': 'Not Found'}, status=404)
+        return None
+
+    return fake
+
+
+@pytest.mark.parametrize('async_run', (False, True))
+def test_later_page_failed_report(fake_github, async_run):
+
+    fake = later_page_failing(fake_github)
+    strategy = AsyncPagination() if async_run else SyncPagination()
+    github = GitHub('<TOKEN>', strategy=strategy, api_url=fake.api_url)
+    filabel = Filabel('<TOKEN>', {'a': ['a*']}, async_run=async_run, github=github)
+
+    try:
+        report, = filabel.run_repos(['owner/other'])
+    finally:
+        filabel.close()
+
+    # listing failed, the PRs of the listed page are labeled anyway
+    assert not report.ok
+    assert report.listing_failed
+    assert report.prs == {'pr1': [('a', Change.ADD)]}
+    assert list(report.results()) == [
+        RepoResult('owner/other', True),
+        PRResult('owner/other', 'pr1', [('a', Change.ADD)], None),
+        ListingFailed('owner/other'),
+    ]
+
+
+@pytest.mark.parametrize('async_run', (False, True))
+@pytest.mark.parametrize('output', ('text', 'jsonl'))
+def test_later_page_failed(fake_github, async_run, output):
+
+    fake = later_page_failing(fake_github)
+
+    result = CliRunner().invoke(filabel_package.cli, [
+        '-a', CONFIGS_PATH + '/auth.fff.cfg', '-l', CONFIGS_PATH + '/labels.abc.cfg',
+        '--api-url', fake.api_url, '--output', output, 'owner/other',
+    ] + (['--async'] if async_run else []))
+
+    assert result.exit_code == 0
+    # the repo has single status, the failed page is reported after its PRs
+    if output == 'text':
+        # PR lines are indented in sync mode only, as they always were
+        indent = '' if async_run else '  '
+        assert [line for line in result.output.splitlines() if not line.startswith('RATE LIMIT')] == [
+            'REPO owner/other - OK',
+            f'{indent}PR pr1 - OK',
+            f'{indent}  + a',
+            f'{indent}  + ab',
+            f'{indent}  + abc',
+            f'{indent}PR remaining PRs not listed - FAIL',
+        ]
+    else:
+        records = [json.loads(r) for r in result.output.splitlines() if r.startswith('{')]
+        # failed listing comes after the PRs of the listed pages
+        assert records == [
+            dict(records[0], repo='owner/other', pr='pr1', status='ok'),
+            {'repo': 'owner/other', 'pr': None, 'status': 'fail'},
+        ]
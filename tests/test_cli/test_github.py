@@ -1,6 +1,10 @@
+import json
+import time
+from urllib import parse
 import requests
 import pytest
 from filabel.logic import GitHub
+from filabel.logic import AsyncPagination
 
 
 
@@ -73,3 +77,158 @@ def test_reset_labels(username, github):
 
 
 
+
+
+class RecordingSession:
+    """
+    Fake requests session answering label writes with the labels sent
+    """
+    def __init__(self, existing):
+        self.labels = set(existing)
+        self.calls = []
+
+    def _response(self):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps([{'name': l} for l in sorted(self.labels)]).encode()
+        return response
+
+    def patch(self, url, json, headers=None):
+        self.calls.append(('PATCH', url))
+        self.labels = set(json['labels'])
+        response = self._response()
+        response._content = b'{"labels": ' + response._content + b'}'
+        return response
+
+    def post(self, url, json, headers=None):
+        self.calls.append(('POST', url))
+        self.labels |= set(json['labels'])
+        return self._response()
+
+    def delete(self, url, headers=None):
+        self.calls.append(('DELETE', url))
+        label = url.rsplit('/', 1)[1]
+        if label not in self.labels:
+            response = requests.Response()
+            response.status_code = 404
+            return response
+        self.labels.discard(label)
+        return self._response()
+
+
+@pytest.mark.parametrize(
+    ['existing', 'future', 'methods'],
+    [({'a', 'b'}, {'a', 'b'}, []),
+     (set(), {'a', 'b'}, ['PATCH']),
+     ({'a'}, {'a', 'b'}, ['POST']),
+     ({'a', 'b'}, {'a'}, ['DELETE']),
+     ({'a', 'b'}, {'c'}, ['PATCH'])],
+)
+def test_update_labels(existing, future, methods):
+
+    session = RecordingSession(existing)
+    github = GitHub('<TOKEN>', session=session)
+
+    labels = github.update_labels('owner', 'repo', 1, existing, future)
+
+    assert [method for method, _ in session.calls] == methods
+    assert set(l['name'] for l in labels) == future
+
+
+@pytest.mark.parametrize('async_run', (False, True))
+def test_remove_removed_label(fake_github, async_run):
+
+    if async_run:
+        # label removed meanwhile by someone else
+        fake = fake_github({'owner/repo': [{'number': 1, 'labels': ['a', 'b']}]})
+        github = GitHub('<TOKEN>', strategy=AsyncPagination(), api_url=fake.api_url)
+        try:
+            labels = github.run(github.async_update_labels('owner', 'repo', 1, {'a', 'b', 'c'}, {'a', 'b'}))
+        finally:
+            github.close()
+    else:
+        # label removed meanwhile by someone else
+        session = RecordingSession({'a', 'b'})
+        github = GitHub('<TOKEN>', session=session)
+        labels = github.update_labels('owner', 'repo', 1, {'a', 'b', 'c'}, {'a', 'b'})
+
+    assert [l['name'] for l in labels] == ['a', 'b']
+
+
+class PagedSession:
+    """
+    Fake requests session serving numbered pages, later pages answered faster
+    """
+    URL = 'https://api.github.com/repos/owner/repo/pulls'
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.params = []
+
+    def get(self, url, params=None, headers=None):
+        self.params.append(params)
+        page = int(parse.parse_qs(parse.urlparse(url).query).get('page', ['1'])[0])
+        time.sleep((self.pages - page) * 0.01)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps([{'number': page}]).encode()
+        if page == 1:
+            response.headers['Link'] = (f'<{self.URL}?page=2>; rel="next", '
+                                        f'<{self.URL}?page={self.pages}>; rel="last"')
+        return response
+
+
+def test_pages_in_order():
+
+    session = PagedSession(6)
+    github = GitHub('<TOKEN>', session=session, per_page=100)
+
+    prs = github.pull_requests('owner', 'repo')
+
+    assert [pr['number'] for pr in prs] == [1, 2, 3, 4, 5, 6]
+    assert all(params['per_page'] == 100 for params in session.params)
+
+
+def test_async_shared_session(fake_github):
+
+    fake = fake_github({'owner/repo': [{'number': 1, 'files': ['radioactive']}]})
+    peers = set()
+
+    @fake.intercept
+    async def peer(request):
+        peers.add(request.transport.get_extra_info('peername'))
+
+    github = GitHub('<TOKEN>', strategy=AsyncPagination())
+    github.API = fake.api_url
+
+    assert github.user()['login'] == 'filabel'
+    assert list(github.run(github.async_pr_filenames('owner', 'repo', 1))) == ['radioactive']
+    assert github.user()['login'] == 'filabel'
+
+    session = github.strategy.session
+    github.close()
+
+    assert len(peers) == 1
+    assert session.closed
+
+
+def test_session_per_event_loop():
+
+    strategy = AsyncPagination()
+
+    async def get_session():
+        return strategy.get_session()
+
+    first = strategy.run(get_session())
+    assert strategy.run(get_session()) is first
+    assert strategy.session_loop is strategy.loop
+
+    # new event loop gets new session, the old one cannot be used in it
+    strategy.loop.close()
+    second = strategy.run(get_session())
+    assert second is not first
+    assert strategy.session_loop is strategy.loop
+
+    strategy.close()
+    assert second.closed
+    assert strategy.session_loop is None
@@ -0,0 +1,105 @@
+import pytest
+
+from filabel.graphql import GraphQLError, GraphQLGitHub
+from filabel.logic import AsyncPagination, Change, Filabel, SyncPagination
+
+
+PRS = [
+    {'number': 1, 'labels': [], 'files': ['aaaa']},
+    {'number': 2, 'labels': ['a'], 'files': ['aaaa']},
+    {'number': 3, 'labels': [], 'files': ['x1', 'x2', 'x3', 'x4', 'bbbb']},
+]
+
+
+def graphql_github(fake, strategy, **kwargs):
+    github = GraphQLGitHub('<TOKEN>', strategy=strategy, **kwargs)
+    github.API = fake.api_url
+    github.GRAPHQL = github.API + '/graphql'
+    return github
+
+
+def test_pull_requests(fake_github):
+    fake = fake_github({'owner/repo': PRS})
+    github = graphql_github(fake, SyncPagination(), prs_per_query=2, files_per_query=2)
+
+    prs = github.pull_requests('owner', 'repo')
+
+    assert [pr['number'] for pr in prs] == [1, 2, 3]
+    assert prs[1]['labels'] == [{'name': 'a'}]
+    assert prs[2]['head'] == {'sha': 'sha3'}
+    assert github.pr_filenames('owner', 'repo', 3) == ['x1', 'x2', 'x3', 'x4', 'bbbb']
+    # two pages of PRs and two more pages of the files of PR 3
+    assert fake.queries == [
+        ('PullRequests', None), ('PullRequests', '2'), ('PullRequestFiles', '2'), ('PullRequestFiles', '4')
+    ]
+
+
+@pytest.mark.parametrize('async_run', (False, True))
+def test_run_repos(fake_github, async_run):
+    fake = fake_github({'owner/repo': PRS})
+    strategy = AsyncPagination() if async_run else SyncPagination()
+    github = graphql_github(fake, strategy, prs_per_query=2, files_per_query=2)
+    filabel = Filabel('<TOKEN>', {'a': ['a*'], 'b': ['b*']}, async_run=async_run, github=github)
+
+    try:
+        report, missing = filabel.run_repos(['owner/repo', 'owner/missing'])
+    finally:
+        filabel.close()
+
+    assert sorted(fake.written) == [('PATCH', 'owner/repo', 1, ['a']), ('PATCH', 'owner/repo', 3, ['b'])]
+    assert report.prs == {
+        'pr1': [('a', Change.ADD)],
+        'pr2': [('a', Change.NONE)],
+        'pr3': [('b', Change.ADD)],
+    }
+    # no per PR requests, just the pages of the repo and one query of the missing repo
+    assert len(fake.queries) == 5
+    assert not missing.ok
+
+
+def test_graphql_error(fake_github):
+    github = graphql_github(fake_github({'owner/repo': PRS}), SyncPagination())
+
+    with pytest.raises(GraphQLError, match='Could not resolve'):
+        github.pull_requests('owner', 'missing')
+
+
+@pytest.mark.parametrize('async_run', (False, True))
+def test_many_labels(fake_github, async_run):
+    fake = fake_github({'owner/repo': [{'number': 1, 'labels': ['l1', 'l2', 'l3', 'l4', 'l5'], 'files': ['aaaa']}]})
+    fake.labels_per_page = 2
+    strategy = AsyncPagination() if async_run else SyncPagination()
+    github = graphql_github(fake, strategy)
+
+    try:
+        if async_run:
+            pr, = github.run(github.async_pull_requests('owner', 'repo'))
+        else:
+            pr, = github.pull_requests('owner', 'repo')
+    finally:
+        github.close()
+
+    # labels not fitting in the page of PRs are not lost
+    assert [label['name'] for label in pr['labels']] == ['l1', 'l2', 'l3', 'l4', 'l5']
+    assert fake.queries == [('PullRequests', None), ('PullRequestLabels', '2')]
+
+
+@pytest.mark.parametrize('async_run', (False, True))
+def test_pr_without_files(fake_github, async_run):
+    fake = fake_github({'owner/repo': [{'number': 1, 'files': []}]})
+    strategy = AsyncPagination() if async_run else SyncPagination()
+    github = graphql_github(fake, strategy)
+
+    try:
+        if async_run:
+            github.run(github.async_pull_requests('owner', 'repo'))
+            filenames = github.run(github.async_pr_filenames('owner', 'repo', 1))
+        else:
+            github.pull_requests('owner', 'repo')
+            filenames = github.pr_filenames('owner', 'repo', 1)
+    finally:
+        github.close()
+
+    # empty list of files was already fetched with the PR
+    assert filenames == []
+    assert fake.queries == [('PullRequests', None)]
@@ -0,0 +1,54 @@
+import fnmatch
+import pytest
+
+from filabel.matcher import LabelMatcher
+
+
+LABELS = {
+    'literal': ['LICENSE', 'setup.py'],
+    'prefix': ['docs/*', 'a*'],
+    'suffix': ['*.md', '*.py'],
+    'general': ['*/templates/*', '[ab]?x', 'src/*/test_?.py'],
+    'everything': ['*'],
+    'empty': [],
+}
+
+FILENAMES = [
+    'LICENSE', 'setup.py', 'docs/index.rst', 'abx', 'README.md', 'filabel/web.py',
+    'filabel/templates/layout.html', 'src/foo/test_a.py', 'zzz', '', 'docs',
+]
+
+
+def fnmatch_labels(labels, filenames):
+    return {
+        label for filename in filenames for label, patterns in labels.items()
+        if any(fnmatch.fnmatch(filename, pattern) for pattern in patterns)
+    }
+
+
+@pytest.mark.parametrize('filename', FILENAMES)
+def test_filename_labels_as_fnmatch(filename):
+
+    matcher = LabelMatcher(LABELS)
+
+    assert matcher.filename_labels(filename) == fnmatch_labels(LABELS, [filename])
+
+
+def test_match_as_fnmatch():
+
+    labels = {k: v for k, v in LABELS.items() if k != 'everything'}
+    matcher = LabelMatcher(labels)
+
+    assert matcher.match(FILENAMES) == fnmatch_labels(labels, FILENAMES)
+
+
+def test_match_stops_early():
+
+    matcher = LabelMatcher({'a': ['a*'], 'b': ['b*'], 'empty': []})
+
+    def filenames():
+        yield 'aaa'
+        yield 'bbb'
+        raise AssertionError('all labels already matched')
+
+    assert matcher.match(filenames()) == {'a', 'b'}
@@ -0,0 +1,101 @@
+import pytest
+from click.testing import CliRunner
+
+import filabel
+from filabel.logic import Filabel
+from filabel.metrics import Metrics, endpoint
+
+from .conftest import CONFIGS_PATH
+
+
+@pytest.mark.parametrize(('url', 'expected'), [
+    ('https://api.github.com/user', '/user'),
+    ('https://api.github.com/repos/owner/repo/pulls?page=2', '/repos/{owner}/{repo}/pulls'),
+    ('https://api.github.com/repos/owner/repo/pulls/42/files', '/repos/{owner}/{repo}/pulls/{number}/files'),
+    ('https://api.github.com/repos/owner/repo/issues/42/labels/bug', '/repos/{owner}/{repo}/issues/{number}/labels/{name}'),
+    ('https://ghe.example.com/api/v3/orgs/owner/repos', '/orgs/{owner}/repos'),
+])
+def test_endpoint(url, expected):
+    assert endpoint(url) == expected
+
+
+def test_render():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    metrics.observe('get', 'https://api.github.com/repos/o/r/pulls', 200, 0.05, 100)
+    metrics.observe('get', 'https://api.github.com/repos/o/r/pulls?page=2', 200, 0.5, 50)
+    metrics.observe('patch', 'https://api.github.com/repos/o/r/issues/1', 403, 2.0)
+    metrics.retry('patch', 'https://api.github.com/repos/o/r/issues/1')
+    metrics.cache(True)
+    metrics.cache(False)
+    metrics.cache(False)
+
+    text = metrics.render()
+
+    assert 'filabel_github_requests_total{method="GET",endpoint="/repos/{owner}/{repo}/pulls",status="200"} 2' in text
+    assert 'filabel_github_requests_total{method="PATCH",endpoint="/repos/{owner}/{repo}/issues/{number}",status="403"} 1' in text
+    assert 'filabel_github_response_bytes_total{method="GET",endpoint="/repos/{owner}/{repo}/pulls"} 150' in text
+    assert 'filabel_github_request_duration_seconds_bucket{method="GET",endpoint="/repos/{owner}/{repo}/pulls",le="0.1"} 1' in text
+    assert 'filabel_github_request_duration_seconds_bucket{method="GET",endpoint="/repos/{owner}/{repo}/pulls",le="1.0"} 2' in text
+    assert 'filabel_github_request_duration_seconds_bucket{method="PATCH",endpoint="/repos/{owner}/{repo}/issues/{number}",le="1.0"} 0' in text
+    assert 'filabel_github_request_duration_seconds_count{method="PATCH",endpoint="/repos/{owner}/{repo}/issues/{number}"} 1' in text
+    assert 'filabel_github_retries_total{method="PATCH",endpoint="/repos/{owner}/{repo}/issues/{number}"} 1' in text
+    assert 'filabel_github_cache_total{result="hit"} 1' in text
+    assert 'filabel_github_cache_total{result="miss"} 2' in text
+
+
+def test_merge():
+    metrics, other = Metrics(), Metrics()
+    metrics.observe('GET', 'https://api.github.com/user', 200, 0.01, 10)
+    other.observe('GET', 'https://api.github.com/user', 200, 0.2, 10)
+    other.cache(True)
+
+    metrics.merge(other)
+
+    assert metrics.total == 2
+    assert metrics.bytes[('GET', '/user')] == 20
+    assert metrics.cache_hits == 1
+
+
+@pytest.mark.parametrize('async_run', [False, True], ids=['sync', 'async'])
+def test_requests_recorded(fake_github, async_run):
+    # throttled responses come with Retry-After 0 and are retried
+    fake = fake_github(prs=5, files=3, max_per_page=2, error_rate=0.2, error_status=429, seed=3)
+    filabel = Filabel('<TOKEN>', {'docs': ['docs/*'], 'python': ['*.py']}, async_run=async_run, per_page=2,
+                      api_url=fake.api_url)
+    try:
+        filabel.run_repos(fake.reposlugs)
+    finally:
+        filabel.close()
+
+    metrics = filabel.github.metrics
+    assert fake.errors > 0
+    assert metrics.total == sum(fake.requests.values())
+    assert sum(count for (_, _, status), count in metrics.requests.items() if status == '429') == fake.errors
+    assert sum(metrics.retries.values()) == fake.errors
+    assert metrics.requests[('GET', '/repos/{owner}/{repo}/pulls/{number}/files', '200')] == 5 * 2
+    assert metrics.bytes[('GET', '/repos/{owner}/{repo}/pulls')] > 0
+
+
+def test_cli_stats(fake_github):
+    api_url = fake_github(prs=2, files=2).api_url
+
+    result = CliRunner().invoke(filabel.cli, [
+        '-a', CONFIGS_PATH + '/auth.fff.cfg', '-l', CONFIGS_PATH + '/labels.abc.cfg',
+        '--api-url', api_url, '--stats', 'bench/repo0',
+    ])
+
+    assert result.exit_code == 0
+    assert 'filabel_github_requests_total{method="GET",endpoint="/repos/{owner}/{repo}/pulls",status="200"} 1' in result.output
+    assert 'filabel_github_requests_total{method="GET",endpoint="/repos/{owner}/{repo}/pulls/{number}/files",status="200"} 2' in result.output
+
+
+def test_connection_error_recorded():
+    # nothing listens on the port, requests fail without response
+    filabel = Filabel('<TOKEN>', {'docs': ['docs/*']}, async_run=True, api_url='http://127.0.0.1:1')
+    try:
+        filabel.run_repos(['owner/repo'])
+    finally:
+        filabel.close()
+
+    metrics = filabel.github.metrics
+    assert metrics.requests[('GET', '/repos/{owner}/{repo}/pulls', 'error')] == 1
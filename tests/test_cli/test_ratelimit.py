@@ -0,0 +1,216 @@
+import email.utils
+import pickle
+import time
+import aiohttp.web
+import requests
+
+from filabel.logic import AsyncPagination
+from filabel.logic import GitHub
+from filabel.ratelimit import RateLimit
+from filabel.ratelimit import TokenPool
+
+
+def ratelimit_headers(remaining, reset_in=3600, **extra):
+    return dict({
+        'X-RateLimit-Limit': '5000',
+        'X-RateLimit-Remaining': str(remaining),
+        'X-RateLimit-Reset': str(int(time.time() + reset_in)),
+    }, **extra)
+
+
+def test_not_paced_above_reserve():
+
+    ratelimit = RateLimit(reserve=100)
+    ratelimit.update(ratelimit_headers(4000))
+
+    assert ratelimit.rate is None
+    assert all(ratelimit.delay() == 0 for _ in range(1000))
+
+
+def test_paced_below_reserve():
+
+    ratelimit = RateLimit(reserve=100, burst=2)
+    ratelimit.update(ratelimit_headers(10, reset_in=100))
+
+    assert 0.09 < ratelimit.rate < 0.11
+
+    delays = [ratelimit.delay() for _ in range(4)]
+
+    assert delays[:2] == [0, 0]
+    assert 9 < delays[2] < 11
+    assert 19 < delays[3] < 21
+
+
+def test_paced_share():
+
+    # two processes with the same token pace half of the budget each
+    ratelimit = RateLimit(reserve=100, share=0.5)
+    ratelimit.update(ratelimit_headers(10, reset_in=100))
+
+    assert 0.04 < ratelimit.rate < 0.06
+
+
+def test_retry_delay():
+
+    ratelimit = RateLimit(backoff=1)
+
+    assert ratelimit.retry_delay(429, {'Retry-After': '5'}, 0) == 5
+    assert ratelimit.retry_delay(429, {}, 2) == 4
+    assert ratelimit.retry_delay(429, {}, 3) is None
+    assert ratelimit.retry_delay(403, {}, 0) is None
+    assert ratelimit.retry_delay(404, {'Retry-After': '5'}, 0) is None
+    assert 9 < ratelimit.retry_delay(403, ratelimit_headers(0, reset_in=10), 0) <= 10
+    assert ratelimit.retries == 3
+
+
+def test_retry_delay_http_date():
+
+    ratelimit = RateLimit(backoff=1)
+    in_ten = email.utils.formatdate(time.time() + 10, usegmt=True)
+
+    assert 8 < ratelimit.retry_delay(429, {'Retry-After': in_ten}, 0) <= 10
+    assert ratelimit.retry_delay(429, {'Retry-After': email.utils.formatdate(time.time() - 10, usegmt=True)}, 0) == 0
+    # not parsable Retry-After falls back to the reset time or backoff
+    assert 9 < ratelimit.retry_delay(403, ratelimit_headers(0, reset_in=10, **{'Retry-After': 'soon'}), 0) <= 10
+    assert ratelimit.retry_delay(403, {'Retry-After': 'soon'}, 1) == 2
+
+
+class ThrottlingSession:
+    """
+    Fake requests session throttling the first request
+    """
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, url, params=None, headers=None):
+        self.calls += 1
+        response = requests.Response()
+        if self.calls == 1:
+            response.status_code = 429
+            response.headers.update(ratelimit_headers(4000, **{'Retry-After': '0'}))
+        else:
+            response.status_code = 200
+            response.headers.update(ratelimit_headers(3999))
+            response._content = b'{"login": "filabel"}'
+        return response
+
+
+def test_sync_retry():
+
+    session = ThrottlingSession()
+    github = GitHub('<TOKEN>', session=session)
+
+    assert github.user()['login'] == 'filabel'
+    assert session.calls == 2
+    assert github.ratelimit.remaining == 3999
+    assert github.ratelimit.retries == 1
+    assert '3999/5000 remaining' in github.ratelimit.summary()
+
+
+def test_async_retry(fake_github):
+
+    fake = fake_github({})
+    calls = []
+
+    @fake.intercept
+    async def throttled_once(request):
+        calls.append(request.path)
+        if len(calls) == 1:
+            return aiohttp.web.Response(status=429, headers=ratelimit_headers(4000, **{'Retry-After': '0'}))
+        return aiohttp.web.json_response({'login': 'filabel'}, headers=ratelimit_headers(3999))
+
+    github = GitHub('<TOKEN>', strategy=AsyncPagination())
+    github.API = fake.api_url
+
+    assert github.user()['login'] == 'filabel'
+    github.close()
+
+    assert len(calls) == 2
+    assert github.ratelimit.remaining == 3999
+    assert github.ratelimit.requests == 2
+
+
+def test_pool_picks_most_remaining():
+
+    pool = TokenPool(['a', 'b', 'c'])
+    pool.update('a', 'core', ratelimit_headers(100))
+    pool.update('c', 'core', ratelimit_headers(200))
+
+    # not used yet
+    assert pool.pick()[0] == 'b'
+
+    pool.update('b', 'core', ratelimit_headers(50))
+
+    assert pool.pick()[0] == 'c'
+    assert pool.remaining == 350
+
+
+def test_pool_limits_by_resource():
+
+    pool = TokenPool(['a', 'b'])
+    pool.update('a', 'core', ratelimit_headers(4000))
+    pool.update('a', pool.resource('https://api.github.com/graphql'),
+                ratelimit_headers(10, **{'X-RateLimit-Resource': 'graphql'}))
+    # the response tells the resource
+    pool.update('b', 'core', ratelimit_headers(20, **{'X-RateLimit-Resource': 'graphql'}))
+
+    assert pool.limit('a').remaining == 4000
+    assert pool.limit('a', 'graphql').remaining == 10
+    assert pool.limit('b').remaining is None
+    assert pool.pick('graphql')[0] == 'b'
+    assert pool.remaining == 4000
+    assert pool.requests == 3
+    summary = pool.summary()
+    assert 'token 1 core: 4000/5000 remaining' in summary
+    assert 'token 1 graphql: 10/5000 remaining' in summary
+    assert 'token 2 graphql: 20/5000 remaining' in summary
+
+
+def test_pool_merge():
+
+    pool = TokenPool(['a', 'b'])
+    pool.update('a', 'core', ratelimit_headers(4000))
+    worker = pickle.loads(pickle.dumps(TokenPool(['a', 'b'])))
+    worker.update('a', 'core', ratelimit_headers(3900))
+    worker.update('b', 'graphql', ratelimit_headers(20))
+
+    pool.merge(worker)
+
+    # lower budget of the same reset is the later one
+    assert pool.limit('a').remaining == 3900
+    assert pool.limit('b', 'graphql').remaining == 20
+    assert pool.requests == 3
+
+    worker.reset_counts()
+    assert worker.requests == 0
+    assert worker.limit('a').remaining == 3900
+
+
+class ExhaustedTokenSession:
+    """
+    Fake requests session where token "a" has no remaining budget
+    """
+    def __init__(self):
+        self.tokens = []
+
+    def get(self, url, params=None, headers=None):
+        self.tokens.append(headers['Authorization'])
+        response = requests.Response()
+        if headers['Authorization'] == 'token a':
+            response.status_code = 403
+            response.headers.update(ratelimit_headers(0))
+        else:
+            response.status_code = 200
+            response.headers.update(ratelimit_headers(10))
+            response._content = b'{"login": "filabel"}'
+        return response
+
+
+def test_pool_rotates_exhausted_token():
+
+    session = ExhaustedTokenSession()
+    github = GitHub(['a', 'b'], session=session)
+
+    assert github.user()['login'] == 'filabel'
+    assert github.user()['login'] == 'filabel'
+    assert session.tokens == ['token a', 'token b', 'token b']
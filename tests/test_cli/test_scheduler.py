@@ -0,0 +1,66 @@
+import asyncio
+
+from filabel.scheduler import ConcurrencyLimit
+from filabel.scheduler import ConcurrencyScheduler
+
+
+def test_limit_bounds_in_flight():
+
+    limit = ConcurrencyLimit(3)
+    running = []
+
+    async def task():
+        async with limit.slot():
+            running.append(limit.in_flight)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(*[task() for _ in range(20)])
+
+    asyncio.run(main())
+
+    assert max(running) == 3
+    assert limit.in_flight == 0
+
+
+def test_adaptive_decrease_and_increase():
+
+    limit = ConcurrencyLimit(16, adaptive=True)
+
+    limit.feedback(started=limit._last_decrease, latency=0.1, status=429)
+    assert limit.limit == 8
+
+    # started before the last decrease, the same window is not punished twice
+    limit.feedback(started=0.0, latency=0.1, status=429)
+    assert limit.limit == 8
+
+    limit.feedback(started=limit._last_decrease, latency=0.1, status=200)
+    assert limit.limit == 8 + 1 / 8
+
+
+def test_throttled_status_from_error():
+
+    limit = ConcurrencyLimit(4, adaptive=True)
+
+    class Throttled(Exception):
+        status = 403
+
+    async def main():
+        try:
+            async with limit.slot():
+                raise Throttled()
+        except Throttled:
+            pass
+
+    asyncio.run(main())
+
+    assert limit.limit == 2
+
+
+def test_repo_limits_are_separate():
+
+    scheduler = ConcurrencyScheduler(max_requests=10, max_repo_prs=2)
+
+    assert scheduler.repo('a/a').limit is scheduler.repo('a/a').limit
+    assert scheduler.repo('a/a').limit is not scheduler.repo('b/b').limit
+    assert scheduler.repo('b/b').limit.max_limit == 2
@@ -0,0 +1,141 @@
+import pytest
+import sqlite3
+from click.testing import CliRunner
+
+import filabel as filabel_package
+from filabel import shard
+from filabel.logic import Change, GitHub
+from filabel.ratelimit import TokenPool
+from filabel.shard import iter_sharded_reports
+from filabel.state import StateStore
+
+
+CONFIGS_PATH = 'tests/test_cli/fixtures/configs'
+
+
+PRS = [
+    {'number': 1, 'labels': [], 'files': ['aaaa']},
+    {'number': 2, 'labels': ['a'], 'files': ['bbbb']},
+]
+
+
+@pytest.mark.parametrize('async_run', (False, True))
+def test_sharded_reports_in_order(fake_github, async_run):
+
+    api_url = fake_github({'owner/repo': PRS}).api_url
+
+    reposlugs = ['owner/repo', 'owner/missing', 'owner/repo', 'other/repo']
+    reports = list(iter_sharded_reports(reposlugs, 2, token='<TOKEN>', labels={'a': ['a*'], 'b': ['b*']},
+                                        async_run=async_run, api_url=api_url))
+
+    assert [(report.repo, report.ok) for report in reports] == [
+        ('owner/repo', True), ('owner/missing', False), ('owner/repo', True), ('other/repo', False)
+    ]
+    assert reports[0].prs == {
+        'pr1': [('a', Change.ADD)],
+        'pr2': [('a', Change.DELETE), ('b', Change.ADD)],
+    }
+
+
+@pytest.mark.parametrize('batch_size', (None, 3))
+@pytest.mark.parametrize('async_run', (False, True))
+def test_sharded_state_db(fake_github, tmp_path, async_run, batch_size):
+
+    fake = fake_github(repos=8, prs=5, files=3)
+    state_db = str(tmp_path / 'state.db')
+
+    reports = list(iter_sharded_reports(fake.reposlugs, 3, batch_size=batch_size, token='<TOKEN>',
+                                        labels={'docs': ['docs/*']}, async_run=async_run,
+                                        api_url=fake.api_url, state_db=state_db,
+                                        response_cache=str(tmp_path / 'cache.db')))
+
+    assert [(report.repo, report.ok) for report in reports] == [(reposlug, True) for reposlug in fake.reposlugs]
+    connection = sqlite3.connect(state_db)
+    assert connection.execute('SELECT COUNT(*) FROM prs').fetchone() == (8 * 5,)
+    assert connection.execute('PRAGMA journal_mode').fetchone() == ('wal',)
+
+
+@pytest.mark.parametrize('async_run', (False, True))
+def test_sharded_ratelimit_and_skipped(fake_github, tmp_path, async_run):
+
+    fake = fake_github(repos=4, prs=5, files=3)
+    state_db = str(tmp_path / 'state.db')
+    options = dict(token='<TOKEN>', labels={'docs': ['docs/*']}, async_run=async_run, api_url=fake.api_url,
+                   state_db=state_db)
+
+    ratelimit = TokenPool('<TOKEN>')
+    state_store = StateStore(state_db)
+    try:
+        list(iter_sharded_reports(fake.reposlugs, 2, ratelimit=ratelimit, state_store=state_store, **options))
+        assert ratelimit.requests == sum(fake.requests.values())
+        assert state_store.skipped == 0
+
+        # labeled PRs are unchanged in the next run
+        list(iter_sharded_reports(fake.reposlugs, 2, ratelimit=ratelimit, state_store=state_store, **options))
+        assert ratelimit.requests == sum(fake.requests.values())
+        assert state_store.skipped == 4 * 5
+    finally:
+        state_store.close()
+
+
+def test_sharded_cli_summary(fake_github, tmp_path):
+
+    fake = fake_github(repos=4, prs=5, files=3)
+
+    result = CliRunner().invoke(filabel_package.cli, [
+        '-a', CONFIGS_PATH + '/auth.fff.cfg', '-l', CONFIGS_PATH + '/labels.abc.cfg',
+        '--api-url', fake.api_url, '--workers', '2', '--state-db', str(tmp_path / 'state.db'),
+    ] + fake.reposlugs)
+
+    assert result.exit_code == 0
+    # the same summary as of single process run, requests of the workers included
+    assert f'RATE LIMIT unknown, {sum(fake.requests.values())} requests' in result.output
+    assert 'SKIPPED 0 unchanged PRs' in result.output
+
+
+def test_worker_budget_share(monkeypatch):
+
+    options = []
+    monkeypatch.setattr(shard, '_run_repos', lambda worker_options, reposlugs: options.append(worker_options))
+
+    class Executor:
+        def __init__(self, **kwargs):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def submit(self, fn, *args):
+            fn(*args)
+            return DoneFuture()
+
+    class DoneFuture:
+        def done(self):
+            return True
+
+        def result(self):
+            return [], None, TokenPool('<TOKEN>'), 0
+
+    monkeypatch.setattr(shard.concurrent.futures, 'ProcessPoolExecutor', Executor)
+
+    list(iter_sharded_reports(['owner/repo'], 4, token='<TOKEN>', labels={}))
+
+    # workers share the budget of the token
+    assert options[0]['ratelimit_share'] == 0.25
+
+
+def test_worker_closed(monkeypatch, fake_filabel):
+
+    monkeypatch.setattr(shard, 'create_filabel', lambda **options: fake_filabel(github=GitHub('<TOKEN>')))
+    monkeypatch.setattr(shard, '_filabel', None)
+
+    shard._init_worker({})
+    first = shard._filabel
+    shard._init_worker({})
+
+    assert shard._filabel is first
+    shard._close_worker()
+    assert first.closed and shard._filabel is None
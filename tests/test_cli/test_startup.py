@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from .conftest import CONFIGS_PATH
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# imported only by async run and web app
+HEAVY = {'aiohttp', 'asyncio', 'flask', 'jinja2', 'werkzeug'}
+
+
+def imported_modules(*args, code=None):
+    """
+    Top-level packages imported by filabel CLI run with given arguments or by given code,
+    from -X importtime report
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    command = ['-c', code] if code is not None else ['-m', 'filabel', *args]
+    process = subprocess.run([sys.executable, '-X', 'importtime', *command],
+                             cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                             universal_newlines=True, timeout=60)
+    assert process.returncode == 0, process.stderr
+    return {
+        line.rsplit('|', 1)[1].strip().split('.')[0]
+        for line in process.stderr.splitlines() if line.startswith('import time:') and '|' in line
+    }
+
+
+def test_help_is_light():
+    modules = imported_modules('--help')
+
+    assert 'filabel' in modules
+    assert not modules & HEAVY
+
+
+def test_api_classes_are_light():
+    modules = imported_modules(code='import filabel; filabel.GitHub, filabel.Filabel, filabel.create_app')
+
+    assert not modules & HEAVY
+
+
+@pytest.mark.parametrize(('args', 'heavy'), [
+    ([], set()),
+    (['--async'], {'aiohttp', 'asyncio'}),
+], ids=['sync', 'async'])
+def test_run_imports(fake_github, args, heavy):
+    api_url = fake_github(prs=2, files=2).api_url
+
+    modules = imported_modules('-a', CONFIGS_PATH + '/auth.fff.cfg', '-l', CONFIGS_PATH + '/labels.abc.cfg',
+                               '--api-url', api_url, *args, 'bench/repo0')
+
+    assert modules & HEAVY == heavy
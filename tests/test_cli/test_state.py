@@ -0,0 +1,89 @@
+from filabel.logic import Change, Filabel
+from filabel.state import StateStore
+
+
+class FakeGitHub:
+    """
+    Fake GitHub API wrapper counting requested PR files
+    """
+    def __init__(self, files):
+        self.files = files
+        self.requested = []
+
+    def pr_filenames(self, owner, repo, number):
+        self.requested.append(number)
+        return iter(self.files)
+
+    def update_labels(self, owner, repo, number, existing, future):
+        return [{'name': l} for l in sorted(future)]
+
+    def forget_pr_files(self, owner, repo, number):
+        pass
+
+    def close(self):
+        pass
+
+
+def pr(sha, labels):
+    return {'number': 1, 'head': {'sha': sha}, 'labels': [{'name': l} for l in labels]}
+
+
+def test_unchanged_pr_skipped(tmp_path):
+    store = StateStore(str(tmp_path / 'state.sqlite'))
+    github = FakeGitHub(['aaaa', 'xxxx'])
+    filabel = Filabel('<TOKEN>', {'a': ['a*'], 'b': ['b*']}, github=github, state_store=store)
+
+    assert filabel.run_pr('owner', 'repo', pr('sha1', ['b', 'other'])) == [('a', Change.ADD), ('b', Change.DELETE)]
+    # the PR has the labels from the last run
+    assert filabel.run_pr('owner', 'repo', pr('sha1', ['a', 'other'])) == [('a', Change.NONE)]
+    assert github.requested == [1]
+    assert store.skipped == 1
+
+    # new commit, labels changed by hand and changed configuration invalidate the fingerprint
+    filabel.run_pr('owner', 'repo', pr('sha2', ['a', 'other']))
+    filabel.run_pr('owner', 'repo', pr('sha2', ['a']))
+    filabel.labels = {'a': ['a*'], 'x': ['x*']}
+    filabel.run_pr('owner', 'repo', pr('sha2', ['a']))
+    assert github.requested == [1, 1, 1, 1]
+
+    filabel.close()
+
+
+def test_config_hash_once(tmp_path, monkeypatch):
+    store = StateStore(str(tmp_path / 'state.sqlite'))
+    filabel = Filabel('<TOKEN>', {'a': ['a*']}, github=FakeGitHub(['aaaa']), state_store=store)
+    hashed = []
+    config_hash = StateStore.config_hash
+    monkeypatch.setattr(StateStore, 'config_hash', staticmethod(lambda *args: hashed.append(args) or config_hash(*args)))
+
+    for sha, labels in (('sha1', []), ('sha1', ['a']), ('sha2', ['a'])):
+        filabel.run_pr('owner', 'repo', pr(sha, labels))
+    assert hashed == []
+    assert store.skipped == 1
+
+    # both labels and delete_old are part of the hash
+    filabel.delete_old = False
+    filabel.run_pr('owner', 'repo', pr('sha2', ['a']))
+    assert hashed == [(filabel.labels, False)]
+    assert store.skipped == 1
+    # copied configuration has the same hash as the given one, stored fingerprints stay valid
+    assert config_hash(filabel.labels, False) == config_hash({'a': ['a*']}, False)
+
+    filabel.close()
+
+
+def test_state_persisted(tmp_path):
+    path = str(tmp_path / 'state.sqlite')
+    config_hash = StateStore.config_hash({'a': ['a*']}, True)
+
+    store = StateStore(path)
+    store.store('owner', 'repo', pr('sha1', []), {'a'}, {'a'}, config_hash)
+    store.store('owner', 'repo', {'number': 2, 'labels': []}, {'a'}, {'a'}, config_hash)
+    store.close()
+
+    store = StateStore(path)
+    assert store.unchanged('owner', 'repo', pr('sha1', ['a']), config_hash) == {'a'}
+    assert store.unchanged('owner', 'repo', pr('sha1', ['a']), StateStore.config_hash({'a': ['a*']}, False)) is None
+    # PRs without head SHA are never skipped
+    assert store.unchanged('owner', 'repo', {'number': 2, 'labels': [{'name': 'a'}]}, config_hash) is None
+    store.close()
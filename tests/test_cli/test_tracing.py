@@ -0,0 +1,91 @@
+import io
+import json
+import pytest
+from click.testing import CliRunner
+
+import filabel
+from filabel.logic import Filabel
+from filabel.tracing import JsonTracer, Tracer
+
+from .conftest import CONFIGS_PATH
+
+
+class RecordingTracer(Tracer):
+
+    def __init__(self):
+        super().__init__()
+        self.started = []
+        self.ended = []
+
+    def start(self, span):
+        self.started.append(span)
+
+    def end(self, span):
+        self.ended.append(span)
+
+
+@pytest.mark.parametrize('async_run', [False, True], ids=['sync', 'async'])
+def test_spans_nested(fake_github, async_run):
+    fake = fake_github(prs=3, files=3, max_per_page=2)
+    tracer = RecordingTracer()
+    fl = Filabel('<TOKEN>', {'docs': ['docs/*'], 'python': ['*.py']}, async_run=async_run, per_page=2,
+                 api_url=fake.api_url, tracer=tracer)
+    try:
+        fl.run_repos(['bench/repo0', 'bench/missing'])
+    finally:
+        fl.close()
+
+    assert len(tracer.started) == len(tracer.ended)
+    by_name = {}
+    for span in tracer.ended:
+        by_name.setdefault(span.name, []).append(span)
+
+    missing, repo = sorted(by_name['repo'], key=lambda span: span.attributes['repo'])
+    assert repo.attributes == {'repo': 'bench/repo0'}
+    assert missing.attributes == {'repo': 'bench/missing', 'ok': False}
+
+    prs = by_name['pr']
+    assert sorted(span.attributes['number'] for span in prs) == [1, 2, 3]
+    assert all(span.parent is repo for span in prs)
+    for name in ('files', 'match', 'labels'):
+        assert sorted(span.parent.attributes['number'] for span in by_name[name]) == [1, 2, 3]
+
+    listing = [span for span in by_name['http'] if span.attributes['endpoint'] == '/repos/{owner}/{repo}/pulls']
+    assert sorted((span.parent.attributes['repo'], span.attributes['page'], span.attributes['status'])
+                  for span in listing) == [('bench/missing', 1, 404), ('bench/repo0', 1, 200), ('bench/repo0', 2, 200)]
+
+    files = [span for span in by_name['http'] if span.attributes['endpoint'].endswith('/files')]
+    assert len(files) == 3 * 2
+    assert all(span.parent.name == 'files' and span.attributes['status'] == 200 for span in files)
+    assert all(span.start <= span.end for span in tracer.ended)
+
+
+def test_json_tracer():
+    stream = io.StringIO()
+    tracer = JsonTracer(stream)
+
+    with tracer.span('repo', repo='owner/repo'):
+        with tracer.span('http', method='GET') as span:
+            span.set(status=200)
+    tracer.flush()
+
+    inner, outer = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert outer['name'] == 'repo' and outer['parent'] is None
+    assert inner['name'] == 'http' and inner['parent'] == outer['id']
+    assert inner['attributes'] == {'method': 'GET', 'status': 200}
+    assert outer['start'] <= inner['start'] <= inner['end'] <= outer['end']
+
+
+def test_cli_trace(fake_github, tmp_path):
+    fake = fake_github(prs=2, files=2)
+    path = tmp_path / 'trace.jsonl'
+
+    result = CliRunner().invoke(filabel.cli, [
+        '-a', CONFIGS_PATH + '/auth.fff.cfg', '-l', CONFIGS_PATH + '/labels.abc.cfg',
+        '--api-url', fake.api_url, '--async', '--trace', str(path), 'bench/repo0',
+    ])
+
+    assert result.exit_code == 0
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [span['name'] for span in spans].count('pr') == 2
+    assert [span['name'] for span in spans][-1] == 'repo'
@@ -8,6 +8,7 @@ from filabel.web import webhook_verify_signature
 from filabel.web import process_webhook_ping
 from filabel.web import create_app
 from filabel.web import process_webhook_pr
+from filabel.worker import WorkerPool
 
 from .conftest import CONFIGS_PATH
 
@@ -53,4 +54,58 @@ def test_app(test_app ,github, betamax_session):
 
     response = test_app.get('/')
 
-    assert response.status == '200 OK'
\ No newline at end of file
+    assert response.status == '200 OK'
+
+
+def test_webhook_queued(github, fake_filabel):
+
+    os.environ["FILABEL_CONFIG"] = CONFIGS_PATH + "/labels.abc.cfg" + ':' + CONFIGS_PATH + '/auth.fff.cfg'
+
+    app = create_app(github=github)
+    filabel = fake_filabel()
+    app.config['workers'] = WorkerPool(filabel, workers=1)
+
+    payload = json.dumps({
+        'action': 'synchronize',
+        'number': 7,
+        'pull_request': {'url': 'https://api.github.com/repos/owner/repo/pulls/7', 'number': 7, 'labels': []},
+    }).encode()
+    signature = 'sha1=' + hmac.new(b'tajneheslo', payload, hashlib.sha1).hexdigest()
+
+    response = app.test_client().post('/', data=payload, content_type='application/json', headers={
+        'X-GitHub-Event': 'pull_request',
+        'X-Hub-Signature': signature,
+    })
+    assert response.status_code == 202
+
+    app.config['workers'].join()
+    assert filabel.labeled == [('owner', 'repo', 7)]
+    assert app.test_client().get('/queue').get_json()['processed'] == 1
+
+
+def test_metrics_endpoint(github):
+
+    os.environ["FILABEL_CONFIG"] = CONFIGS_PATH + "/labels.abc.cfg" + ':' + CONFIGS_PATH + '/auth.fff.cfg'
+
+    app = create_app(github=github)
+
+    response = app.test_client().get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert 'filabel_github_requests_total{method="GET",endpoint="/user",status="200"} 1' in response.get_data(True)
+
+
+@pytest.mark.parametrize('webhook', ['workers = many', 'workers = 0', 'debounce = -1'])
+def test_webhook_config_not_usable(tmp_path, caplog, webhook):
+
+    config = tmp_path / 'webhook.cfg'
+    config.write_text(f'[webhook]\n{webhook}\n')
+    os.environ["FILABEL_CONFIG"] = ':'.join([
+        CONFIGS_PATH + "/labels.abc.cfg", CONFIGS_PATH + '/auth.fff.cfg', str(config)
+    ])
+
+    with pytest.raises(SystemExit):
+        create_app()
+
+    assert 'Webhook configuration not usable' in caplog.text
+    assert 'Bad token' not in caplog.text
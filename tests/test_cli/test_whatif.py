@@ -0,0 +1,145 @@
+import gzip
+import json
+import pytest
+
+from click.testing import CliRunner
+
+from filabel.logic import Change, Filabel, GitHub, RepoResult, SyncPagination
+from filabel.whatif import cli, what_if_summary, write_snapshot
+from .conftest import CONFIGS_PATH
+
+
+LABELS = {'docs': ['docs/*'], 'python': ['*.py']}
+
+
+def expected_changes(fake, labels, delete_old=True):
+    """
+    Label changes of fake PRs as computed by Filabel
+    """
+    filabel = Filabel('<TOKEN>', labels, delete_old=delete_old)
+    changes = {}
+    for prs in fake.repos.values():
+        for pr in prs:
+            plan = filabel.plan_labels(pr['files'], set(pr['labels']))
+            if plan.added or plan.deleted:
+                changes[pr['html_url']] = (sorted(plan.added), sorted(plan.deleted))
+    return changes
+
+
+@pytest.fixture
+def snapshot(fake_github, tmp_path):
+    """
+    Snapshot of fake GitHub with some PRs already labeled
+    """
+    fake = fake_github(2, prs=7, files=12, max_per_page=5)
+    fake.pr('bench/repo0', 1)['labels'] = ['bug', 'docs', 'python']
+    fake.pr('bench/repo1', 2)['labels'] = ['obsolete']
+
+    path = tmp_path / 'prs.snapshot'
+    result = CliRunner().invoke(cli, [
+        'snapshot', '-a', CONFIGS_PATH + '/auth.fff.cfg', '--per-page', '5',
+        '--api-url', fake.api_url, str(path),
+    ] + fake.reposlugs + ['bench/missing'])
+
+    assert result.exit_code == 0
+    assert 'REPO bench/missing - FAIL' in result.output
+    assert 'SNAPSHOT 14 PRs saved' in result.output
+    assert 'SNAPSHOT is incomplete, 1 repos and 0 PRs could not be fetched' in result.output
+    return fake, path
+
+
+def test_snapshot_records(snapshot):
+    fake, path = snapshot
+    with gzip.open(path, 'rt') as f:
+        header, *records, missing = [json.loads(line) for line in f]
+
+    assert header['filabel-snapshot'] == 1
+    assert missing == {'repo': 'bench/missing', 'number': None, 'files': None}
+    assert len(records) == 2 * 7
+    for record in records:
+        pr = fake.pr(record['repo'], record['number'])
+        assert record['files'] == pr['files']
+        assert record['labels'] == pr['labels']
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+@pytest.mark.parametrize('delete_old', [True, False], ids=['delete', 'keep'])
+def test_what_if(snapshot, workers, delete_old):
+    fake, path = snapshot
+    requests = sum(fake.requests.values())
+    results = []
+
+    summary = what_if_summary(str(path), LABELS, delete_old, workers=workers, chunk_size=3, emit=results.append)
+
+    assert sum(fake.requests.values()) == requests
+    expected = expected_changes(fake, LABELS, delete_old)
+    assert summary.prs == 14
+    assert (summary.failed_repos, summary.failed_prs) == (1, 0)
+    assert results.pop() == RepoResult('bench/missing', False)
+    assert summary.relabeled == len(expected) == len(results)
+    assert {
+        result.url: (sorted(l for l, t in result.changes if t == Change.ADD),
+                     sorted(l for l, t in result.changes if t == Change.DELETE))
+        for result in results
+    } == expected
+    # results are in the snapshot order
+    assert [r.url for r in results] == sorted((r.url for r in results),
+                                              key=lambda url: (url.split('/')[-3], int(url.split('/')[-1])))
+
+
+def test_what_if_cli(snapshot, tmp_path):
+    fake, path = snapshot
+    config = tmp_path / 'labels.cfg'
+    config.write_text('[labels]\ndocs=docs/*\npython=*.py\n')
+
+    result = CliRunner().invoke(cli, ['what-if', '-l', str(config), '-w', '2', '-o', 'jsonl', str(path)])
+
+    assert result.exit_code == 0
+    records = [json.loads(line) for line in result.output.splitlines() if line.startswith('{')]
+    assert records.pop() == {'repo': 'bench/missing', 'pr': None, 'status': 'fail'}
+    assert {r['pr'] for r in records} == set(expected_changes(fake, LABELS))
+    assert f'WHAT-IF {len(records)} of 14 PRs would be relabeled' in result.output
+    assert 'WHAT-IF snapshot is incomplete, 1 repos and 0 PRs were not fetched' in result.output
+
+
+def test_what_if_unchanged_labels(snapshot):
+    _, path = snapshot
+    results = []
+
+    summary = what_if_summary(str(path), {'nothing': ['nothing/*']}, delete_old=False, workers=1, emit=results.append)
+
+    assert summary == (14, 0, 0, 0, 0, 1)
+    assert results == [RepoResult('bench/missing', False)]
+
+
+def test_what_if_not_snapshot(tmp_path):
+    path = tmp_path / 'labels.cfg'
+    path.write_text('[labels]\n')
+
+    result = CliRunner().invoke(cli, ['what-if', '-l', CONFIGS_PATH + '/labels.abc.cfg', str(path)])
+
+    assert result.exit_code == 1
+    assert 'is not a filabel snapshot' in result.output
+
+
+def test_write_snapshot_failed_pr(fake_github, tmp_path):
+    fake = fake_github(prs=20, files=3, error_rate=0.5, seed=0)
+    github = GitHub('<TOKEN>', strategy=SyncPagination(), per_page=100, api_url=fake.api_url)
+    path = tmp_path / 'prs.snapshot'
+    try:
+        with open(path, 'wb') as stream:
+            results = list(write_snapshot(github, fake.reposlugs, stream, jobs=4))
+    finally:
+        github.close()
+
+    # the listing succeeds with this seed, some of the files requests fail
+    assert results[0].ok
+    failed = [r for r in results[1:] if r.changes is None]
+    assert 0 < len(failed) < 20
+    with gzip.open(path, 'rt') as f:
+        records = [json.loads(line) for line in f][1:]
+    assert len(records) == 20
+    assert [r['url'] for r in records if r['files'] is None] == [r.url for r in failed]
+
+    summary = what_if_summary(str(path), LABELS, workers=1)
+    assert (summary.prs, summary.failed_prs, summary.failed_repos) == (20 - len(failed), len(failed), 0)
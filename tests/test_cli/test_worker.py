@@ -0,0 +1,110 @@
+import threading
+import time
+
+from filabel.worker import WorkerPool
+
+
+def test_pool_processes_jobs(fake_filabel):
+    gate = threading.Event()
+    filabel = fake_filabel(gate)
+    pool = WorkerPool(filabel, workers=2)
+
+    for number in range(5):
+        pool.submit('owner', 'repo', {'number': number})
+
+    # both workers get blocked with one job each
+    deadline = time.monotonic() + 5
+    while pool.depth > 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert pool.stats()['depth'] == 3
+
+    gate.set()
+    pool.join()
+
+    stats = pool.stats()
+    assert sorted(filabel.labeled) == [('owner', 'repo', n) for n in range(1, 5)]
+    assert (stats['depth'], stats['processed'], stats['failed']) == (0, 5, 1)
+    assert 0 < stats['latency_avg'] <= stats['latency_max']
+
+    pool.stop()
+    assert not pool._threads
+
+
+def test_events_coalesced(fake_filabel):
+    gate = threading.Event()
+    filabel = fake_filabel(gate)
+    pool = WorkerPool(filabel, workers=1)
+
+    pool.submit('owner', 'repo', {'number': 1})
+    deadline = time.monotonic() + 5
+    while pool.depth and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # the worker is busy, so the events of PR 2 wait and the latest wins
+    for sha in ('a', 'b', 'c'):
+        pool.submit('owner', 'repo', {'number': 2, 'head': {'sha': sha}})
+    assert pool.depth == 1
+
+    gate.set()
+    pool.join()
+    pool.stop()
+
+    assert filabel.labeled == [('owner', 'repo', 1), ('owner', 'repo', 2)]
+    assert filabel.prs[-1]['head'] == {'sha': 'c'}
+    assert pool.stats()['coalesced'] == 2
+
+
+def test_events_debounced(fake_filabel):
+    filabel = fake_filabel()
+    pool = WorkerPool(filabel, workers=2, debounce=0.2)
+
+    for _ in range(4):
+        pool.submit('owner', 'repo', {'number': 3})
+        time.sleep(0.02)
+    pool.join()
+    pool.stop()
+
+    assert filabel.labeled == [('owner', 'repo', 3)]
+    assert pool.stats()['coalesced'] == 3
+    assert pool.stats()['latency_max'] >= 0.2
+
+
+def test_debounced_pr_does_not_hold_worker(fake_filabel):
+    filabel = fake_filabel()
+    pool = WorkerPool(filabel, workers=1, debounce=0.2)
+
+    # PR 1 keeps receiving events, PR 2 gets single one after it
+    pool.submit('owner', 'repo', {'number': 1})
+    for num in range(10):
+        time.sleep(0.05)
+        if num == 1:
+            pool.submit('owner', 'repo', {'number': 2})
+        pool.submit('owner', 'repo', {'number': 1})
+    pool.join()
+    pool.stop()
+
+    assert filabel.labeled == [('owner', 'repo', 2), ('owner', 'repo', 1)]
+
+
+def test_pr_not_labeled_concurrently(fake_filabel):
+    gate = threading.Event()
+    filabel = fake_filabel(gate)
+    pool = WorkerPool(filabel, workers=2)
+
+    pool.submit('owner', 'repo', {'number': 1, 'head': {'sha': 'a'}})
+    deadline = time.monotonic() + 5
+    while not filabel.started and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # the PR is being labeled, its new event waits although the other worker is idle
+    pool.submit('owner', 'repo', {'number': 1, 'head': {'sha': 'b'}})
+    time.sleep(0.1)
+    assert filabel.started == [1]
+    assert pool.depth == 1
+
+    gate.set()
+    pool.join()
+    pool.stop()
+
+    assert filabel.started == [1, 1]
+    assert [pr['head']['sha'] for pr in filabel.prs] == ['a', 'b']